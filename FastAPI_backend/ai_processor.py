@@ -1,10 +1,56 @@
-# src/ai_processor.py
+# FastAPI_backend/ai_processor.py
 
 from __future__ import annotations
 
 import os
-from typing import List, Dict, Any, Optional
-from huggingface_hub import InferenceClient
+import time
+import asyncio
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator, Callable, Awaitable
+from huggingface_hub import InferenceClient, AsyncInferenceClient
+
+try:
+    from src.generation_cache import GenerationCache, make_key
+except ImportError:
+    from generation_cache import GenerationCache, make_key
+
+try:
+    from src.local_inference import get_local_engine
+except ImportError:
+    from local_inference import get_local_engine
+
+try:
+    from src.resilience import ResiliencePolicy, HF_CONNECT_TIMEOUT, HF_READ_TIMEOUT, is_retryable
+except ImportError:
+    from resilience import ResiliencePolicy, HF_CONNECT_TIMEOUT, HF_READ_TIMEOUT, is_retryable
+
+try:
+    from src.model_router import ModelRouter
+except ImportError:
+    from model_router import ModelRouter
+
+try:
+    from src.model_warmup import WarmupScheduler, WARMUP_ENABLED
+except ImportError:
+    from model_warmup import WarmupScheduler, WARMUP_ENABLED
+
+try:
+    from src.chunker import iter_chunks, CHUNK_TOKENS, CHUNK_OVERLAP
+except ImportError:
+    from chunker import iter_chunks, CHUNK_TOKENS, CHUNK_OVERLAP
+
+try:
+    from src.flashcard_generator import question_key
+except ImportError:
+    from flashcard_generator import question_key
+
+try:
+    from src.http_client import get_http_client, get_async_http_client
+except ImportError:
+    from http_client import get_http_client, get_async_http_client
 
 # ============================
 # Model Registry
@@ -33,6 +79,14 @@ try:
 except Exception:
     _HF_TOKEN_FROM_SETTINGS = None
 
+try:
+    from config.settings import AI_BACKEND as _AI_BACKEND_FROM_SETTINGS
+except Exception:
+    _AI_BACKEND_FROM_SETTINGS = None
+
+# "remote" = Hugging Face Inference API, "local" = transformers on this machine
+AI_BACKEND = (os.getenv("AI_BACKEND") or _AI_BACKEND_FROM_SETTINGS or "remote").lower()
+
 
 def _get_hf_token() -> Optional[str]:
     return (
@@ -45,6 +99,10 @@ def _get_hf_token() -> Optional[str]:
 # Hugging Face Client
 # ============================
 
+# InferenceClient takes a single per-request timeout, so the connect and
+# read budgets are combined into one deadline.
+HF_TIMEOUT = HF_CONNECT_TIMEOUT + HF_READ_TIMEOUT
+
 _HF_CLIENT: Optional[InferenceClient] = None
 
 
@@ -54,61 +112,340 @@ def _get_client() -> InferenceClient:
         token = _get_hf_token()
         if not token:
             raise RuntimeError("❌ Hugging Face API key is missing. Set HUGGING_FACE_API_KEY.")
-        _HF_CLIENT = InferenceClient(token=token)
+        _HF_CLIENT = InferenceClient(token=token, timeout=HF_TIMEOUT)
     return _HF_CLIENT
 
+
+_HF_ASYNC_CLIENT: Optional[AsyncInferenceClient] = None
+
+
+def _get_async_client() -> AsyncInferenceClient:
+    """Shared async client; reusing it keeps one HTTP connection pool."""
+    global _HF_ASYNC_CLIENT
+    if _HF_ASYNC_CLIENT is None:
+        token = _get_hf_token()
+        if not token:
+            raise RuntimeError("❌ Hugging Face API key is missing. Set HUGGING_FACE_API_KEY.")
+        _HF_ASYNC_CLIENT = AsyncInferenceClient(token=token, timeout=HF_TIMEOUT)
+    return _HF_ASYNC_CLIENT
+
+# ============================
+# Resilience
+# ============================
+
+# Per-model circuit breakers + a global retry budget around every remote call
+_RESILIENCE = ResiliencePolicy()
+
+
+def resilience_stats() -> Dict[str, Any]:
+    """Circuit states per model and the remaining retry budget."""
+    return _RESILIENCE.snapshot()
+
+# ============================
+# Result cache
+# ============================
+
+_CACHE: Optional[GenerationCache] = None
+
+
+def _get_cache() -> GenerationCache:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = GenerationCache()
+    return _CACHE
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the generation cache."""
+    return _get_cache().stats()
+
+# ============================
+# Model routing
+# ============================
+
+MODEL_FAMILIES = {
+    "paraphrase": PARAPHRASE_MODELS,
+    "questions": QG_MODELS,
+}
+
+# Models whose circuit is open are routed around until it half-opens;
+# models the warm-up scheduler found cold are tried after warm ones
+ROUTER = ModelRouter(
+    health_check=lambda model_id: not _RESILIENCE.is_open(model_id),
+    warm_check=lambda model_id: WARMUP.is_warm(model_id),
+)
+
+
+def router_stats() -> Dict[str, Any]:
+    """Rolling p50/p95 latency, error rate and health per model id."""
+    return ROUTER.snapshot()
+
+
+def route_request(
+    family: str,
+    model_choice: str,
+    attempt: Callable[[str], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Call `attempt(choice)` for each model of the family in router order
+    until one succeeds, recording latency and outcome per model. Pass
+    model_choice="auto" to start from the fastest healthy model.
+    """
+    models = MODEL_FAMILIES[family]
+    r: Dict[str, Any] = {"ok": False, "data": "No models available", "status": 0}
+    for choice in ROUTER.candidates(models, model_choice):
+        start = time.monotonic()
+        r = attempt(choice)
+        if not r.get("cached"):
+            ROUTER.record(models[choice], time.monotonic() - start, r["ok"])
+        if r["ok"]:
+            return {**r, "model_choice": choice}
+    return r
+
+
+async def route_request_async(
+    family: str,
+    model_choice: str,
+    attempt: Callable[[str], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """Async version of route_request."""
+    models = MODEL_FAMILIES[family]
+    r: Dict[str, Any] = {"ok": False, "data": "No models available", "status": 0}
+    for choice in ROUTER.candidates(models, model_choice):
+        start = time.monotonic()
+        r = await attempt(choice)
+        if not r.get("cached"):
+            ROUTER.record(models[choice], time.monotonic() - start, r["ok"])
+        if r["ok"]:
+            return {**r, "model_choice": choice}
+    return r
+
 # ============================
 # Core helper
 # ============================
 
+# Upper bound on parallel requests when a model can't batch sequences.
+MAX_FANOUT_WORKERS = int(os.getenv("HF_MAX_FANOUT_WORKERS", "5"))
+
+# Models whose endpoint rejected a batched request; these go straight to fan-out.
+_NO_BATCH_MODELS: set = set()
+
+# Raw task endpoint for batched requests; the model id is appended
+HF_INFERENCE_URL = os.getenv("HF_INFERENCE_URL", "https://router.huggingface.co/hf-inference/models").rstrip("/")
+
+
+def _text_generation(client: InferenceClient, model_id: str, prompt: str, params: Dict[str, Any]) -> str:
+    return client.text_generation(
+        model=model_id,
+        prompt=prompt,
+        max_new_tokens=params.get("max_new_tokens", 128),
+        temperature=params.get("temperature", 0.7),
+        top_p=params.get("top_p", 0.95),
+        do_sample=params.get("do_sample", True),
+        return_full_text=False,
+        seed=params.get("seed"),
+    )
+
+
+def _generate_once(client: InferenceClient, model_id: str, prompt: str, params: Dict[str, Any]) -> str:
+    return _RESILIENCE.call(model_id, lambda: _text_generation(client, model_id, prompt, params))
+
+
+def _batch_request(model_id: str, prompt: str, params: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """Keyword arguments for a raw text2text POST asking for `n` sequences."""
+    token = _get_hf_token()
+    if not token:
+        raise RuntimeError("❌ Hugging Face API key is missing. Set HUGGING_FACE_API_KEY.")
+    return {
+        "url": f"{HF_INFERENCE_URL}/{model_id}",
+        "headers": {"Authorization": f"Bearer {token}"},
+        "json": {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": params.get("max_new_tokens", 128),
+                "temperature": params.get("temperature", 0.7),
+                "top_p": params.get("top_p", 0.95),
+                "do_sample": params.get("do_sample", True),
+                "num_return_sequences": n,
+                **({"seed": params["seed"]} if params.get("seed") is not None else {}),
+            },
+            "options": {"wait_for_model": True},
+        },
+        "timeout": HF_TIMEOUT,
+    }
+
+
+def _parse_batch(model_id: str, data: Any, n: int) -> Optional[List[Dict[str, Any]]]:
+    if not isinstance(data, list) or len(data) < n:
+        _NO_BATCH_MODELS.add(model_id)
+        return None
+    return [{"generated_text": it.get("generated_text", "")} for it in data[:n] if isinstance(it, dict)]
+
+
+def _generate_batched(model_id: str, prompt: str, params: Dict[str, Any], n: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Ask for all `n` sequences in a single request using the raw
+    text2text payload, sent over the shared pooled HTTP client
+    (InferenceClient has no raw POST). Returns None when the backend
+    can't do it.
+    """
+    if model_id in _NO_BATCH_MODELS or _RESILIENCE.is_open(model_id):
+        return None
+
+    try:
+        response = get_http_client().post(**_batch_request(model_id, prompt, params, n))
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        if not is_retryable(e):
+            _NO_BATCH_MODELS.add(model_id)
+        return None
+    return _parse_batch(model_id, data, n)
+
+
+def _remote_generate(model_id: str, prompt: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Generate through the Hugging Face Inference API."""
+    client = _get_client()
+    num_return_sequences = max(1, int(params.get("num_return_sequences", 1)))
+
+    if num_return_sequences == 1:
+        return [{"generated_text": _generate_once(client, model_id, prompt, params)}]
+
+    outputs = _generate_batched(model_id, prompt, params, num_return_sequences)
+    if outputs is None:
+        workers = min(num_return_sequences, MAX_FANOUT_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            texts = list(pool.map(
+                lambda _: _generate_once(client, model_id, prompt, params),
+                range(num_return_sequences),
+            ))
+        outputs = [{"generated_text": t} for t in texts]
+    return outputs
+
+
+def _local_generate(model_id: str, prompt: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Generate with the in-process transformers engine."""
+    return get_local_engine().generate(model_id, [prompt], params)[0]
+
+
+BACKENDS = {
+    "remote": _remote_generate,
+    "local": _local_generate,
+}
+
+
+def preload_local_models(model_ids: Optional[List[str]] = None) -> List[str]:
+    """Load local checkpoints up front (all registered models by default)."""
+    engine = get_local_engine()
+    for model_id in model_ids or [*PARAPHRASE_MODELS.values(), *QG_MODELS.values()]:
+        engine.load(model_id)
+    return engine.loaded_models()
+
+
 def _hf_text2text(
     model_id: str,
     prompt: str,
     params: Optional[Dict[str, Any]] = None,
+    bypass_cache: bool = False,
 ) -> Dict[str, Any]:
     """
     Wrapper around Hugging Face InferenceClient.text_generation
     to simulate text2text generation (works for T5/Pegasus/Flan).
-    """
-    try:
-        client = _get_client()
-        params = params or {}
 
-        num_return_sequences = params.get("num_return_sequences", 1)
-        outputs = []
+    Runs on the backend selected by AI_BACKEND. Remotely, multiple
+    sequences are requested in one batched call when the endpoint
+    supports it, otherwise fanned out concurrently.
 
-        for _ in range(num_return_sequences):
-            out = client.text_generation(
-                model=model_id,
-                prompt=prompt,
-                max_new_tokens=params.get("max_new_tokens", 128),
-                temperature=params.get("temperature", 0.7),
-                top_p=params.get("top_p", 0.95),
-                do_sample=params.get("do_sample", True),
-                return_full_text=False,
-            )
-            outputs.append({"generated_text": out})
+    Successful results are cached by (model_id, prompt, params). Pass
+    `bypass_cache=True`, or a different `seed` in params, to get a fresh
+    sample for an otherwise identical request.
+    """
+    params = params or {}
+    key = make_key(model_id, prompt, params)
+    if not bypass_cache:
+        cached = _get_cache().get(key)
+        if cached is not None:
+            return {"ok": True, "data": cached, "status": 200, "cached": True}
 
+    try:
+        generate = BACKENDS.get(AI_BACKEND, _remote_generate)
+        outputs = generate(model_id, prompt, params)
+
+        _get_cache().set(key, outputs)
         return {"ok": True, "data": outputs, "status": 200}
 
     except Exception as e:
-        return {"ok": False, "data": str(e), "status": 0}
+        return {"ok": False, "data": str(e), "status": getattr(e, "status", 0)}
+
+def _remote_generate_many(model_id: str, prompts: List[str], params: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    workers = max(1, min(len(prompts), MAX_FANOUT_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda p: _remote_generate(model_id, p, params), prompts))
+
+
+def _local_generate_many(model_id: str, prompts: List[str], params: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    return get_local_engine().generate(model_id, prompts, params)
+
+
+BATCH_BACKENDS = {
+    "remote": _remote_generate_many,
+    "local": _local_generate_many,
+}
+
+
+def hf_text2text_batch(
+    model_id: str,
+    prompts: List[str],
+    params: Optional[Dict[str, Any]] = None,
+    bypass_cache: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Batched form of _hf_text2text: one result dict per prompt, in order.
+
+    Cached prompts are answered directly and duplicate prompts are
+    generated once. The remaining prompts go to the backend as a single
+    batch (a true batched generate() locally, a concurrent fan-out remotely).
+    """
+    params = params or {}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+    todo: Dict[str, List[int]] = {}
+
+    for i, prompt in enumerate(prompts):
+        key = make_key(model_id, prompt, params)
+        cached = None if bypass_cache else _get_cache().get(key)
+        if cached is not None:
+            results[i] = {"ok": True, "data": cached, "status": 200, "cached": True}
+        else:
+            todo.setdefault(prompt, []).append(i)
+
+    if todo:
+        unique = list(todo)
+        try:
+            generate = BATCH_BACKENDS.get(AI_BACKEND, _remote_generate_many)
+            outputs = generate(model_id, unique, params)
+            for prompt, out in zip(unique, outputs):
+                _get_cache().set(make_key(model_id, prompt, params), out)
+                for i in todo[prompt]:
+                    results[i] = {"ok": True, "data": out, "status": 200}
+        except Exception as e:
+            for prompt in unique:
+                for i in todo[prompt]:
+                    results[i] = {"ok": False, "data": str(e), "status": getattr(e, "status", 0)}
+
+    return results  # type: ignore[return-value]
 
 # ============================
 # Public functions
 # ============================
 
-def paraphrase_text(
+def build_paraphrase_request(
     text: str,
     num_return_sequences: int = 3,
     max_new_tokens: int = 96,
     model_choice: str = DEFAULT_PARAPHRASE,
-) -> List[str]:
-    """Generate paraphrases using Pegasus / T5 / Flan."""
-    text = (text or "").strip()
-    if not text:
-        return ["⚠️ Please provide some text to paraphrase."]
-
+    seed: Optional[int] = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """Return (model_id, prompt, params) for a paraphrase request."""
     model_id = PARAPHRASE_MODELS.get(model_choice, PARAPHRASE_MODELS[DEFAULT_PARAPHRASE])
 
     params = {
@@ -118,24 +455,52 @@ def paraphrase_text(
         "top_p": 0.95,
         "max_new_tokens": max_new_tokens,
     }
+    if seed is not None:
+        params["seed"] = seed
+    return model_id, (text or "").strip(), params
+
 
-    r = _hf_text2text(model_id, text, params)
+def parse_paraphrases(r: Dict[str, Any]) -> List[str]:
+    """Turn a _hf_text2text result into a list of paraphrases."""
     if r["ok"]:
         return [it.get("generated_text", "").strip() for it in r["data"] if isinstance(it, dict)]
     return [f"❌ Paraphrasing failed: {r['data']}"]
 
 
-def generate_questions(
+def paraphrase_text(
     text: str,
-    max_questions: int = 5,
+    num_return_sequences: int = 3,
     max_new_tokens: int = 96,
-    model_choice: str = DEFAULT_QG,
+    model_choice: str = DEFAULT_PARAPHRASE,
+    bypass_cache: bool = False,
+    seed: Optional[int] = None,
 ) -> List[str]:
-    """Generate study questions from text using T5-based QG models."""
+    """
+    Generate paraphrases using Pegasus / T5 / Flan.
+    Fails over to the other paraphrase models if `model_choice` errors.
+    """
     text = (text or "").strip()
     if not text:
-        return ["⚠️ Please provide text to generate questions."]
+        return ["⚠️ Please provide some text to paraphrase."]
+
+    def attempt(choice: str) -> Dict[str, Any]:
+        model_id, prompt, params = build_paraphrase_request(
+            text, num_return_sequences, max_new_tokens, choice, seed
+        )
+        return _hf_text2text(model_id, prompt, params, bypass_cache=bypass_cache)
+
+    return parse_paraphrases(route_request("paraphrase", model_choice, attempt))
 
+
+def build_question_request(
+    text: str,
+    max_questions: int = 5,
+    max_new_tokens: int = 96,
+    model_choice: str = DEFAULT_QG,
+    seed: Optional[int] = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """Return (model_id, prompt, params) for a question generation request."""
+    text = (text or "").strip()
     model_id = QG_MODELS.get(model_choice, QG_MODELS[DEFAULT_QG])
 
     if model_choice == "t5-advanced":
@@ -147,8 +512,13 @@ def generate_questions(
         )
 
     params = {"max_new_tokens": max_new_tokens, "temperature": 0.7, "top_p": 0.95}
-    r = _hf_text2text(model_id, prompt, params)
+    if seed is not None:
+        params["seed"] = seed
+    return model_id, prompt, params
+
 
+def parse_questions(r: Dict[str, Any], max_questions: int = 5) -> List[str]:
+    """Turn a _hf_text2text result into a list of questions."""
     if r["ok"]:
         blob = r["data"][0].get("generated_text", "").strip()
         lines = [ln.strip(" -)\t.") for ln in blob.splitlines() if ln.strip()]
@@ -165,3 +535,553 @@ def generate_questions(
         return out or [blob]
 
     return [f"❌ Question generation failed: {r['data']}"]
+
+
+def generate_questions(
+    text: str,
+    max_questions: int = 5,
+    max_new_tokens: int = 96,
+    model_choice: str = DEFAULT_QG,
+    bypass_cache: bool = False,
+    seed: Optional[int] = None,
+) -> List[str]:
+    """
+    Generate study questions from text using T5-based QG models.
+    Fails over to the other QG models if `model_choice` errors.
+    """
+    text = (text or "").strip()
+    if not text:
+        return ["⚠️ Please provide text to generate questions."]
+
+    def attempt(choice: str) -> Dict[str, Any]:
+        model_id, prompt, params = build_question_request(
+            text, max_questions, max_new_tokens, choice, seed
+        )
+        return _hf_text2text(model_id, prompt, params, bypass_cache=bypass_cache)
+
+    return parse_questions(route_request("questions", model_choice, attempt), max_questions)
+
+# ============================
+# Long documents
+# ============================
+
+MAX_CHUNK_WORKERS = int(os.getenv("AI_MAX_CHUNK_WORKERS", "4"))
+
+# Chunk generations get their own pool so a document job running on the
+# job pool never waits on work queued behind itself.
+_CHUNK_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def _get_chunk_pool() -> ThreadPoolExecutor:
+    global _CHUNK_POOL
+    if _CHUNK_POOL is None:
+        _CHUNK_POOL = ThreadPoolExecutor(max_workers=MAX_CHUNK_WORKERS, thread_name_prefix="ai-chunk")
+    return _CHUNK_POOL
+
+
+def generate_questions_from_document(
+    text,
+    max_questions: int = 10,
+    questions_per_chunk: int = 3,
+    max_new_tokens: int = 96,
+    model_choice: str = DEFAULT_QG,
+    chunk_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP,
+) -> List[str]:
+    """
+    Generate questions from a document of any length.
+
+    `text` may be a string or an iterable of pieces (e.g. PDF pages). It is
+    split into overlapping, sentence-aligned chunks that are generated in
+    parallel with a bounded number in flight; the questions are merged in
+    document order, de-duplicated and capped at `max_questions`.
+    """
+    max_questions = max(1, int(max_questions))
+    pool = _get_chunk_pool()
+    pending: deque = deque()
+    seen: set = set()
+    out: List[str] = []
+    errors: List[str] = []
+
+    def collect(fut: Future) -> None:
+        try:
+            questions = fut.result(timeout=JOB_TIMEOUT)
+        except Exception as e:
+            errors.append(f"❌ Question generation failed: {e}")
+            return
+        for q in questions:
+            if q.startswith(("❌", "⚠️")):
+                errors.append(q)
+                continue
+            key = question_key(q)
+            if key and key not in seen and len(out) < max_questions:
+                seen.add(key)
+                out.append(q)
+
+    for chunk in iter_chunks(text, max_tokens=chunk_tokens, overlap_tokens=overlap_tokens):
+        pending.append(pool.submit(
+            generate_questions,
+            chunk,
+            max_questions=questions_per_chunk,
+            max_new_tokens=max_new_tokens,
+            model_choice=model_choice,
+        ))
+        if len(pending) >= MAX_CHUNK_WORKERS * 2:
+            collect(pending.popleft())
+        if len(out) >= max_questions:
+            break
+
+    while pending and len(out) < max_questions:
+        collect(pending.popleft())
+    for fut in pending:
+        fut.cancel()
+
+    if out:
+        return out
+    return errors[:1] or ["⚠️ Please provide text to generate questions."]
+
+
+# ============================
+# Job executor
+# ============================
+
+JOB_TIMEOUT = float(os.getenv("AI_JOB_TIMEOUT", "60"))
+MAX_JOB_WORKERS = int(os.getenv("AI_MAX_JOB_WORKERS", "8"))
+
+JOB_KINDS = {
+    "paraphrase": paraphrase_text,
+    "questions": generate_questions,
+    "document_questions": generate_questions_from_document,
+}
+
+_JOB_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def _get_job_pool() -> ThreadPoolExecutor:
+    global _JOB_POOL
+    if _JOB_POOL is None:
+        _JOB_POOL = ThreadPoolExecutor(max_workers=MAX_JOB_WORKERS, thread_name_prefix="ai-job")
+    return _JOB_POOL
+
+
+def submit_job(
+    kind: str,
+    params: Optional[Dict[str, Any]] = None,
+    pool: Optional[ThreadPoolExecutor] = None,
+    on_start: Optional[Callable[[], None]] = None,
+) -> Future:
+    """
+    Submit a single paraphrase/question job to `pool` (the shared job pool
+    by default). `on_start` is called from the worker thread when the job
+    leaves the queue and starts running.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    fn = JOB_KINDS[kind]
+
+    def run() -> Any:
+        if on_start is not None:
+            on_start()
+        return fn(**(params or {}))
+
+    return (pool or _get_job_pool()).submit(run)
+
+
+def _wait_started(fut: Future, started: threading.Event) -> None:
+    """Block while the job is queued behind others; its timeout starts after this."""
+    while not started.wait(0.05) and not fut.done():
+        pass
+
+
+def run_jobs(
+    jobs: Dict[str, Dict[str, Any]],
+    timeout: float = JOB_TIMEOUT,
+    pool: Optional[ThreadPoolExecutor] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run independent jobs concurrently and collect their results.
+
+    `jobs` maps a name to {"kind": <one of JOB_KINDS>, "params": {...},
+    ["timeout": seconds]}. Each result is {"ok": bool, "data": ...}; a job
+    that raises or exceeds its timeout fails on its own without affecting
+    the others. The timeout counts from when a job starts running, so time
+    spent queued behind a busy pool is not held against it.
+    """
+    futures: Dict[str, Any] = {}
+    for name, job in jobs.items():
+        started = threading.Event()
+        clock: Dict[str, float] = {}
+
+        def on_start(started: threading.Event = started, clock: Dict[str, float] = clock) -> None:
+            clock["start"] = time.monotonic()
+            started.set()
+
+        try:
+            futures[name] = (submit_job(job.get("kind", ""), job.get("params"), pool=pool, on_start=on_start), started, clock)
+        except Exception as e:
+            futures[name] = e
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, entry in futures.items():
+        if isinstance(entry, Exception):
+            results[name] = {"ok": False, "data": str(entry)}
+            continue
+        fut, started, clock = entry
+        job_timeout = jobs[name].get("timeout", timeout)
+        _wait_started(fut, started)
+        remaining = max(0.0, clock.get("start", time.monotonic()) + job_timeout - time.monotonic())
+        try:
+            results[name] = {"ok": True, "data": fut.result(timeout=remaining)}
+        except FutureTimeout:
+            fut.cancel()
+            results[name] = {"ok": False, "data": f"Timed out after {job_timeout:g}s"}
+        except Exception as e:
+            results[name] = {"ok": False, "data": str(e)}
+    return results
+
+
+async def run_job_async(
+    kind: str,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: float = JOB_TIMEOUT,
+) -> Dict[str, Any]:
+    """
+    Await a single job from an async handler without blocking the event
+    loop. Like run_jobs, the timeout starts once the job is running.
+    """
+    loop = asyncio.get_running_loop()
+    started = asyncio.Event()
+    try:
+        fut = asyncio.wrap_future(submit_job(kind, params, on_start=lambda: loop.call_soon_threadsafe(started.set)))
+        waiter = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait({fut, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        data = await asyncio.wait_for(fut, timeout=timeout)
+        return {"ok": True, "data": data}
+    except asyncio.TimeoutError:
+        return {"ok": False, "data": f"Timed out after {timeout:g}s"}
+    except Exception as e:
+        return {"ok": False, "data": str(e)}
+
+
+def _is_error_message(text: str) -> bool:
+    return text.startswith(("❌", "⚠️"))
+
+
+def generate_cards_from_chunk(
+    chunk: str,
+    questions_per_chunk: int = 3,
+    num_paraphrases: int = 3,
+    max_new_tokens: int = 96,
+    pool: Optional[ThreadPoolExecutor] = None,
+) -> List[Dict[str, str]]:
+    """
+    Question/answer pairs for one chunk of a document, paired like the
+    Paraphrase & QG page: each question is answered with one of the
+    chunk's paraphrases (or the chunk itself if paraphrasing failed).
+    Both generations run on `pool` (the shared job pool by default).
+    Raises RuntimeError when no questions could be generated.
+    """
+    results = run_jobs({
+        "paraphrase": {"kind": "paraphrase", "params": {"text": chunk, "num_return_sequences": num_paraphrases}},
+        "questions": {"kind": "questions", "params": {
+            "text": chunk, "max_questions": questions_per_chunk, "max_new_tokens": max_new_tokens,
+        }},
+    }, pool=pool)
+    questions = [q for q in (results["questions"]["data"] if results["questions"]["ok"] else []) if not _is_error_message(q)]
+    if not questions:
+        reason = results["questions"]["data"]
+        raise RuntimeError(reason[0] if isinstance(reason, list) and reason else str(reason or "No questions generated"))
+    paraphrases = [p for p in (results["paraphrase"]["data"] if results["paraphrase"]["ok"] else []) if p and not _is_error_message(p)]
+    answers = paraphrases or [chunk]
+    return [{"question": q, "answer": answers[i % len(answers)]} for i, q in enumerate(questions)]
+
+
+# ============================
+# Warm-up / keep-alive
+# ============================
+
+def _warmup_ping(model_id: str) -> bool:
+    """
+    Send a one-token request (or load the local checkpoint) so the model is
+    ready. Goes straight to the client: no generation cache, no retries, and
+    cold-start 503s don't spend the retry budget or trip the model's breaker.
+    """
+    if AI_BACKEND == "local":
+        get_local_engine().load(model_id)
+        return True
+    _text_generation(_get_client(), model_id, "ping", {"max_new_tokens": 1})
+    return True
+
+
+WARMUP = WarmupScheduler(ping=_warmup_ping)
+
+
+def start_warmup() -> bool:
+    """
+    Warm every registered model in the background, then keep them warm
+    every AI_KEEPALIVE_INTERVAL seconds. Safe to call more than once.
+    """
+    if not WARMUP_ENABLED:
+        return False
+    return WARMUP.start([*PARAPHRASE_MODELS.values(), *QG_MODELS.values()])
+
+
+def stop_warmup() -> None:
+    WARMUP.stop()
+
+
+def warmup_stats() -> Dict[str, Any]:
+    """Warm/cold state and last ping latency per model id."""
+    return WARMUP.states()
+
+
+# ============================
+# Async API
+# ============================
+
+MAX_ASYNC_REQUESTS = int(os.getenv("AI_MAX_ASYNC_REQUESTS", "32"))
+
+# One semaphore per event loop: a semaphore is bound to the loop that first waits on it
+_ASYNC_LIMITS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_async_limit() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limit = _ASYNC_LIMITS.get(loop)
+    if limit is None:
+        limit = _ASYNC_LIMITS[loop] = asyncio.Semaphore(MAX_ASYNC_REQUESTS)
+    return limit
+
+
+async def _generate_once_async(client: AsyncInferenceClient, model_id: str, prompt: str, params: Dict[str, Any]) -> str:
+    async def attempt() -> str:
+        async with _get_async_limit():
+            return await client.text_generation(
+                model=model_id,
+                prompt=prompt,
+                max_new_tokens=params.get("max_new_tokens", 128),
+                temperature=params.get("temperature", 0.7),
+                top_p=params.get("top_p", 0.95),
+                do_sample=params.get("do_sample", True),
+                return_full_text=False,
+                seed=params.get("seed"),
+            )
+
+    return await _RESILIENCE.call_async(model_id, attempt)
+
+
+async def _generate_batched_async(model_id: str, prompt: str, params: Dict[str, Any], n: int) -> Optional[List[Dict[str, Any]]]:
+    """Async counterpart of _generate_batched."""
+    if model_id in _NO_BATCH_MODELS or _RESILIENCE.is_open(model_id):
+        return None
+
+    try:
+        async with _get_async_limit():
+            response = await get_async_http_client().post(**_batch_request(model_id, prompt, params, n))
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        if not is_retryable(e):
+            _NO_BATCH_MODELS.add(model_id)
+        return None
+    return _parse_batch(model_id, data, n)
+
+
+async def _remote_generate_async(model_id: str, prompt: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    client = _get_async_client()
+    num_return_sequences = max(1, int(params.get("num_return_sequences", 1)))
+
+    if num_return_sequences == 1:
+        return [{"generated_text": await _generate_once_async(client, model_id, prompt, params)}]
+
+    outputs = await _generate_batched_async(model_id, prompt, params, num_return_sequences)
+    if outputs is None:
+        texts = await asyncio.gather(*[
+            _generate_once_async(client, model_id, prompt, params)
+            for _ in range(num_return_sequences)
+        ])
+        outputs = [{"generated_text": t} for t in texts]
+    return outputs
+
+
+async def _generate_many_async(model_id: str, prompts: List[str], params: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    if AI_BACKEND == "local":
+        # torch releases the GIL in generate(), so a worker thread keeps the loop free
+        return await asyncio.to_thread(_local_generate_many, model_id, prompts, params)
+    return list(await asyncio.gather(*[_remote_generate_async(model_id, p, params) for p in prompts]))
+
+
+async def _hf_text2text_async(
+    model_id: str,
+    prompt: str,
+    params: Optional[Dict[str, Any]] = None,
+    bypass_cache: bool = False,
+) -> Dict[str, Any]:
+    """Async counterpart of _hf_text2text; shares its cache and result shape."""
+    return (await hf_text2text_batch_async(model_id, [prompt], params, bypass_cache=bypass_cache))[0]
+
+
+async def hf_text2text_batch_async(
+    model_id: str,
+    prompts: List[str],
+    params: Optional[Dict[str, Any]] = None,
+    bypass_cache: bool = False,
+) -> List[Dict[str, Any]]:
+    """Async counterpart of hf_text2text_batch."""
+    params = params or {}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+    todo: Dict[str, List[int]] = {}
+
+    for i, prompt in enumerate(prompts):
+        cached = None if bypass_cache else _get_cache().get(make_key(model_id, prompt, params))
+        if cached is not None:
+            results[i] = {"ok": True, "data": cached, "status": 200, "cached": True}
+        else:
+            todo.setdefault(prompt, []).append(i)
+
+    if todo:
+        unique = list(todo)
+        try:
+            outputs = await _generate_many_async(model_id, unique, params)
+            for prompt, out in zip(unique, outputs):
+                _get_cache().set(make_key(model_id, prompt, params), out)
+                for i in todo[prompt]:
+                    results[i] = {"ok": True, "data": out, "status": 200}
+        except Exception as e:
+            for prompt in unique:
+                for i in todo[prompt]:
+                    results[i] = {"ok": False, "data": str(e), "status": getattr(e, "status", 0)}
+
+    return results  # type: ignore[return-value]
+
+
+async def paraphrase_text_async(
+    text: str,
+    num_return_sequences: int = 3,
+    max_new_tokens: int = 96,
+    model_choice: str = DEFAULT_PARAPHRASE,
+    bypass_cache: bool = False,
+    seed: Optional[int] = None,
+) -> List[str]:
+    """Async version of paraphrase_text."""
+    text = (text or "").strip()
+    if not text:
+        return ["⚠️ Please provide some text to paraphrase."]
+
+    async def attempt(choice: str) -> Dict[str, Any]:
+        model_id, prompt, params = build_paraphrase_request(
+            text, num_return_sequences, max_new_tokens, choice, seed
+        )
+        return await _hf_text2text_async(model_id, prompt, params, bypass_cache=bypass_cache)
+
+    return parse_paraphrases(await route_request_async("paraphrase", model_choice, attempt))
+
+
+async def generate_questions_async(
+    text: str,
+    max_questions: int = 5,
+    max_new_tokens: int = 96,
+    model_choice: str = DEFAULT_QG,
+    bypass_cache: bool = False,
+    seed: Optional[int] = None,
+) -> List[str]:
+    """Async version of generate_questions."""
+    text = (text or "").strip()
+    if not text:
+        return ["⚠️ Please provide text to generate questions."]
+
+    async def attempt(choice: str) -> Dict[str, Any]:
+        model_id, prompt, params = build_question_request(
+            text, max_questions, max_new_tokens, choice, seed
+        )
+        return await _hf_text2text_async(model_id, prompt, params, bypass_cache=bypass_cache)
+
+    return parse_questions(await route_request_async("questions", model_choice, attempt), max_questions)
+
+
+# ============================
+# Streaming
+# ============================
+
+def _stream_kwargs(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "max_new_tokens": params.get("max_new_tokens", 128),
+        "temperature": params.get("temperature", 0.7),
+        "top_p": params.get("top_p", 0.95),
+        "do_sample": params.get("do_sample", True),
+        "return_full_text": False,
+        "seed": params.get("seed"),
+        "stream": True,
+    }
+
+
+def stream_paraphrase(
+    text: str,
+    max_new_tokens: int = 96,
+    model_choice: str = DEFAULT_PARAPHRASE,
+    seed: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Yield one paraphrase piece by piece as tokens arrive.
+    Suitable for `st.write_stream`; errors are yielded as a message.
+    """
+    text = (text or "").strip()
+    if not text:
+        yield "⚠️ Please provide some text to paraphrase."
+        return
+
+    # Streams can't fail over mid-way, so start on the best-ranked model
+    choice = ROUTER.candidates(PARAPHRASE_MODELS, model_choice)[0]
+    model_id, prompt, params = build_paraphrase_request(text, 1, max_new_tokens, choice, seed)
+    try:
+        if AI_BACKEND == "local":
+            yield from get_local_engine().stream(model_id, prompt, params)
+        else:
+            tokens = _RESILIENCE.call(
+                model_id,
+                lambda: _get_client().text_generation(model=model_id, prompt=prompt, **_stream_kwargs(params)),
+            )
+            for token in tokens:
+                yield token
+    except Exception as e:
+        yield f"❌ Paraphrasing failed: {e}"
+
+
+async def stream_paraphrase_async(
+    text: str,
+    max_new_tokens: int = 96,
+    model_choice: str = DEFAULT_PARAPHRASE,
+    seed: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """Async version of stream_paraphrase for streaming HTTP responses."""
+    text = (text or "").strip()
+    if not text:
+        yield "⚠️ Please provide some text to paraphrase."
+        return
+
+    # Streams can't fail over mid-way, so start on the best-ranked model
+    choice = ROUTER.candidates(PARAPHRASE_MODELS, model_choice)[0]
+    model_id, prompt, params = build_paraphrase_request(text, 1, max_new_tokens, choice, seed)
+    try:
+        if AI_BACKEND == "local":
+            pieces = get_local_engine().stream(model_id, prompt, params)
+            while True:
+                piece = await asyncio.to_thread(next, pieces, None)
+                if piece is None:
+                    break
+                yield piece
+        else:
+            async def open_stream():
+                return await _get_async_client().text_generation(
+                    model=model_id, prompt=prompt, **_stream_kwargs(params)
+                )
+
+            async with _get_async_limit():
+                tokens = await _RESILIENCE.call_async(model_id, open_stream)
+                async for token in tokens:
+                    yield token
+    except Exception as e:
+        yield f"❌ Paraphrasing failed: {e}"
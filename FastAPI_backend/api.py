@@ -1,15 +1,38 @@
 from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse
 from typing import Optional
-import os, pandas as pd, tempfile
+import os, io, json, asyncio
 from pathlib import Path
 
-from ai_processor import paraphrase_text, generate_questions
-from db import SupaDB
+from ai_processor import (
+    DEFAULT_PARAPHRASE,
+    DEFAULT_QG,
+    build_paraphrase_request,
+    build_question_request,
+    parse_paraphrases,
+    parse_questions,
+    resilience_stats,
+    route_request_async,
+    router_stats,
+    stream_paraphrase_async,
+    warmup_stats,
+)
+from inference_queue import inference_queue
+from job_queue import JOB_DB_PATH, JobStore, submit_deck_job
+from async_db import AsyncSupaDB
+from blocking import ExecutorSaturated, db_executor, ingest_executor
+from ingest import (
+    UPLOAD_PARSE_TIMEOUT,
+    UploadError,
+    check_upload_size,
+    extract_upload_document,
+    summarize_upload,
+    upload_format,
+)
 # --- Supabase setup ---
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
-db = SupaDB(SUPABASE_URL, SUPABASE_KEY)
+db = AsyncSupaDB(SUPABASE_URL, SUPABASE_KEY)
 
 router = APIRouter()
 
@@ -26,7 +49,7 @@ async def login(
     FRONTEND_DIR = Path(__file__).resolve().parents[1] / "frontend"
     templates = Jinja2Templates(directory=str(FRONTEND_DIR / "templates"))
     try:
-        user = db.login_user(email, password)
+        user = await db.login_user(email, password)
         if not user:
             return templates.TemplateResponse(
                 "login.html",
@@ -34,7 +57,7 @@ async def login(
                 status_code=401
             )
 
-        profile = db.get_user(user["id"])
+        profile = await db.get_user(user["id"])
         if not profile:
             return templates.TemplateResponse(
                 "login.html",
@@ -71,17 +94,17 @@ async def signup(
     """Handles user signup via HTML form."""
     try:
         # Check if user already exists
-        existing_user = db.get_user(email)
+        existing_user = await db.get_user(email)
         if existing_user:
             raise HTTPException(status_code=400, detail="User already exists")
 
         # Create new user in Supabase Auth
-        new_user = db.signup_user(email, password, full_name)
+        new_user = await db.signup_user(email, password, full_name)
         if not new_user or not hasattr(new_user, "user"):
             raise HTTPException(status_code=500, detail="Error creating user in Supabase Auth")
 
         user_id = new_user.user.id
-        db.save_user(user_id, email, username, full_name)
+        await db.save_user(user_id, email, username, full_name)
 
         return RedirectResponse(url="/login", status_code=302)
 
@@ -92,15 +115,92 @@ async def signup(
 
 # Paraphrasing endpoint
 @router.post("/api/paraphrase")
-async def api_paraphrase(text: str = Form(...), num_return_sequences: int = Form(3)):
-    result = paraphrase_text(text, num_return_sequences=num_return_sequences)
-    return {"paraphrases": result}
+async def api_paraphrase(
+    text: str = Form(...),
+    num_return_sequences: int = Form(3),
+    model_choice: str = Form(DEFAULT_PARAPHRASE),
+):
+    if not text.strip():
+        return {"paraphrases": ["⚠️ Please provide some text to paraphrase."]}
+
+    def attempt(choice: str):
+        model_id, prompt, params = build_paraphrase_request(
+            text, num_return_sequences=num_return_sequences, model_choice=choice
+        )
+        return inference_queue.submit(model_id, prompt, params)
+
+    r = await route_request_async("paraphrase", model_choice, attempt)
+    return {"paraphrases": parse_paraphrases(r)}
+
+# Streaming paraphrasing endpoint (Server-Sent Events)
+@router.post("/api/paraphrase/stream")
+async def api_paraphrase_stream(
+    text: str = Form(...),
+    num_return_sequences: int = Form(3),
+    model_choice: str = Form(DEFAULT_PARAPHRASE),
+):
+    """
+    Streams `num_return_sequences` paraphrases generated side by side.
+    Events: `token` {"index", "token"}, `end` {"index"} per variant, then `done`.
+    """
+    count = max(1, min(int(num_return_sequences), 10))
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def pump(index: int):
+        try:
+            async for token in stream_paraphrase_async(text, model_choice=model_choice):
+                await events.put(("token", {"index": index, "token": token}))
+        finally:
+            await events.put(("end", {"index": index}))
+
+    async def event_stream():
+        tasks = [asyncio.create_task(pump(i)) for i in range(count)]
+        remaining = count
+        try:
+            while remaining:
+                event, data = await events.get()
+                if event == "end":
+                    remaining -= 1
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # Question generation endpoint
 @router.post("/api/questions")
-async def api_questions(text: str = Form(...), max_questions: int = Form(5)):
-    result = generate_questions(text, max_questions=max_questions)
-    return {"questions": result}
+async def api_questions(
+    text: str = Form(...),
+    max_questions: int = Form(5),
+    model_choice: str = Form(DEFAULT_QG),
+):
+    if not text.strip():
+        return {"questions": ["⚠️ Please provide text to generate questions."]}
+
+    def attempt(choice: str):
+        model_id, prompt, params = build_question_request(
+            text, max_questions=max_questions, model_choice=choice
+        )
+        return inference_queue.submit(model_id, prompt, params)
+
+    r = await route_request_async("questions", model_choice, attempt)
+    return {"questions": parse_questions(r, max_questions)}
+
+# Inference queue metrics
+@router.get("/api/inference/metrics")
+def api_inference_metrics():
+    return {
+        **inference_queue.metrics(),
+        "resilience": resilience_stats(),
+        "models": router_stats(),
+        "warmup": warmup_stats(),
+    }
 
 
 # ---------------- FLASHCARDS ---------------- #
@@ -125,14 +225,14 @@ async def api_questions(text: str = Form(...), max_questions: int = Form(5)):
 
 # ---------------- USER PROFILE ---------------- #
 @router.get("/api/profile")
-def get_profile(user_id: str):
-    user = db.get_user_data(user_id)
+async def get_profile(user_id: str):
+    user = await db.get_user_data(user_id)
     return {"profile": user}
 
 
 @router.post("/api/profile")
-def update_profile(user_id: str = Form(...), name: str = Form(...), email: str = Form(...)):
-    result = db.update_user_profile(user_id, {"name": name, "email": email})
+async def update_profile(user_id: str = Form(...), name: str = Form(...), email: str = Form(...)):
+    result = await db.update_user_profile(user_id, {"name": name, "email": email})
     return {"ok": True, "result": result}
 
 
@@ -149,28 +249,166 @@ def update_timer(request: Request, minutes: int = Form(...)):
 
 
 # ---------------- FILE UPLOAD ---------------- #
+def _take_upload(file: UploadFile):
+    """
+    Detach the spooled file from `file`. FastAPI closes form uploads when
+    the response is sent, which would pull the file from under a parse
+    thread that outlived its timeout; the caller closes it instead.
+    """
+    fp, file.file = file.file, io.BytesIO()
+    return fp
+
+
 @router.post("/api/upload")
 async def upload_file(user_id: str = Form(...), file: UploadFile = File(...)):
+    # The upload is already spooled by Starlette (memory, then disk), so it's
+    # parsed in place instead of being copied to another temp file.
+    fp = _take_upload(file)
+    handed_off = False
     try:
-        suffix = Path(file.filename).suffix
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-
-        if suffix == ".csv":
-            df = pd.read_csv(tmp_path)
-        elif suffix in [".xls", ".xlsx"]:
-            df = pd.read_excel(tmp_path)
-        elif suffix == ".json":
-            df = pd.read_json(tmp_path)
+        fmt = upload_format(file.filename)
+        check_upload_size(fp, declared=file.size)
+        handed_off = True
+        if fmt is None:
+            # Not a table: extract document text (format sniffed from the bytes)
+            result = await ingest_executor.run(
+                extract_upload_document, fp, file.filename, file.content_type,
+                timeout=UPLOAD_PARSE_TIMEOUT, on_done=fp.close,
+            )
         else:
-            raise HTTPException(status_code=400, detail="Unsupported file format")
-
-        return {
-            "ok": True,
-            "filename": file.filename,
-            "preview": df.head(5).to_dict(orient="records"),
-            "summary": df.describe(include='all').to_dict()
-        }
+            result = await ingest_executor.run(
+                summarize_upload, fp, fmt, timeout=UPLOAD_PARSE_TIMEOUT, on_done=fp.close,
+            )
+        return {"ok": True, "filename": file.filename, **result}
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, try again shortly")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Parsing the upload timed out")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Once handed to the executor, the file is closed when the parse
+        # thread returns, which may be after a timeout has been reported
+        if not handed_off:
+            fp.close()
+
+
+# ---------------- BACKGROUND JOBS ---------------- #
+_JOB_STORE: Optional[JobStore] = None
+
+
+def _get_job_store() -> JobStore:
+    global _JOB_STORE
+    if _JOB_STORE is None:
+        _JOB_STORE = JobStore(JOB_DB_PATH)
+    return _JOB_STORE
+
+
+def _submit_deck_from_upload(fp, filename, mime, text, user_id, options):
+    if fp is not None:
+        text = extract_upload_document(fp, filename, mime)["text"]
+    if not (text or "").strip():
+        raise UploadError("No text to generate flashcards from")
+    store = _get_job_store()
+    job_id = submit_deck_job(store, text, user_id=user_id, **options)
+    return store.get(job_id)
+
+
+@router.post("/api/jobs", status_code=202)
+async def create_job(
+    user_id: str = Form(...),
+    file: Optional[UploadFile] = File(None),
+    text: Optional[str] = Form(None),
+    questions_per_chunk: int = Form(3),
+    num_paraphrases: int = Form(3),
+    max_cards: Optional[int] = Form(None),
+    save: bool = Form(False),
+):
+    """Queue a deck-generation job; poll /api/jobs/{job_id} for progress."""
+    options = {
+        "questions_per_chunk": questions_per_chunk,
+        "num_paraphrases": num_paraphrases,
+        "max_cards": max_cards,
+        "save": save,
+    }
+    fp = _take_upload(file) if file is not None else None
+    handed_off = False
+    try:
+        if fp is not None:
+            check_upload_size(fp, declared=file.size)
+        handed_off = True
+        job = await ingest_executor.run(
+            _submit_deck_from_upload,
+            fp,
+            file.filename if file is not None else None,
+            file.content_type if file is not None else None,
+            text,
+            user_id,
+            options,
+            timeout=UPLOAD_PARSE_TIMEOUT,
+            on_done=fp.close if fp is not None else None,
+        )
+        return {"ok": True, "job": job}
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
+    except ExecutorSaturated:
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, try again shortly")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Reading the document timed out")
+    finally:
+        if fp is not None and not handed_off:
+            fp.close()
+
+
+@router.get("/api/jobs")
+async def list_jobs(user_id: str, limit: int = 20):
+    jobs = await db_executor.run(_get_job_store().list_jobs, user_id, min(max(limit, 1), 100))
+    return {"ok": True, "jobs": jobs}
+
+
+async def _job_or_404(job_id: str):
+    job = await db_executor.run(_get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/api/jobs/{job_id}")
+async def job_progress(job_id: str):
+    return {"ok": True, "job": await _job_or_404(job_id)}
+
+
+@router.get("/api/jobs/{job_id}/results")
+async def job_results(job_id: str):
+    """Final result once done; until then, the cards from the chunks finished so far."""
+    job = await _job_or_404(job_id)
+    store = _get_job_store()
+    if job["status"] == "done":
+        return {"ok": True, "job": job, "partial": False, **(await db_executor.run(store.result, job_id) or {})}
+    chunks = await db_executor.run(store.chunk_results, job_id)
+    errors = await db_executor.run(store.chunk_errors, job_id)
+    return {
+        "ok": True,
+        "job": job,
+        "partial": True,
+        "cards": [card for cards in chunks for card in cards],
+        "errors": errors,
+    }
+
+
+@router.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    await _job_or_404(job_id)
+    cancelled = await db_executor.run(_get_job_store().cancel, job_id)
+    return {"ok": cancelled, "job": await _job_or_404(job_id)}
+
+
+@router.post("/api/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    await _job_or_404(job_id)
+    resumed = await db_executor.run(_get_job_store().resume, job_id)
+    if not resumed:
+        raise HTTPException(status_code=409, detail="Only cancelled or failed jobs can be resumed")
+    return {"ok": True, "job": await _job_or_404(job_id)}
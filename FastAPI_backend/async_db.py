@@ -0,0 +1,391 @@
+# async_db.py
+import json
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from http_client import get_async_http_client
+from bulk_insert import bulk_insert_async, summarize_failures, BULK_INSERT_BATCH_SIZE
+from pagination import (
+    MAX_PAGE_SIZE,
+    clamp_page_size,
+    encode_cursor,
+    keyset_filter,
+    select_columns,
+)
+from user_cache import USER_CACHE
+
+
+class SupabaseError(RuntimeError):
+    """Non-2xx response from PostgREST or GoTrue."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+def _content_range_total(r) -> Optional[int]:
+    """Row count from a `Prefer: count=exact` response (Content-Range: 0-24/123)."""
+    total = r.headers.get("content-range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def _user_namespace(user: Dict[str, Any]) -> SimpleNamespace:
+    """GoTrue user JSON -> object shaped like supabase-py's user (id, email, user_metadata)."""
+    return SimpleNamespace(
+        id=user.get("id"),
+        email=user.get("email"),
+        user_metadata=user.get("user_metadata") or {},
+    )
+
+
+class AsyncSupaDB:
+    """
+    Async counterpart of SupaDB with the same method surface, talking to
+    PostgREST (/rest/v1) and GoTrue (/auth/v1) directly over the shared
+    pooled httpx.AsyncClient, so DB calls never block the event loop.
+    """
+
+    def __init__(self, url: str, key: str):
+        if not url or not key:
+            raise RuntimeError("Missing Supabase URL or key")
+        self.url = url.rstrip("/")
+        self.key = key
+
+    # -------------------- TRANSPORT -------------------- #
+    def _headers(self, prefer: Optional[str] = None) -> Dict[str, str]:
+        headers = {
+            "apikey": self.key,
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
+        }
+        if prefer:
+            headers["Prefer"] = prefer
+        return headers
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Any = None,
+        prefer: Optional[str] = None,
+    ):
+        client = get_async_http_client()
+        r = await client.request(
+            method,
+            self.url + path,
+            params=params,
+            json=payload,
+            headers=self._headers(prefer),
+        )
+        if r.status_code >= 400:
+            raise SupabaseError(r.status_code, r.text)
+        return r
+
+    async def _select(self, table: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        r = await self._request("GET", f"/rest/v1/{table}", params=params)
+        return r.json() or []
+
+    # -------------------- FLASHCARDS -------------------- #
+    async def _insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[Any]:
+        r = await self._request("POST", f"/rest/v1/{table}", payload=rows, prefer="return=representation")
+        return r.json() or []
+
+    async def insert_cards(self, rows: List[Dict[str, Any]], batch_size: int = BULK_INSERT_BATCH_SIZE):
+        """
+        Insert rows into public.cards. Each row: {"question": str, "answer": str, ["created_by": uuid]}
+        Rows are sent as chunked multi-row inserts.
+        Returns (success: bool, data or error message)
+        """
+        rows = [r for r in rows if r.get("question") and r.get("answer")]
+        if not rows:
+            return False, "No valid rows to insert."
+        try:
+            result = await self.insert_cards_bulk(rows, batch_size=batch_size)
+        except Exception as e:
+            return False, f"Insert error: {e}"
+        if result["ok"]:
+            return True, [r["data"] for r in result["rows"]]
+        return False, summarize_failures(result)
+
+    async def insert_cards_bulk(self, rows: List[Dict[str, Any]], batch_size: int = BULK_INSERT_BATCH_SIZE) -> Dict[str, Any]:
+        """Chunked insert into public.cards with per-chunk and per-row results (see bulk_insert)."""
+        try:
+            return await bulk_insert_async(
+                lambda chunk: self._insert_rows("cards", chunk),
+                rows,
+                batch_size=batch_size,
+                optional_columns=("created_by",),
+            )
+        finally:
+            USER_CACHE.invalidate_rows(rows, namespaces=["flashcards"])
+
+    async def get_cards_page(
+        self,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        with_count: bool = False,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fetch one page of public.cards, newest first, keyset-paginated on (created_at, id).
+        Returns {"items", "next_cursor", "page_size", ["total"]}.
+        """
+        size = clamp_page_size(page_size)
+
+        async def load() -> Dict[str, Any]:
+            params: Dict[str, Any] = {
+                "select": select_columns(columns),
+                "order": "created_at.desc,id.desc",
+                "limit": size + 1,
+            }
+            if created_by:
+                params["created_by"] = f"eq.{created_by}"
+            if cursor:
+                params["or"] = f"({keyset_filter(cursor)})"
+            # Counted separately on later pages: the keyset filter would limit
+            # the count to rows after the cursor
+            count_here = with_count and not cursor
+            r = await self._request(
+                "GET", "/rest/v1/cards", params=params, prefer="count=exact" if count_here else None
+            )
+            rows = r.json() or []
+            items = rows[:size]
+            page: Dict[str, Any] = {
+                "items": items,
+                "next_cursor": encode_cursor(items[-1]) if len(rows) > size else None,
+                "page_size": size,
+            }
+            if count_here:
+                page["total"] = _content_range_total(r)
+            elif with_count:
+                count_params = {"select": "id", **({"created_by": f"eq.{created_by}"} if created_by else {})}
+                page["total"] = _content_range_total(
+                    await self._request("HEAD", "/rest/v1/cards", params=count_params, prefer="count=exact")
+                )
+            return page
+
+        if not created_by:
+            return await load()
+        key = json.dumps([page_size, cursor, columns, with_count])
+        return await USER_CACHE.get_or_load_async("flashcards", created_by, key, load)
+
+    async def get_all_cards(self, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch all flashcards from public.cards table, page by page.
+        Returns list of card dictionaries.
+        """
+        cards: List[Dict[str, Any]] = []
+        cursor = None
+        try:
+            while True:
+                page = await self.get_cards_page(page_size=MAX_PAGE_SIZE, cursor=cursor, columns=columns)
+                cards.extend(page["items"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    return cards
+        except Exception as e:
+            print(f"❌ Error fetching cards: {e}")
+            return cards
+
+    # -------------------- AUTH -------------------- #
+    async def signup_user(self, email: str, password: str, full_name: str):
+        """Register a new user using Supabase Auth."""
+        try:
+            r = await self._request(
+                "POST",
+                "/auth/v1/signup",
+                payload={"email": email, "password": password, "data": {"full_name": full_name}},
+            )
+            data = r.json() or {}
+            # Depending on email confirmation settings GoTrue returns the user or a session
+            user = data.get("user") or (data if data.get("id") else None)
+            if not user:
+                raise Exception("Signup failed or email already registered.")
+
+            print(f"✅ User signed up: {user.get('email')}")
+            return SimpleNamespace(user=_user_namespace(user), session=data.get("access_token"))
+
+        except Exception as e:
+            print(f"❌ Error during signup: {e}")
+            raise Exception(f"Signup failed: {e}")
+
+    async def login_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Authenticate user via Supabase Auth and return profile info."""
+        try:
+            r = await self._request(
+                "POST",
+                "/auth/v1/token",
+                params={"grant_type": "password"},
+                payload={"email": email, "password": password},
+            )
+            user = (r.json() or {}).get("user")
+            if user:
+                print(f"✅ User logged in: {user.get('email')}")
+                return {
+                    "id": user.get("id"),
+                    "email": user.get("email"),
+                    "full_name": (user.get("user_metadata") or {}).get("full_name", ""),
+                }
+
+            print(f"⚠️ Invalid login attempt for {email}")
+            return None
+
+        except SupabaseError as e:
+            if e.status in (400, 401):
+                print(f"⚠️ Invalid login attempt for {email}")
+                return None
+            print(f"❌ Error during login: {e}")
+            raise Exception(f"Login failed: {e}")
+        except Exception as e:
+            print(f"❌ Error during login: {e}")
+            raise Exception(f"Login failed: {e}")
+
+    async def resend_confirmation(self, email: str):
+        """Resend email confirmation link."""
+        try:
+            r = await self._request("POST", "/auth/v1/resend", payload={"email": email, "type": "signup"})
+            return r.json() if r.content else {}
+        except Exception as e:
+            print(f"❌ Error resending confirmation: {e}")
+            raise Exception(f"Resend confirmation failed: {e}")
+
+    # -------------------- USERS -------------------- #
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Fetch a user record from 'users' table by email."""
+        try:
+            rows = await self._select("users", {"select": "*", "email": f"eq.{email}", "limit": 1})
+            return rows[0] if rows else None
+        except Exception as e:
+            print(f"❌ Error fetching user by email: {e}")
+            raise Exception(f"Failed to get user by email: {e}")
+
+    async def username_taken(self, username: str) -> bool:
+        """True if a 'users' row already has this username."""
+        rows = await self._select("users", {"select": "id", "username": f"eq.{username}", "limit": 1})
+        return bool(rows)
+
+    async def save_user(self, user_id: str, email: str, username: str, full_name: str):
+        """Insert user into 'users' table if not already present."""
+        try:
+            existing = await self._select("users", {"select": "id", "id": f"eq.{user_id}"})
+
+            if not existing:
+                print(f"🆕 Inserting new user record for {email}")
+                await self._request(
+                    "POST",
+                    "/rest/v1/users",
+                    payload={"id": user_id, "email": email, "username": username, "full_name": full_name},
+                )
+            else:
+                print(f"✅ User {email} already exists in 'users' table.")
+            USER_CACHE.invalidate(user_id, ["profile"])
+        except Exception as e:
+            print(f"❌ Error saving user: {e}")
+            raise Exception(f"Failed to save user: {e}")
+
+    async def get_user(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """Fetch a user record by either email or UUID."""
+        try:
+            try:
+                uuid.UUID(str(identifier))
+                field = "id"
+            except ValueError:
+                field = "email"
+
+            rows = await self._select("users", {"select": "*", field: f"eq.{identifier}", "limit": 1})
+            return rows[0] if rows else None
+        except Exception as e:
+            print(f"❌ Error fetching user: {e}")
+            raise Exception(f"Failed to get user: {e}")
+
+    async def get_user_data(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a user's profile row by id (cached until the profile is updated)."""
+        async def load():
+            rows = await self._select("users", {"select": "*", "id": f"eq.{user_id}", "limit": 1})
+            return rows[0] if rows else None
+
+        try:
+            return await USER_CACHE.get_or_load_async("profile", user_id, "", load)
+        except Exception as e:
+            print(f"❌ Error fetching user data: {e}")
+            return {"error": str(e)}
+
+    async def update_user_profile(self, user_id: str, profile_data: Dict[str, Any]):
+        """Update a user's profile in the 'users' table."""
+        try:
+            r = await self._request(
+                "PATCH",
+                "/rest/v1/users",
+                params={"id": f"eq.{user_id}"},
+                payload=profile_data,
+                prefer="return=representation",
+            )
+            return r.json()
+        except Exception as e:
+            print(f"❌ Error updating user profile: {e}")
+            return {"error": str(e)}
+        finally:
+            USER_CACHE.invalidate(user_id, ["profile"])
+
+    # -------------------- DONATIONS -------------------- #
+    async def add_donation(
+        self,
+        donation_id: str,
+        email: str,
+        amount: float,
+        currency: str,
+        method: str,
+        status: str,
+        api_ref: str,
+    ) -> Dict[str, Any]:
+        """Insert a donation record into 'donations' table."""
+        try:
+            payload = {
+                "id": donation_id,
+                "email": email,
+                "amount": amount,
+                "currency": currency,
+                "method": method,
+                "status": status,
+                "api_ref": api_ref,
+            }
+            r = await self._request("POST", "/rest/v1/donations", payload=payload, prefer="return=representation")
+            print(f"💰 Donation recorded for {email}")
+            return {"data": r.json()}
+        except Exception as e:
+            print(f"❌ Error adding donation: {e}")
+            raise Exception(f"Failed to add donation: {e}")
+
+    async def update_donation_status(self, donation_id: str, status: str, currency: Optional[str] = None):
+        """Update donation status in 'donations' table."""
+        try:
+            update = {"status": status}
+            if currency:
+                update["currency"] = currency
+            await self._request("PATCH", "/rest/v1/donations", params={"id": f"eq.{donation_id}"}, payload=update)
+            print(f"✅ Donation {donation_id} updated to {status}")
+        except Exception as e:
+            print(f"❌ Error updating donation: {e}")
+            raise Exception(f"Failed to update donation: {e}")
+
+    async def get_donation_by_id(self, donation_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a donation record by ID."""
+        try:
+            rows = await self._select("donations", {"select": "*", "id": f"eq.{donation_id}", "limit": 1})
+            return rows[0] if rows else None
+        except Exception as e:
+            print(f"❌ Error fetching donation: {e}")
+            raise Exception(f"Failed to get donation by ID: {e}")
+
+    async def get_donations(self, email: str) -> List[Dict[str, Any]]:
+        """Get all donations for a given user by email."""
+        try:
+            return await self._select(
+                "donations", {"select": "*", "email": f"eq.{email}", "order": "created_at.desc"}
+            )
+        except Exception as e:
+            print(f"❌ Error fetching donations: {e}")
+            raise Exception(f"Failed to get donations: {e}")
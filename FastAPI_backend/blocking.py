@@ -0,0 +1,205 @@
+# blocking.py
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Worker threads per pool
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "16"))
+PAYMENTS_EXECUTOR_WORKERS = int(os.getenv("PAYMENTS_EXECUTOR_WORKERS", "4"))
+INGEST_EXECUTOR_WORKERS = int(os.getenv("INGEST_EXECUTOR_WORKERS", "2"))
+# Calls allowed to wait for a worker before new callers are rejected
+EXECUTOR_MAX_QUEUE = int(os.getenv("EXECUTOR_MAX_QUEUE", "256"))
+BLOCKING_CALL_TIMEOUT = float(os.getenv("BLOCKING_CALL_TIMEOUT", "30"))
+# How often the event-loop lag monitor samples
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised instead of queueing when a pool's backlog is full."""
+
+
+class BlockingExecutor:
+    """
+    Bounded thread pool for blocking SDK calls made from async handlers.
+    `await executor.run(fn, *args)` runs fn on a worker thread so the event
+    loop keeps serving other requests; at most `max_workers` calls run and
+    `max_queue` wait, beyond which callers get ExecutorSaturated.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int = EXECUTOR_MAX_QUEUE,
+        timeout: float = BLOCKING_CALL_TIMEOUT,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._stats = {
+            "calls": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "total_wait_ms": 0.0,
+            "total_run_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.name}-io")
+        return self._pool
+
+    async def run(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        timeout: Optional[float] = None,
+        on_done: Optional[Callable[[], None]] = None,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Run fn(*args, **kwargs) on a worker thread. A call that times out
+        keeps its slot until the thread really returns, so stuck threads
+        count against the bound. `on_done` is called on the event loop
+        exactly once, when the thread finishes (or at once if the call is
+        rejected), e.g. to release resources the thread is still using.
+        """
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self._stats["rejected"] += 1
+            if on_done is not None:
+                on_done()
+            raise ExecutorSaturated(f"{self.name} executor is saturated")
+
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        started: Dict[str, float] = {}
+
+        def call() -> T:
+            started["at"] = time.monotonic()
+            return fn(*args, **kwargs)
+
+        def finished(f: "asyncio.Future[T]") -> None:
+            if not f.cancelled():
+                f.exception()  # retrieved here so abandoned calls don't log "never retrieved"
+            self._record(submitted, started.get("at"))
+            if on_done is not None:
+                on_done()
+
+        self._in_flight += 1
+        self._stats["calls"] += 1
+        try:
+            fut = loop.run_in_executor(self._get_pool(), call)
+        except BaseException:
+            self._in_flight -= 1
+            if on_done is not None:
+                on_done()
+            raise
+        fut.add_done_callback(finished)
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout=timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # The thread can't be interrupted; it finishes in the background
+            self._stats["timeouts"] += 1
+            raise
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+
+    def _record(self, submitted: float, started_at: Optional[float]) -> None:
+        self._in_flight -= 1
+        if started_at is None:
+            return
+        wait_ms = (started_at - submitted) * 1000
+        self._stats["total_wait_ms"] += wait_ms
+        self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+        self._stats["total_run_ms"] += (time.monotonic() - started_at) * 1000
+
+    def metrics(self) -> Dict[str, Any]:
+        calls = self._stats["calls"] or 1
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "calls": self._stats["calls"],
+            "errors": self._stats["errors"],
+            "timeouts": self._stats["timeouts"],
+            "rejected": self._stats["rejected"],
+            "avg_wait_ms": round(self._stats["total_wait_ms"] / calls, 2),
+            "max_wait_ms": round(self._stats["max_wait_ms"], 2),
+            "avg_run_ms": round(self._stats["total_run_ms"] / calls, 2),
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a short sleep."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._samples = 0
+        self._last_ms = 0.0
+        self._max_ms = 0.0
+        self._total_ms = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.monotonic() - start - self.interval) * 1000)
+            self._samples += 1
+            self._last_ms = lag_ms
+            self._total_ms += lag_ms
+            self._max_ms = max(self._max_ms, lag_ms)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "samples": self._samples,
+            "last_ms": round(self._last_ms, 2),
+            "avg_ms": round(self._total_ms / (self._samples or 1), 2),
+            "max_ms": round(self._max_ms, 2),
+        }
+
+
+# Separate pools so slow payment calls or file parsing can't starve database work
+db_executor = BlockingExecutor("db", DB_EXECUTOR_WORKERS)
+payments_executor = BlockingExecutor("payments", PAYMENTS_EXECUTOR_WORKERS)
+ingest_executor = BlockingExecutor("ingest", INGEST_EXECUTOR_WORKERS, max_queue=16)
+loop_lag = LoopLagMonitor()
+
+
+def executor_metrics() -> Dict[str, Any]:
+    return {
+        "db": db_executor.metrics(),
+        "payments": payments_executor.metrics(),
+        "ingest": ingest_executor.metrics(),
+        "event_loop_lag": loop_lag.metrics(),
+    }
+
+
+def shutdown_executors() -> None:
+    loop_lag.stop()
+    db_executor.shutdown()
+    payments_executor.shutdown()
+    ingest_executor.shutdown()
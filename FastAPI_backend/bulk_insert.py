@@ -0,0 +1,212 @@
+# FastAPI_backend/bulk_insert.py
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+# ============================
+# Settings
+# ============================
+
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+# Failed chunks are split in halves down to this size to isolate bad rows
+BULK_INSERT_MIN_SPLIT = int(os.getenv("BULK_INSERT_MIN_SPLIT", "1"))
+# ...and at most this many times, so one chunk costs a bounded number of requests
+BULK_INSERT_MAX_SPLIT_DEPTH = int(os.getenv("BULK_INSERT_MAX_SPLIT_DEPTH", "10"))
+
+# Failures that hit every row alike: auth, RLS/privileges, rate limiting
+_CHUNK_FATAL_STATUS = {401, 403, 429}
+_CHUNK_FATAL_CODES = ("42501", "PGRST301", "PGRST302")
+# SQLSTATE class 22 (data exception) and 23 (integrity constraint violation)
+_ROW_SQLSTATE = re.compile(r"\b2[23][0-9A-Z]{3}\b")
+_ROW_ERROR_HINTS = ("violates", "invalid input", "value too long", "out of range", "null value in column")
+
+
+def is_row_error(exc: BaseException) -> bool:
+    """
+    True when an insert failed because of the data in some rows
+    (SQLSTATE 22xxx/23xxx), so splitting the chunk can isolate them.
+    Auth, RLS, rate-limit, schema and transport errors are not.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status", None) or getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status in _CHUNK_FATAL_STATUS:
+        return False
+    code = str(getattr(exc, "code", "") or "")
+    text = f"{code} {exc}"
+    if any(c in text for c in _CHUNK_FATAL_CODES) or "row-level security" in text.lower():
+        return False
+    if code:
+        return code[:2] in ("22", "23")
+    return bool(_ROW_SQLSTATE.search(text)) or any(h in text.lower() for h in _ROW_ERROR_HINTS)
+
+
+def _missing_column(error: str, columns: Iterable[str]) -> Optional[str]:
+    """Return the optional column a Postgres 'undefined column' error refers to, if any."""
+    low = error.lower()
+    for col in columns:
+        if col in low and ("42703" in low or "column" in low):
+            return col
+    return None
+
+
+def _execute_insert(client: Any, table: str, rows: List[Dict[str, Any]]) -> List[Any]:
+    """One multi-row INSERT; raises on API errors so callers handle both paths alike."""
+    res = client.table(table).insert(rows).execute()
+    error = getattr(res, "error", None)
+    if error:
+        raise RuntimeError(str(error))
+    data = getattr(res, "data", None) or []
+    # PostgREST returns the inserted rows in request order
+    return data if len(data) == len(rows) else [None] * len(rows)
+
+
+def bulk_insert(
+    client: Any,
+    table: str,
+    rows: Sequence[Dict[str, Any]],
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+    optional_columns: Sequence[str] = (),
+    split_failed_chunks: bool = True,
+    on_error: Optional[Callable[[Exception], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Insert `rows` into `table` with one request per chunk of `batch_size`.
+
+    If the table lacks one of `optional_columns`, that column is dropped
+    and the chunk retried. A chunk rejected for its data (see is_row_error)
+    is split in halves, at most BULK_INSERT_MAX_SPLIT_DEPTH times, so that
+    only the offending rows are reported; any other failure fails the whole
+    chunk at once. `on_error` sees every exception raised by an insert.
+    Returns:
+
+        {"ok": bool, "inserted": int, "failed": int,
+         "rows": [{"ok": bool, "data" | "error": ...}, ...],   # same order as `rows`
+         "chunks": [{"start": int, "size": int, "ok": bool, "failed": int, "error": str | None}, ...]}
+    """
+    rows = list(rows)
+    batch_size = max(1, batch_size)
+    dropped: List[str] = []
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    chunks: List[Dict[str, Any]] = []
+
+    def strip(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not dropped:
+            return chunk
+        return [{k: v for k, v in row.items() if k not in dropped} for row in chunk]
+
+    def insert(start: int, chunk: List[Dict[str, Any]], depth: int = 0) -> Optional[str]:
+        """Insert rows[start:start+len(chunk)]; return an error message or None."""
+        while True:
+            try:
+                data = _execute_insert(client, table, strip(chunk))
+                for i, item in enumerate(data):
+                    results[start + i] = {"ok": True, "data": item}
+                return None
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+                error = str(e)
+                col = _missing_column(error, [c for c in optional_columns if c not in dropped])
+                if col is not None and any(col in row for row in chunk):
+                    dropped.append(col)
+                    continue
+                if split_failed_chunks and _can_split(e, chunk, depth):
+                    mid = len(chunk) // 2
+                    left = insert(start, chunk[:mid], depth + 1)
+                    right = insert(start + mid, chunk[mid:], depth + 1)
+                    return left or right
+                for i in range(len(chunk)):
+                    results[start + i] = {"ok": False, "error": error}
+                return error
+
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        error = insert(start, chunk)
+        chunks.append(_chunk_summary(results, start, len(chunk), error))
+
+    return _summarize(results, chunks, dropped)
+
+
+def _can_split(exc: BaseException, chunk: List[Dict[str, Any]], depth: int) -> bool:
+    return len(chunk) > BULK_INSERT_MIN_SPLIT and depth < BULK_INSERT_MAX_SPLIT_DEPTH and is_row_error(exc)
+
+
+def _chunk_summary(results: List[Optional[Dict[str, Any]]], start: int, size: int, error: Optional[str]) -> Dict[str, Any]:
+    failed_rows = sum(1 for r in results[start:start + size] if not (r and r["ok"]))
+    return {"start": start, "size": size, "ok": error is None, "failed": failed_rows, "error": error}
+
+
+def _summarize(results: List[Optional[Dict[str, Any]]], chunks: List[Dict[str, Any]], dropped: List[str]) -> Dict[str, Any]:
+    rows_out = [r or {"ok": False, "error": "not inserted"} for r in results]
+    failed = sum(1 for r in rows_out if not r["ok"])
+    return {
+        "ok": failed == 0,
+        "inserted": len(rows_out) - failed,
+        "failed": failed,
+        "dropped_columns": dropped,
+        "rows": rows_out,
+        "chunks": chunks,
+    }
+
+
+async def bulk_insert_async(
+    execute: Callable[[List[Dict[str, Any]]], Awaitable[List[Any]]],
+    rows: Sequence[Dict[str, Any]],
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+    optional_columns: Sequence[str] = (),
+    split_failed_chunks: bool = True,
+    on_error: Optional[Callable[[Exception], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Async version of bulk_insert. `execute(chunk)` performs one multi-row
+    INSERT and returns the inserted rows in order, raising on failure.
+    """
+    rows = list(rows)
+    batch_size = max(1, batch_size)
+    dropped: List[str] = []
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    chunks: List[Dict[str, Any]] = []
+
+    async def insert(start: int, chunk: List[Dict[str, Any]], depth: int = 0) -> Optional[str]:
+        while True:
+            try:
+                sent = [{k: v for k, v in row.items() if k not in dropped} for row in chunk] if dropped else chunk
+                data = await execute(sent)
+                if len(data) != len(chunk):
+                    data = [None] * len(chunk)
+                for i, item in enumerate(data):
+                    results[start + i] = {"ok": True, "data": item}
+                return None
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+                error = str(e)
+                col = _missing_column(error, [c for c in optional_columns if c not in dropped])
+                if col is not None and any(col in row for row in chunk):
+                    dropped.append(col)
+                    continue
+                if split_failed_chunks and _can_split(e, chunk, depth):
+                    mid = len(chunk) // 2
+                    left = await insert(start, chunk[:mid], depth + 1)
+                    right = await insert(start + mid, chunk[mid:], depth + 1)
+                    return left or right
+                for i in range(len(chunk)):
+                    results[start + i] = {"ok": False, "error": error}
+                return error
+
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        error = await insert(start, chunk)
+        chunks.append(_chunk_summary(results, start, len(chunk), error))
+
+    return _summarize(results, chunks, dropped)
+
+
+def summarize_failures(result: Dict[str, Any]) -> str:
+    """Human-readable summary of the failed chunks in a bulk_insert result."""
+    failed = [c for c in result["chunks"] if not c["ok"]]
+    parts = [f"rows {c['start']}-{c['start'] + c['size'] - 1}: {c['error']}" for c in failed]
+    return f"{result['failed']} of {len(result['rows'])} rows failed (" + "; ".join(parts) + ")"
@@ -1,47 +1,103 @@
-from supabase import create_client, Client
+from supabase import Client
 from typing import Optional, List, Dict, Any
+import json
 import uuid
 
+from supabase_pool import SUPABASE_CLIENTS
+from bulk_insert import bulk_insert, summarize_failures, BULK_INSERT_BATCH_SIZE
+from pagination import fetch_page, MAX_PAGE_SIZE
+from user_cache import USER_CACHE
+
 
 class SupaDB:
     # -------------------- FLASHCARDS -------------------- #
-    def insert_cards(self, rows: List[Dict[str, Any]]):
+    def insert_cards(self, rows: List[Dict[str, Any]], batch_size: int = BULK_INSERT_BATCH_SIZE):
         """
         Insert rows into public.cards. Each row: {"question": str, "answer": str, ["created_by": uuid]}
+        Rows are sent as chunked multi-row inserts.
         Returns (success: bool, data or error message)
         """
         rows = [r for r in rows if r.get("question") and r.get("answer")]
         if not rows:
             return False, "No valid rows to insert."
         try:
-            res = self.client.table("cards").insert(rows).execute()
-            if getattr(res, "error", None):
-                err_txt = str(res.error)
-                # Retry without created_by if column missing
-                if "created_by" in str(rows) and ("42703" in err_txt or "created_by" in err_txt and "column" in err_txt.lower()):
-                    rows_wo = [{k: v for k, v in row.items() if k != "created_by"} for row in rows]
-                    res2 = self.client.table("cards").insert(rows_wo).execute()
-                    if getattr(res2, "error", None):
-                        return False, str(res2.error)
-                    return True, getattr(res2, "data", None)
-                return False, err_txt
-            return True, getattr(res, "data", None)
+            result = self.insert_cards_bulk(rows, batch_size=batch_size)
         except Exception as e:
             return False, f"Insert error: {e}"
+        if result["ok"]:
+            return True, [r["data"] for r in result["rows"]]
+        return False, summarize_failures(result)
+
+    def insert_cards_bulk(self, rows: List[Dict[str, Any]], batch_size: int = BULK_INSERT_BATCH_SIZE) -> Dict[str, Any]:
+        """Chunked insert into public.cards with per-chunk and per-row results (see bulk_insert)."""
+        try:
+            return bulk_insert(
+                self.client,
+                "cards",
+                rows,
+                batch_size=batch_size,
+                optional_columns=("created_by",),
+                on_error=lambda e: SUPABASE_CLIENTS.report_error(self.url, self.key, e),
+            )
+        finally:
+            USER_CACHE.invalidate_rows(rows, namespaces=["flashcards"])
     
-    def get_all_cards(self) -> List[Dict[str, Any]]:
+    def get_cards_page(
+        self,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        with_count: bool = False,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fetch one page of public.cards, newest first, keyset-paginated on (created_at, id).
+        Returns {"items", "next_cursor", "page_size", ["total"]}.
         """
-        Fetch all flashcards from public.cards table.
+        def load() -> Dict[str, Any]:
+            return fetch_page(
+                self.client,
+                "cards",
+                filters={"created_by": created_by} if created_by else None,
+                columns=columns,
+                page_size=page_size,
+                cursor=cursor,
+                with_count=with_count,
+            )
+
+        if not created_by:
+            return load()
+        # Per-user pages are cached until that user's next insert
+        key = json.dumps([page_size, cursor, columns, with_count])
+        return USER_CACHE.get_or_load("flashcards", created_by, key, load)
+
+    def get_all_cards(self, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch all flashcards from public.cards table, page by page.
         Returns list of card dictionaries.
         """
+        cards: List[Dict[str, Any]] = []
+        cursor = None
         try:
-            res = self.client.table("cards").select("*").execute()
-            return getattr(res, "data", [])
+            while True:
+                page = self.get_cards_page(page_size=MAX_PAGE_SIZE, cursor=cursor, columns=columns)
+                cards.extend(page["items"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    return cards
         except Exception as e:
             print(f"❌ Error fetching cards: {e}")
-            return []
+            return cards
+
     def __init__(self, url: str, key: str):
-        self.client: Client = create_client(url, key)
+        self.url = url
+        self.key = key
+        SUPABASE_CLIENTS.get(url, key)  # fail fast on bad credentials
+
+    @property
+    def client(self) -> Client:
+        """Shared client from the registry; rebuilt after failed health checks."""
+        return SUPABASE_CLIENTS.get(self.url, self.key)
 
     # -------------------- AUTH -------------------- #
     def signup_user(self, email: str, password: str, full_name: str):
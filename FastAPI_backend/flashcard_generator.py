@@ -0,0 +1,34 @@
+def create_flashcards(questions):
+    if not isinstance(questions, list):
+        return {"error": "Input must be a list of questions"}
+    
+    if not questions:
+        return {"error": "Input list cannot be empty"}
+    
+    flashcards = []
+    for i, q in enumerate(questions):
+        card = {
+            "id": i,
+            "question": q.get("question", "No question generated"),
+            "answer": q.get("answer", "No answer generated"),
+        }
+        flashcards.append(card)
+    return flashcards
+
+
+def question_key(question):
+    """Normalised form of a question used to spot repeats: lowercase, no punctuation."""
+    return " ".join("".join(ch for ch in question.lower() if ch.isalnum() or ch.isspace()).split())
+
+
+def dedupe_cards(chunk_cards, max_cards=None):
+    """Merge per-chunk card lists in order, keeping the first card for each question."""
+    seen = set()
+    cards = []
+    for batch in chunk_cards:
+        for card in batch:
+            key = question_key(card["question"])
+            if key and key not in seen:
+                seen.add(key)
+                cards.append(card)
+    return cards[:max_cards] if max_cards else cards
@@ -0,0 +1,161 @@
+# FastAPI_backend/generation_cache.py
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# ============================
+# Settings
+# ============================
+
+CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "3600"))
+CACHE_PATH = os.getenv("AI_CACHE_PATH")  # enables the SQLite tier when set
+CACHE_DISK_MAX = int(os.getenv("AI_CACHE_DISK_MAX", "5000"))
+
+
+def make_key(model_id: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Content hash of (model_id, prompt, generation params)."""
+    blob = json.dumps(
+        {"model": model_id, "prompt": prompt, "params": params or {}},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ============================
+# Cache
+# ============================
+
+class GenerationCache:
+    """
+    Two-tier cache for generation results: an in-process LRU and an
+    optional SQLite file. Entries expire after `ttl` seconds; each tier
+    evicts oldest entries once it exceeds its size limit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_SIZE,
+        ttl: float = CACHE_TTL,
+        path: Optional[str] = CACHE_PATH,
+        disk_max_entries: int = CACHE_DISK_MAX,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        if path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS generations "
+                    "(key TEXT PRIMARY KEY, value BLOB, expires_at REAL, stored_at REAL)"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    # ---------- memory tier ----------
+    def _mem_get(self, key: str) -> Any:
+        item = self._mem.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.time():
+            del self._mem[key]
+            return None
+        self._mem.move_to_end(key)
+        return value
+
+    def _mem_set(self, key: str, value: Any, expires_at: float) -> None:
+        self._mem[key] = (value, expires_at)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    # ---------- disk tier ----------
+    def _disk_get(self, key: str) -> Any:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM generations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None, 0.0
+                if row[1] < time.time():
+                    conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+                    return None, 0.0
+                return pickle.loads(row[0]), row[1]
+        except Exception:
+            return None, 0.0
+
+    def _disk_set(self, key: str, value: Any, expires_at: float) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?)",
+                    (key, pickle.dumps(value), expires_at, time.time()),
+                )
+                conn.execute("DELETE FROM generations WHERE expires_at < ?", (time.time(),))
+                conn.execute(
+                    "DELETE FROM generations WHERE key IN ("
+                    "SELECT key FROM generations ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_max_entries,),
+                )
+        except Exception:
+            pass
+
+    # ---------- public API ----------
+    def get(self, key: str) -> Any:
+        """Return the cached value or None."""
+        with self._lock:
+            value = self._mem_get(key)
+            if value is not None:
+                self._stats["hits"] += 1
+                return value
+
+        if self.path:
+            value, expires_at = self._disk_get(key)
+            if value is not None:
+                with self._lock:
+                    self._mem_set(key, value, expires_at)
+                    self._stats["disk_hits"] += 1
+                return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._mem_set(key, value, expires_at)
+        if self.path:
+            self._disk_set(key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM generations")
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._mem)}
@@ -0,0 +1,108 @@
+# FastAPI_backend/http_client.py
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional
+
+import httpx
+
+# ============================
+# Settings
+# ============================
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+# Idle pooled connections are closed after this many seconds
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "true").lower() in ("1", "true", "yes")
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])."""
+    if not HTTP_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def default_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=HTTP_CONNECT_TIMEOUT,
+        read=HTTP_READ_TIMEOUT,
+        write=HTTP_READ_TIMEOUT,
+        pool=HTTP_POOL_TIMEOUT,
+    )
+
+
+def default_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+# ============================
+# Shared clients
+# ============================
+
+_CLIENT: Optional[httpx.Client] = None
+_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+_LOCK = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Process-wide keep-alive client for outbound HTTP. Reusing it keeps
+    TCP/TLS connections open between calls instead of handshaking each time.
+    """
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        with _LOCK:
+            if _CLIENT is None or _CLIENT.is_closed:
+                _CLIENT = httpx.Client(
+                    http2=_http2_enabled(),
+                    limits=default_limits(),
+                    timeout=default_timeout(),
+                )
+    return _CLIENT
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Async counterpart of get_http_client(); use it from one event loop."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+        with _LOCK:
+            if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+                _ASYNC_CLIENT = httpx.AsyncClient(
+                    http2=_http2_enabled(),
+                    limits=default_limits(),
+                    timeout=default_timeout(),
+                )
+    return _ASYNC_CLIENT
+
+
+def close_http_client() -> None:
+    global _CLIENT
+    with _LOCK:
+        client, _CLIENT = _CLIENT, None
+    if client is not None:
+        client.close()
+
+
+async def aclose_http_clients() -> None:
+    """Close both shared clients (e.g. on application shutdown)."""
+    global _ASYNC_CLIENT
+    with _LOCK:
+        client, _ASYNC_CLIENT = _ASYNC_CLIENT, None
+    if client is not None:
+        await client.aclose()
+    close_http_client()
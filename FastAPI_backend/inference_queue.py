@@ -0,0 +1,162 @@
+# inference_queue.py
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ai_processor import hf_text2text_batch_async, JOB_TIMEOUT
+
+# Max requests merged into one generation call
+QUEUE_MAX_BATCH_SIZE = int(os.getenv("AI_QUEUE_MAX_BATCH_SIZE", "16"))
+# How long the first request of a group waits for company
+QUEUE_MAX_WAIT_MS = float(os.getenv("AI_QUEUE_MAX_WAIT_MS", "25"))
+# Batches allowed to be in flight at once
+QUEUE_MAX_CONCURRENT_BATCHES = int(os.getenv("AI_QUEUE_MAX_CONCURRENT_BATCHES", "4"))
+# How long close() lets in-flight batches finish before cancelling them
+QUEUE_DRAIN_TIMEOUT = float(os.getenv("AI_QUEUE_DRAIN_TIMEOUT", "10"))
+
+
+class InferenceQueue:
+    """
+    Collects concurrent generation requests for the same model and params,
+    then dispatches each group as one hf_text2text_batch_async call on the
+    event loop. A group is flushed when it reaches `max_batch_size` or when its
+    oldest request has waited `max_wait_ms`.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = QUEUE_MAX_BATCH_SIZE,
+        max_wait_ms: float = QUEUE_MAX_WAIT_MS,
+        max_concurrent_batches: int = QUEUE_MAX_CONCURRENT_BATCHES,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        self._groups: Dict[Tuple[str, str], List[Tuple[str, asyncio.Future]]] = {}
+        self._params: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        # Strong references: the loop only keeps weak ones to running tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._waiting = 0  # flushed requests waiting for a batch slot
+        self._stats = {
+            "requests": 0,
+            "dispatched": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_batch_size_seen": 0,
+            "total_wait_ms": 0.0,
+            "total_batch_ms": 0.0,
+        }
+        self._batch_sizes: Counter = Counter()
+
+    # ---------- submit ----------
+    async def submit(self, model_id: str, prompt: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue one prompt and wait for its _hf_text2text-style result."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        key = (model_id, json.dumps(params, sort_keys=True, default=str))
+        fut = loop.create_future()
+        fut.queued_at = time.monotonic()  # type: ignore[attr-defined]
+
+        group = self._groups.setdefault(key, [])
+        self._params[key] = params
+        group.append((prompt, fut))
+        self._stats["requests"] += 1
+
+        if len(group) >= self.max_batch_size:
+            self._flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout=JOB_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {"ok": False, "data": f"Timed out after {JOB_TIMEOUT:g}s", "status": 0}
+
+    # ---------- dispatch ----------
+    def _flush(self, key: Tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._groups.pop(key, None)
+        params = self._params.pop(key, {})
+        if group:
+            self._waiting += len(group)
+            task = asyncio.ensure_future(self._dispatch(key[0], params, group))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, model_id: str, params: Dict[str, Any], group: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            await self._run_batch(model_id, params, group)
+        except asyncio.CancelledError:
+            for _, fut in group:
+                if not fut.done():
+                    fut.set_result({"ok": False, "data": "Inference queue is shutting down", "status": 503})
+            raise
+
+    async def _run_batch(self, model_id: str, params: Dict[str, Any], group: List[Tuple[str, asyncio.Future]]) -> None:
+        async with self._semaphore:
+            self._waiting -= len(group)
+            self._in_flight += 1
+            started = time.monotonic()
+            for _, fut in group:
+                self._stats["total_wait_ms"] += (started - fut.queued_at) * 1000  # type: ignore[attr-defined]
+            self._stats["batches"] += 1
+            self._stats["dispatched"] += len(group)
+            self._batch_sizes[len(group)] += 1
+            self._stats["max_batch_size_seen"] = max(self._stats["max_batch_size_seen"], len(group))
+            try:
+                results = await hf_text2text_batch_async(model_id, [p for p, _ in group], params)
+            except Exception as e:
+                self._stats["errors"] += 1
+                results = [{"ok": False, "data": str(e), "status": 0}] * len(group)
+            finally:
+                self._in_flight -= 1
+                self._stats["total_batch_ms"] += (time.monotonic() - started) * 1000
+
+        for (_, fut), r in zip(group, results):
+            if not fut.done():
+                fut.set_result(r)
+
+    async def close(self, timeout: float = QUEUE_DRAIN_TIMEOUT) -> None:
+        """Dispatch open groups, give in-flight batches `timeout` seconds, then cancel the rest."""
+        for key in list(self._groups):
+            self._flush(key)
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    # ---------- metrics ----------
+    def queue_depth(self) -> int:
+        return sum(len(g) for g in self._groups.values()) + self._waiting
+
+    def metrics(self) -> Dict[str, Any]:
+        batches = self._stats["batches"] or 1
+        dispatched = self._stats["dispatched"] or 1
+        return {
+            "queue_depth": self.queue_depth(),
+            "open_groups": len(self._groups),
+            "batches_in_flight": self._in_flight,
+            "requests": self._stats["requests"],
+            "batches": self._stats["batches"],
+            "errors": self._stats["errors"],
+            "avg_batch_size": round(self._stats["dispatched"] / batches, 2),
+            "max_batch_size_seen": self._stats["max_batch_size_seen"],
+            "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            "avg_wait_ms": round(self._stats["total_wait_ms"] / dispatched, 2),
+            "avg_batch_ms": round(self._stats["total_batch_ms"] / batches, 2),
+        }
+
+
+inference_queue = InferenceQueue()
@@ -0,0 +1,199 @@
+# ingest.py
+import io
+import json
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from extractors import EXTRACTORS, UnsupportedFormat, sniff_format
+from profiling import DatasetProfiler, _jsonable
+
+# Largest upload accepted, in bytes
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+# Rows per DataFrame chunk handed to consumers
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+# Bytes read per step when scanning a JSON array
+INGEST_READ_BYTES = int(os.getenv("INGEST_READ_BYTES", str(1024 * 1024)))
+# Seconds a single upload may spend being parsed
+UPLOAD_PARSE_TIMEOUT = float(os.getenv("UPLOAD_PARSE_TIMEOUT", "120"))
+
+TABULAR_FORMATS = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".xls": "excel",
+    ".xlsx": "excel",
+}
+
+
+class UploadError(ValueError):
+    """Upload rejected before or during parsing; `status` is the HTTP status to return."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def upload_format(filename: str) -> Optional[str]:
+    """Tabular format for the file extension, or None for documents."""
+    return TABULAR_FORMATS.get(Path(filename or "").suffix.lower())
+
+
+def upload_size(fp: BinaryIO) -> int:
+    """Size of a seekable upload stream without reading it."""
+    pos = fp.tell()
+    fp.seek(0, os.SEEK_END)
+    size = fp.tell()
+    fp.seek(pos)
+    return size
+
+
+def check_upload_size(fp: BinaryIO, declared: Optional[int] = None, max_bytes: int = UPLOAD_MAX_BYTES) -> int:
+    size = declared if declared is not None else upload_size(fp)
+    if size > max_bytes:
+        raise UploadError(f"File too large ({size} bytes; limit is {max_bytes})", status=413)
+    return size
+
+
+# ============================
+# Incremental readers
+# ============================
+
+def _iter_json_array(fp: BinaryIO, read_bytes: int = INGEST_READ_BYTES) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading the whole document."""
+    decoder = json.JSONDecoder()
+    reader = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+    buf = ""
+    started = False
+    try:
+        while True:
+            chunk = reader.read(read_bytes)
+            buf += chunk
+            pos = 0
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if not started:
+                    if pos >= len(buf):
+                        break
+                    if buf[pos] != "[":
+                        raise UploadError("Expected a JSON array of records")
+                    started = True
+                    pos += 1
+                    continue
+                if pos < len(buf) and buf[pos] == "]":
+                    return
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise UploadError("Malformed or truncated JSON")
+                    break  # need more input
+                yield item
+                pos = end
+            buf = buf[pos:]
+            if not chunk:
+                if buf.strip():
+                    raise UploadError("Malformed or truncated JSON")
+                return
+    finally:
+        reader.detach()  # leave the upload stream open for its owner
+
+
+def _batched_frames(records: Iterator[Any], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    batch: List[Any] = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= chunk_rows:
+            yield pd.json_normalize(batch, max_level=0)
+            batch = []
+    if batch:
+        yield pd.json_normalize(batch, max_level=0)
+
+
+def _first_char(fp: BinaryIO) -> str:
+    pos = fp.tell()
+    head = fp.read(64).lstrip(b"\xef\xbb\xbf \t\r\n")
+    fp.seek(pos)
+    return head[:1].decode("ascii", errors="ignore")
+
+
+def _is_json_lines(fp: BinaryIO) -> bool:
+    """True when the first line is a complete JSON object followed by more lines."""
+    pos = fp.tell()
+    try:
+        json.loads(fp.readline())
+        return any(line.strip() for line in iter(fp.readline, b""))
+    except ValueError:
+        return False
+    finally:
+        fp.seek(pos)
+
+
+def iter_frames(fp: BinaryIO, fmt: str, chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Parse an upload stream into DataFrame chunks of at most `chunk_rows`
+    rows. CSV/TSV and JSON (array or lines) are read incrementally; Excel
+    needs random access, so it is read from the spooled upload in one go.
+    """
+    fp.seek(0)
+    if fmt in ("csv", "tsv"):
+        yield from pd.read_csv(fp, sep="\t" if fmt == "tsv" else ",", chunksize=chunk_rows)
+    elif fmt == "jsonl":
+        yield from pd.read_json(fp, lines=True, chunksize=chunk_rows)
+    elif fmt == "json":
+        first = _first_char(fp)
+        if first == "[":
+            yield from _batched_frames(_iter_json_array(fp), chunk_rows)
+        elif first == "{" and _is_json_lines(fp):
+            yield from pd.read_json(fp, lines=True, chunksize=chunk_rows)
+        elif first == "{":
+            # One column -> values object; pandas needs the whole document for this
+            yield pd.read_json(fp)
+        else:
+            raise UploadError("Malformed JSON upload")
+    elif fmt == "excel":
+        df = pd.read_excel(fp)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+    else:
+        raise UploadError("Unsupported file format", status=415)
+
+
+def summarize_upload(fp: BinaryIO, fmt: str, preview_rows: int = 5) -> Dict[str, Any]:
+    """
+    Parse an upload chunk by chunk into the preview/summary payload of
+    /api/upload. Reading stops at the profiler's row cap.
+    """
+    profiler = DatasetProfiler()
+    preview: List[Dict[str, Any]] = []
+    for frame in iter_frames(fp, fmt):
+        if len(preview) < preview_rows:
+            for row in frame.head(preview_rows - len(preview)).to_dict(orient="records"):
+                preview.append({k: _jsonable(v) for k, v in row.items()})
+        profiler.update(frame)
+        if profiler.truncated:
+            break
+    summary = profiler.result()
+    return {
+        "rows": summary["rows_read"],
+        "truncated": summary["truncated"],
+        "preview": preview,
+        "summary": summary,
+    }
+
+
+def extract_upload_document(fp: BinaryIO, filename: Optional[str] = None, mime: Optional[str] = None) -> Dict[str, Any]:
+    """Text of a document upload, using the same extractor registry as the Streamlit pages."""
+    fp.seek(0)
+    data = fp.read()
+    try:
+        fmt = sniff_format(data, filename, mime)
+    except UnsupportedFormat as e:
+        raise UploadError(str(e), status=415)
+    text = "".join(EXTRACTORS[fmt].iter_text(data)).strip()
+    return {"format": fmt, "chars": len(text), "text": text}
@@ -0,0 +1,542 @@
+# FastAPI_backend/job_queue.py
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import multiprocessing
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+try:
+    from src.ai_processor import generate_cards_from_chunk
+    from src.chunker import iter_chunks, CHUNK_TOKENS, CHUNK_OVERLAP
+    from src.flashcard_generator import dedupe_cards
+except ImportError:
+    from ai_processor import generate_cards_from_chunk
+    from chunker import iter_chunks, CHUNK_TOKENS, CHUNK_OVERLAP
+    from flashcard_generator import dedupe_cards
+
+# ============================
+# Settings
+# ============================
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+# Worker processes started by JobWorkers.start()
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# A claimed chunk (or job being finalized) not finished within this many
+# seconds is handed to another worker
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    user_id TEXT,
+    status TEXT NOT NULL,
+    params TEXT,
+    total INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_chunks (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    input TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS job_chunks_status ON job_chunks (status, lease_until);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, created_at);
+"""
+
+
+# ============================
+# Store
+# ============================
+
+class JobStore:
+    """
+    SQLite-backed queue of jobs split into chunks. Workers in any number
+    of processes claim chunks with a lease; a chunk whose worker dies is
+    claimed again once its lease expires, so jobs resume after a crash or
+    restart. Chunk results are stored as they finish, and the job is
+    finalized once every chunk is done or has failed for good; finalizing
+    is leased the same way. Only the worker holding a lease can record its
+    outcome, and a job moves to 'saving' before anything is written
+    elsewhere, so a reclaimed finalize never saves twice.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Databases created before finalizing was leased
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, decl in (("worker", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {decl}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ---------- producers ----------
+    def submit(
+        self,
+        kind: str,
+        chunks: Iterable[str],
+        params: Optional[Dict[str, Any]] = None,
+        user_id: Optional[str] = None,
+    ) -> str:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        rows = [(job_id, i, text, "pending") for i, text in enumerate(chunks)]
+        if not rows:
+            raise ValueError("Nothing to process: the job has no chunks")
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, status, params, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, user_id, json.dumps(params or {}), len(rows), now, now),
+            )
+            conn.executemany("INSERT INTO job_chunks (job_id, idx, input, status) VALUES (?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop handing out the job's chunks; chunks already running finish but are ignored."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+            return cur.rowcount > 0
+
+    def resume(self, job_id: str) -> bool:
+        """
+        Requeue a cancelled or failed job, one with failed chunks, or one
+        whose finalizing worker lost its lease; finished chunks are kept.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            job = conn.execute("SELECT status, failed, lease_until FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None or not (
+                job["status"] in ("cancelled", "failed")
+                or (job["status"] == "done" and job["failed"])
+                or (job["status"] == "finalizing" and (job["lease_until"] or 0) < time.time())
+            ):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "UPDATE job_chunks SET status = 'pending', attempts = 0, error = NULL, lease_until = NULL "
+                "WHERE job_id = ? AND status != 'done'",
+                (job_id,),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', failed = 0, error = NULL, worker = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ---------- workers ----------
+    def claim(self, worker_id: str, lease: float = JOB_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next chunk to process, oldest job first. When a job has
+        nothing left to process, it is leased with "finalize": True; if that
+        worker doesn't finish it before the lease expires, it is handed out again.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT c.job_id, c.idx, c.input, c.attempts, j.kind, j.params, j.user_id "
+                "FROM job_chunks c JOIN jobs j ON j.id = c.job_id "
+                "WHERE j.status IN ('queued', 'running') "
+                "AND (c.status = 'pending' OR (c.status = 'running' AND c.lease_until < ?)) "
+                "ORDER BY j.created_at, c.idx LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE job_chunks SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                    "WHERE job_id = ? AND idx = ?",
+                    (worker_id, now + lease, row["job_id"], row["idx"]),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                    (now, row["job_id"]),
+                )
+                conn.execute("COMMIT")
+                return {
+                    "job_id": row["job_id"],
+                    "idx": row["idx"],
+                    "input": row["input"],
+                    "attempts": row["attempts"] + 1,
+                    "kind": row["kind"],
+                    "params": json.loads(row["params"] or "{}"),
+                    "user_id": row["user_id"],
+                    "finalize": False,
+                }
+
+            job = conn.execute(
+                "SELECT j.id, j.kind, j.params, j.user_id FROM jobs j "
+                "WHERE (j.status IN ('queued', 'running') OR (j.status = 'finalizing' AND j.lease_until < ?)) "
+                "AND NOT EXISTS (SELECT 1 FROM job_chunks c WHERE c.job_id = j.id AND c.status IN ('pending', 'running')) "
+                "ORDER BY j.created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if job is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'finalizing', worker = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease, now, job["id"]),
+            )
+            conn.execute("COMMIT")
+            return {
+                "job_id": job["id"],
+                "kind": job["kind"],
+                "params": json.loads(job["params"] or "{}"),
+                "user_id": job["user_id"],
+                "finalize": True,
+            }
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete_chunk(self, job_id: str, idx: int, result: Any, worker_id: Optional[str] = None) -> bool:
+        """
+        Store a running chunk's result. With `worker_id`, only the worker
+        holding its lease can; returns False if the update was ignored.
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE job_chunks SET status = 'done', result = ?, error = NULL, lease_until = NULL "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND (? IS NULL OR worker = ?)",
+                (json.dumps(result), job_id, idx, worker_id, worker_id),
+            )
+            if cur.rowcount:
+                self._refresh_counts(conn, job_id)
+            return cur.rowcount > 0
+
+    def fail_chunk(
+        self,
+        job_id: str,
+        idx: int,
+        error: str,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        worker_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Record a failed attempt; the chunk is retried until it has used
+        `max_attempts`. Guarded by `worker_id` like complete_chunk().
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE job_chunks SET error = ?, lease_until = NULL, "
+                "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND (? IS NULL OR worker = ?)",
+                (error, max_attempts, job_id, idx, worker_id, worker_id),
+            )
+            if cur.rowcount:
+                self._refresh_counts(conn, job_id)
+            return cur.rowcount > 0
+
+    def _refresh_counts(self, conn: sqlite3.Connection, job_id: str) -> None:
+        conn.execute(
+            "UPDATE jobs SET "
+            "done = (SELECT COUNT(*) FROM job_chunks WHERE job_id = ? AND status = 'done'), "
+            "failed = (SELECT COUNT(*) FROM job_chunks WHERE job_id = ? AND status = 'failed'), "
+            "updated_at = ? WHERE id = ?",
+            (job_id, job_id, time.time(), job_id),
+        )
+
+    def begin_save(self, job_id: str, worker_id: str) -> bool:
+        """
+        Move a finalizing job to 'saving' if `worker_id` still holds its
+        lease. A saving job is never handed out again, so whatever the
+        finalizer writes outside this database is written at most once.
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'saving', updated_at = ? WHERE id = ? AND status = 'finalizing' AND worker = ?",
+                (time.time(), job_id, worker_id),
+            )
+            return cur.rowcount > 0
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Any = None,
+        error: Optional[str] = None,
+        worker_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Record the outcome of finalizing. With `worker_id`, only the worker
+        that holds the finalize lease can finish the job; returns False otherwise.
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, worker = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN ('finalizing', 'saving') AND (? IS NULL OR worker = ?)",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, worker_id, worker_id),
+            )
+            return cur.rowcount > 0
+
+    # ---------- readers ----------
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, user_id, status, total, done, failed, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return _job_progress(row) if row else None
+
+    def chunk_results(self, job_id: str) -> List[Any]:
+        """Results of the chunks finished so far, in document order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM job_chunks WHERE job_id = ? AND status = 'done' ORDER BY idx", (job_id,)
+            ).fetchall()
+        return [json.loads(r["result"]) for r in rows]
+
+    def chunk_errors(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT idx, error FROM job_chunks WHERE job_id = ? AND status = 'failed' ORDER BY idx", (job_id,)
+            ).fetchall()
+        return [{"idx": r["idx"], "error": r["error"]} for r in rows]
+
+    def result(self, job_id: str) -> Any:
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row["result"]) if row and row["result"] else None
+
+    def list_jobs(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, user_id, status, total, done, failed, error, created_at, updated_at "
+                "FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        return [_job_progress(r) for r in rows]
+
+
+def _job_progress(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["progress"] = round((job["done"] + job["failed"]) / job["total"], 4) if job["total"] else 1.0
+    return job
+
+
+# ============================
+# Job kinds
+# ============================
+
+def _save_cards(cards: List[Dict[str, Any]], user_id: str) -> int:
+    try:
+        from src.database import save_flashcards
+    except ImportError:
+        from db import SupaDB  # FastAPI_backend
+        rows = [{"question": c["question"], "answer": c["answer"], "created_by": user_id} for c in cards]
+        key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+        return SupaDB(os.getenv("SUPABASE_URL"), key).insert_cards_bulk(rows)["inserted"]
+    results = save_flashcards(cards, user_id, source="paraphrased")
+    return sum(1 for r in results if "error" not in r)
+
+
+def _deck_chunk(text: str, params: Dict[str, Any]) -> List[Dict[str, str]]:
+    return generate_cards_from_chunk(
+        text,
+        questions_per_chunk=params.get("questions_per_chunk", 3),
+        num_paraphrases=params.get("num_paraphrases", 3),
+    )
+
+
+def _deck_finalize(chunk_results: List[List[Dict[str, str]]], params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+    """Merge chunk cards in document order and drop repeated questions."""
+    return {"cards": dedupe_cards(chunk_results, params.get("max_cards"))}
+
+
+def _deck_save(result: Dict[str, Any], params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+    if params.get("save") and user_id and result["cards"]:
+        result["saved"] = _save_cards(result["cards"], user_id)
+    return result
+
+
+# kind -> {"chunk": fn(input, params) -> result,
+#          "finalize": fn(chunk_results, params, user_id) -> result,
+#          "save": optional fn(result, params, user_id) -> result, run at most once}
+JOB_HANDLERS: Dict[str, Dict[str, Callable[..., Any]]] = {
+    "deck": {"chunk": _deck_chunk, "finalize": _deck_finalize, "save": _deck_save},
+}
+
+
+def submit_deck_job(
+    store: JobStore,
+    text: Union[str, Iterable[str]],
+    user_id: Optional[str] = None,
+    questions_per_chunk: int = 3,
+    num_paraphrases: int = 3,
+    max_cards: Optional[int] = None,
+    save: bool = False,
+    chunk_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP,
+) -> str:
+    """Split a document (string or stream of pages) into chunks and queue a deck job."""
+    params = {
+        "questions_per_chunk": questions_per_chunk,
+        "num_paraphrases": num_paraphrases,
+        "max_cards": max_cards,
+        "save": save,
+    }
+    chunks = iter_chunks(text, max_tokens=chunk_tokens, overlap_tokens=overlap_tokens)
+    return store.submit("deck", chunks, params, user_id)
+
+
+# ============================
+# Workers
+# ============================
+
+def process_next(store: JobStore, worker_id: str) -> bool:
+    """Claim and run one unit of work; returns False when the queue is empty."""
+    task = store.claim(worker_id)
+    if task is None:
+        return False
+    handlers = JOB_HANDLERS[task["kind"]]
+
+    if task["finalize"]:
+        job_id = task["job_id"]
+        results = store.chunk_results(job_id)
+        if not results:
+            errors = store.chunk_errors(job_id)
+            error = errors[0]["error"] if errors else "No chunk produced a result"
+            store.finish(job_id, "failed", error=error, worker_id=worker_id)
+            return True
+        try:
+            result = handlers["finalize"](results, task["params"], task["user_id"])
+            if "save" in handlers:
+                if not store.begin_save(job_id, worker_id):
+                    return True  # lease lost; another worker finalizes the job
+                result = handlers["save"](result, task["params"], task["user_id"])
+        except Exception as e:
+            store.finish(job_id, "failed", error=f"❌ Finalizing failed: {e}", worker_id=worker_id)
+        else:
+            store.finish(job_id, "done", result=result, worker_id=worker_id)
+        return True
+
+    try:
+        result = handlers["chunk"](task["input"], task["params"])
+    except Exception as e:
+        store.fail_chunk(task["job_id"], task["idx"], str(e), worker_id=worker_id)
+    else:
+        store.complete_chunk(task["job_id"], task["idx"], result, worker_id=worker_id)
+    return True
+
+
+def run_worker(path: str, worker_id: str, stop_event: Any = None, poll_interval: float = JOB_POLL_INTERVAL) -> None:
+    """Worker loop: process chunks until `stop_event` is set, sleeping while the queue is empty."""
+    store = JobStore(path)
+    while stop_event is None or not stop_event.is_set():
+        try:
+            busy = process_next(store, worker_id)
+        except sqlite3.Error as e:
+            print(f"❌ Job worker {worker_id} database error: {e}")
+            busy = False
+        if not busy:
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+
+class JobWorkers:
+    """Starts and stops a set of worker processes for one job database."""
+
+    def __init__(self, path: str = JOB_DB_PATH, workers: int = JOB_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = None
+        self._procs: List[Any] = []
+
+    def start(self) -> bool:
+        if self._procs or self.workers <= 0:
+            return False
+        JobStore(self.path)  # create the schema once, before the workers start
+        self._stop = self._ctx.Event()
+        for i in range(self.workers):
+            proc = self._ctx.Process(
+                target=run_worker,
+                args=(self.path, f"{os.getpid()}-{i}", self._stop),
+                name=f"job-worker-{i}",
+                daemon=True,
+            )
+            proc.start()
+            self._procs.append(proc)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._stop is not None:
+            self._stop.set()
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()  # its leased chunk is picked up again after the lease expires
+        self._procs = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": len(self._procs), "alive": sum(p.is_alive() for p in self._procs), "path": self.path}
+
+
+if __name__ == "__main__":
+    # Standalone worker: python job_queue.py [workers]
+    import sys
+
+    pool = JobWorkers(workers=int(sys.argv[1]) if len(sys.argv) > 1 else JOB_WORKERS)
+    pool.start()
+    print(f"✅ {pool.workers} job workers processing {pool.path} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,212 @@
+# FastAPI_backend/local_inference.py
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# ============================
+# Settings
+# ============================
+
+LOCAL_MAX_BATCH_SIZE = int(os.getenv("AI_LOCAL_MAX_BATCH_SIZE", "8"))
+# Cap on padded input tokens per batch (batch size x longest input).
+LOCAL_MAX_BATCH_TOKENS = int(os.getenv("AI_LOCAL_MAX_BATCH_TOKENS", "4096"))
+LOCAL_MAX_INPUT_TOKENS = int(os.getenv("AI_LOCAL_MAX_INPUT_TOKENS", "512"))
+LOCAL_INT8 = os.getenv("AI_LOCAL_INT8", "false").lower() in ("1", "true", "yes")
+LOCAL_THREADS = int(os.getenv("AI_LOCAL_THREADS", "0"))  # 0 = torch default
+# Longest wait for the next streamed piece before giving up on generate()
+LOCAL_STREAM_TIMEOUT = float(os.getenv("AI_LOCAL_STREAM_TIMEOUT", "120"))
+
+
+def _load_transformers():
+    """Import torch/transformers lazily so remote-only deployments don't pay for them."""
+    try:
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+    except Exception as e:
+        raise RuntimeError(
+            "❌ Local inference needs `torch` and `transformers`. "
+            f"Install them or set AI_BACKEND=remote. ({e})"
+        )
+    return torch, AutoTokenizer, AutoModelForSeq2SeqLM
+
+
+# ============================
+# Engine
+# ============================
+
+class LocalSeq2SeqEngine:
+    """
+    CPU inference for the seq2seq checkpoints in PARAPHRASE_MODELS / QG_MODELS.
+
+    Each model is loaded once per process and reused. `generate()` takes
+    a list of prompts and runs them through `model.generate()` in batches
+    grouped by input length, so each batch pads to a similar length.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = LOCAL_MAX_BATCH_SIZE,
+        max_batch_tokens: int = LOCAL_MAX_BATCH_TOKENS,
+        max_input_tokens: int = LOCAL_MAX_INPUT_TOKENS,
+        int8: bool = LOCAL_INT8,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_input_tokens = max_input_tokens
+        self.int8 = int8
+        self._models: Dict[str, Tuple[Any, Any]] = {}
+        self._load_lock = threading.Lock()
+        # torch modules aren't safe to run concurrently from many threads
+        self._run_locks: Dict[str, threading.Lock] = {}
+
+    def load(self, model_id: str) -> Tuple[Any, Any]:
+        """Return (tokenizer, model), loading the checkpoint on first use."""
+        if model_id in self._models:
+            return self._models[model_id]
+        with self._load_lock:
+            if model_id not in self._models:
+                torch, AutoTokenizer, AutoModelForSeq2SeqLM = _load_transformers()
+                if LOCAL_THREADS:
+                    torch.set_num_threads(LOCAL_THREADS)
+                tokenizer = AutoTokenizer.from_pretrained(model_id)
+                model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
+                model.eval()
+                if self.int8:
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                self._run_locks[model_id] = threading.Lock()
+                self._models[model_id] = (tokenizer, model)
+        return self._models[model_id]
+
+    def loaded_models(self) -> List[str]:
+        return list(self._models)
+
+    def _plan_batches(self, lengths: List[int]) -> List[List[int]]:
+        """Group prompt indices by length so each batch stays under the size and padding budgets."""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for i in order:
+            longest = max([lengths[j] for j in current] + [lengths[i]])
+            if current and (
+                len(current) >= self.max_batch_size
+                or longest * (len(current) + 1) > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _gen_kwargs(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        n = max(1, int(params.get("num_return_sequences", 1)))
+        do_sample = params.get("do_sample", True)
+        gen_kwargs = {
+            "max_new_tokens": params.get("max_new_tokens", 128),
+            "num_return_sequences": n,
+            "do_sample": do_sample,
+        }
+        if do_sample:
+            gen_kwargs["temperature"] = params.get("temperature", 0.7)
+            gen_kwargs["top_p"] = params.get("top_p", 0.95)
+        else:
+            gen_kwargs["num_beams"] = max(n, 1)
+        return gen_kwargs
+
+    def generate(
+        self,
+        model_id: str,
+        prompts: List[str],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Generate for every prompt. Returns one list of {"generated_text": ...}
+        per prompt, in input order, each holding `num_return_sequences` items.
+        """
+        torch, _, _ = _load_transformers()
+        tokenizer, model = self.load(model_id)
+        params = params or {}
+        n = max(1, int(params.get("num_return_sequences", 1)))
+        gen_kwargs = self._gen_kwargs(params)
+
+        lengths = [
+            len(ids) for ids in tokenizer(
+                prompts, truncation=True, max_length=self.max_input_tokens
+            )["input_ids"]
+        ]
+        results: List[List[Dict[str, Any]]] = [[] for _ in prompts]
+
+        with self._run_locks[model_id], torch.inference_mode():
+            if params.get("seed") is not None:
+                torch.manual_seed(int(params["seed"]))
+            for batch in self._plan_batches(lengths):
+                enc = tokenizer(
+                    [prompts[i] for i in batch],
+                    return_tensors="pt",
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_input_tokens,
+                )
+                out = model.generate(**enc, **gen_kwargs)
+                texts = tokenizer.batch_decode(out, skip_special_tokens=True)
+                for pos, i in enumerate(batch):
+                    results[i] = [{"generated_text": t} for t in texts[pos * n:(pos + 1) * n]]
+        return results
+
+    def stream(
+        self,
+        model_id: str,
+        prompt: str,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Yield decoded text pieces for a single sequence as they are generated."""
+        torch, _, _ = _load_transformers()
+        from transformers import TextIteratorStreamer
+
+        tokenizer, model = self.load(model_id)
+        params = {**(params or {}), "num_return_sequences": 1}
+        streamer = TextIteratorStreamer(
+            tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=LOCAL_STREAM_TIMEOUT
+        )
+        enc = tokenizer([prompt], return_tensors="pt", truncation=True, max_length=self.max_input_tokens)
+        gen_kwargs = self._gen_kwargs(params)
+        failed: List[BaseException] = []
+
+        def run():
+            try:
+                with self._run_locks[model_id], torch.inference_mode():
+                    if params.get("seed") is not None:
+                        torch.manual_seed(int(params["seed"]))
+                    model.generate(**enc, **gen_kwargs, streamer=streamer)
+            except BaseException as e:
+                failed.append(e)
+            finally:
+                # Unblocks the consumer even when generate() dies before streaming
+                streamer.end()
+
+        threading.Thread(target=run, daemon=True, name="local-stream").start()
+        try:
+            for piece in streamer:
+                if piece:
+                    yield piece
+        except queue.Empty:
+            raise TimeoutError(f"{model_id} produced nothing for {LOCAL_STREAM_TIMEOUT:.0f}s")
+        if failed:
+            raise failed[0]
+
+
+_ENGINE: Optional[LocalSeq2SeqEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_local_engine() -> LocalSeq2SeqEngine:
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = LocalSeq2SeqEngine()
+    return _ENGINE
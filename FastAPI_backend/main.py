@@ -8,13 +8,20 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
-import requests
 import os
 import re
 import logging
 import sys
+from contextlib import asynccontextmanager
 from api import router as api_router
+from inference_queue import inference_queue
+from ai_processor import start_warmup, stop_warmup
+from http_client import aclose_http_clients, get_http_client
+from pagination import InvalidColumns, InvalidCursor, parse_columns
+from blocking import payments_executor, executor_metrics, loop_lag, shutdown_executors
+from job_queue import JobWorkers
 from dotenv import load_dotenv
 from intasend import APIService
 
@@ -34,7 +41,7 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Import DB
-from db import SupaDB
+from async_db import AsyncSupaDB
 
 # IntaSend credentials
 INTASEND_SECRET_TOKEN = os.getenv("INTASEND_SECRET_TOKEN")
@@ -78,8 +85,29 @@ class CheckoutDonationRequest(BaseModel):
     amount: float = Field(gt=0)
     currency: str = Field(default="KES", description="Currency code")
 
+
+# Worker processes for queued deck-generation jobs (JOB_WORKERS=0 to run them elsewhere)
+job_workers = JobWorkers()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the hosted models in the background and keep them warm
+    if start_warmup():
+        logger.info("Model warm-up scheduler started")
+    loop_lag.start()
+    if job_workers.start():
+        logger.info(f"Started {job_workers.workers} background job workers")
+    yield
+    job_workers.stop()
+    stop_warmup()
+    await inference_queue.close()
+    shutdown_executors()
+    await aclose_http_clients()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="QubitLearn Backend")
+app = FastAPI(title="QubitLearn Backend", lifespan=lifespan)
 app.include_router(api_router)
 
 # Middleware setup
@@ -93,7 +121,7 @@ app.add_middleware(
 )
 
 # Database client
-db = SupaDB(
+db = AsyncSupaDB(
     url=os.getenv("SUPABASE_URL"),
     key=os.getenv("SUPABASE_KEY"),
 )
@@ -147,7 +175,7 @@ def create_card_checkout(email, amount, currency="KES", narrative="Donation"):
         "currency": currency,
         "narrative": narrative
     }
-    response = requests.post(url, json=payload, headers=headers)
+    response = get_http_client().post(url, json=payload, headers=headers)
     return response.json()
 
 # ------------------- ROUTES ------------------- #
@@ -178,7 +206,7 @@ async def login_user(
 ):
     """Handle user login."""
     try:
-        user = db.login_user(email, password)
+        user = await db.login_user(email, password)
         if not user or "id" not in user:
             print(f"[DEBUG] Login failed for {email}")
             return templates.TemplateResponse(
@@ -223,7 +251,7 @@ async def signup_user(
     """Handle user signup."""
     try:
         # Check for existing email
-        existing_email = db.get_user_by_email(email)
+        existing_email = await db.get_user_by_email(email)
         if existing_email:
             return templates.TemplateResponse(
                 "signup.html",
@@ -232,8 +260,7 @@ async def signup_user(
 
         # Check for existing username
         try:
-            existing_username = db.client.table("users").select("id").eq("username", username).limit(1).execute()
-            if existing_username.data:
+            if await db.username_taken(username):
                 return templates.TemplateResponse(
                     "signup.html",
                     {"request": request, "error": "Username is already taken. Please choose another."},
@@ -245,14 +272,14 @@ async def signup_user(
                 {"request": request, "error": "Error checking username. Please try again."},
             )
 
-        new_user = db.signup_user(email, password, full_name)
+        new_user = await db.signup_user(email, password, full_name)
         if not new_user or not getattr(new_user, "user", None):
             return templates.TemplateResponse(
                 "signup.html",
                 {"request": request, "error": "Error creating user account."},
             )
 
-        db.save_user(new_user.user.id, email, username, full_name)
+        await db.save_user(new_user.user.id, email, username, full_name)
         print(f"✅ New user registered: {email}")
 
         # Redirect to login after signup
@@ -315,7 +342,7 @@ async def api_add_flashcards(request: Request):
         rows = await request.json()
         if isinstance(rows, dict):
             rows = [rows]
-        success, result = db.insert_cards(rows)
+        success, result = await db.insert_cards(rows)
         if success:
             return {"ok": True, "data": result}
         return {"ok": False, "error": result}
@@ -328,14 +355,36 @@ def add_flashcard_page(request: Request, user: dict = Depends(require_login)):
         return user
     return templates.TemplateResponse("add_flashcard.html", {"request": request, "user": user})
 
-# API endpoint to get all flashcards (GET, no body required)
+# API endpoint to get flashcards one page at a time (GET, no body required)
 @app.get("/api/flashcards")
-async def api_get_flashcards():
+async def api_get_flashcards(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    columns: Optional[str] = None,
+    count: bool = False,
+):
+    """
+    Newest cards first. Pass `next_cursor` back as `cursor` for the next page;
+    `columns` is a comma-separated projection of id, question, answer, source
+    and created_at (default id,question,answer,created_at).
+    """
     try:
-        cards = db.get_all_cards()
-        return {"flashcards": cards}
+        page = await db.get_cards_page(
+            page_size=limit,
+            cursor=cursor,
+            columns=parse_columns(columns),
+            with_count=count,
+        )
+        return {
+            "flashcards": page["items"],
+            "next_cursor": page["next_cursor"],
+            "page_size": page["page_size"],
+            **({"total": page["total"]} if count else {}),
+        }
+    except (InvalidCursor, InvalidColumns) as e:
+        return JSONResponse(status_code=400, content={"flashcards": [], "error": str(e)})
     except Exception as e:
-        return {"flashcards": [], "error": str(e)}
+        return {"flashcards": [], "next_cursor": None, "error": str(e)}
     
 # Upload page
 @app.get("/upload", response_class=HTMLResponse)
@@ -371,7 +420,8 @@ async def donate_mpesa_stk(body: STKDonationRequest):
 
         print(f"[DEBUG] Initiating M-Pesa STK push: amount={body.amount}, phone={body.phone}, email={body.email}")
         
-        resp = service.collect.mpesa_stk_push(
+        resp = await payments_executor.run(
+            service.collect.mpesa_stk_push,
             amount=body.amount,
             phone_number=body.phone.strip(),
             api_ref=api_ref,
@@ -419,7 +469,8 @@ async def donate_checkout(body: CheckoutDonationRequest):
 
         print(f"[DEBUG] Initiating card checkout: amount={body.amount}, email={body.email}, currency={body.currency}")
         
-        resp = service.collect.checkout(
+        resp = await payments_executor.run(
+            service.collect.checkout,
             amount=body.amount,
             currency=body.currency,
             email=body.email,
@@ -451,6 +502,12 @@ async def donate_checkout(body: CheckoutDonationRequest):
         print(f"[ERROR] Card checkout donation failed: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Payment initiation failed: {str(e)}")
     
+@app.get("/api/runtime/metrics")
+async def api_runtime_metrics():
+    """Thread-pool usage for blocking backends, event-loop lag and job workers."""
+    return {**executor_metrics(), "job_workers": job_workers.stats()}
+
+
 @app.get("/health")
 def health_check():
     """Health check endpoint for Railway monitoring"""
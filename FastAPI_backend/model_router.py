@@ -0,0 +1,115 @@
+# FastAPI_backend/model_router.py
+
+from __future__ import annotations
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ============================
+# Settings
+# ============================
+
+ROUTER_WINDOW = int(os.getenv("AI_ROUTER_WINDOW", "50"))
+# A model whose recent error rate reaches this is routed around
+ROUTER_MAX_ERROR_RATE = float(os.getenv("AI_ROUTER_MAX_ERROR_RATE", "0.5"))
+# Fewer observations than this never mark a model unhealthy
+ROUTER_MIN_SAMPLES = int(os.getenv("AI_ROUTER_MIN_SAMPLES", "3"))
+# Observations older than this are ignored
+ROUTER_MAX_AGE = float(os.getenv("AI_ROUTER_MAX_AGE_SECONDS", "600"))
+
+AUTO = "auto"
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class ModelRouter:
+    """
+    Tracks rolling latency and error rate per model id and orders the
+    models of a family for each request: the requested model first (or
+    the fastest healthy one for "auto"), then the rest of the family in
+    its fallback order, with unhealthy models last. When `warm_check`
+    reports a model as cold, it is tried after the warm ones.
+    """
+
+    def __init__(
+        self,
+        window: int = ROUTER_WINDOW,
+        max_error_rate: float = ROUTER_MAX_ERROR_RATE,
+        max_age: float = ROUTER_MAX_AGE,
+        min_samples: int = ROUTER_MIN_SAMPLES,
+        health_check: Optional[Callable[[str], bool]] = None,
+        warm_check: Optional[Callable[[str], Optional[bool]]] = None,
+    ):
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self.max_age = max_age
+        self.min_samples = min_samples
+        self.health_check = health_check
+        self.warm_check = warm_check
+        self._obs: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            obs = self._obs.setdefault(model_id, deque(maxlen=self.window))
+            obs.append((time.monotonic(), latency, ok))
+
+    def stats(self, model_id: str) -> Dict[str, Any]:
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            recent = [o for o in self._obs.get(model_id, ()) if o[0] >= cutoff]
+        latencies = [lat for _, lat, ok in recent if ok]
+        errors = sum(1 for _, _, ok in recent if not ok)
+        p50 = _percentile(latencies, 50)
+        p95 = _percentile(latencies, 95)
+        return {
+            "samples": len(recent),
+            "error_rate": round(errors / len(recent), 3) if recent else 0.0,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+    def is_healthy(self, model_id: str) -> bool:
+        if self.health_check is not None and not self.health_check(model_id):
+            return False
+        stats = self.stats(model_id)
+        return stats["samples"] < self.min_samples or stats["error_rate"] < self.max_error_rate
+
+    def is_cold(self, model_id: str) -> bool:
+        """Only an explicit False from warm_check counts; unknown models aren't penalised."""
+        return self.warm_check is not None and self.warm_check(model_id) is False
+
+    def candidates(self, family: Dict[str, str], requested: str = AUTO) -> List[str]:
+        """
+        Return the family's choice keys in the order they should be tried.
+        `family` maps choice key -> model id, in fallback order.
+        """
+        # sorted() is stable, so models keep their fallback order within each group
+        order = sorted(family, key=lambda c: self.is_cold(family[c]))
+        healthy = [c for c in order if self.is_healthy(family[c])]
+        unhealthy = [c for c in order if c not in healthy]
+
+        if requested in family and requested in healthy:
+            return [requested] + [c for c in healthy if c != requested] + unhealthy
+
+        if requested == AUTO:
+            def speed(choice: str) -> Tuple[bool, float]:
+                p50 = self.stats(family[choice])["p50_ms"]
+                return self.is_cold(family[choice]), p50 if p50 is not None else float("inf")
+
+            healthy = sorted(healthy, key=speed)
+        return healthy + unhealthy
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = list(self._obs)
+        return {m: {**self.stats(m), "healthy": self.is_healthy(m), "cold": self.is_cold(m)} for m in models}
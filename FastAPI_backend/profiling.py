@@ -0,0 +1,241 @@
+# FastAPI_backend/profiling.py
+
+from __future__ import annotations
+
+import os
+import math
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# Settings
+# ============================
+
+# Most frequent values reported per column
+PROFILE_TOP_K = int(os.getenv("PROFILE_TOP_K", "5"))
+# Rows read before profiling stops (0 = no cap)
+PROFILE_MAX_ROWS = int(os.getenv("PROFILE_MAX_ROWS", "200000"))
+# Fraction of rows profiled; below 1.0 each chunk is sampled
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+# Values kept per column for quantiles, and hashes kept for distinct counts
+PROFILE_QUANTILE_SAMPLE = int(os.getenv("PROFILE_QUANTILE_SAMPLE", "4096"))
+PROFILE_DISTINCT_SKETCH = int(os.getenv("PROFILE_DISTINCT_SKETCH", "1024"))
+
+QUANTILES = (0.25, 0.5, 0.75)
+_HASH_SPACE = float(2 ** 64)
+
+
+def _jsonable(value: Any) -> Any:
+    """Plain Python value for the JSON response (numpy scalars, NaN, timestamps)."""
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if isinstance(value, (int, str, bool)):
+        return value
+    return str(value)
+
+
+def _hashable(values: pd.Series) -> pd.Series:
+    """Lists/dicts (e.g. nested JSON) can't be hashed or counted; compare them as text."""
+    if values.dtype == object and values.map(lambda v: isinstance(v, (list, dict, set))).any():
+        return values.astype(str)
+    return values
+
+
+class ColumnProfile:
+    """
+    Summary statistics for one column, updated one chunk at a time in
+    bounded memory: counts and nulls, min/max, mean/variance (Welford,
+    merged per chunk), approximate distinct count (k-minimum-values),
+    approximate top-k (Misra-Gries) and approximate quantiles (uniform
+    sample of the values).
+    """
+
+    def __init__(
+        self,
+        top_k: int = PROFILE_TOP_K,
+        quantile_sample: int = PROFILE_QUANTILE_SAMPLE,
+        distinct_sketch: int = PROFILE_DISTINCT_SKETCH,
+        rng: Optional[np.random.Generator] = None,
+    ):
+        self.top_k = top_k
+        self.quantile_sample = quantile_sample
+        self.distinct_sketch = distinct_sketch
+        self._rng = rng or np.random.default_rng()
+        self.dtype: Optional[str] = None
+        self.numeric = True
+        self.count = 0
+        self.nulls = 0
+        # Welford state over numeric values
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min: Any = None
+        self._max: Any = None
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._counters: Dict[Any, int] = {}
+        self._sample_keys = np.empty(0)
+        self._sample_values = np.empty(0)
+
+    def update(self, series: pd.Series) -> None:
+        self.dtype = str(series.dtype)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.count += len(values)
+        if values.empty:
+            return
+
+        is_numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+        if is_numeric:
+            self._update_numeric(values.to_numpy(dtype=float))
+        else:
+            self.numeric = False
+
+        values = _hashable(values)
+        self._update_distinct(values)
+        if not pd.api.types.is_float_dtype(values):
+            self._update_top(values)
+
+    def _update_numeric(self, arr: np.ndarray) -> None:
+        # Combine this chunk's mean/M2 with the running ones (Chan et al.)
+        n_b = len(arr)
+        mean_b = float(arr.mean())
+        m2_b = float(((arr - mean_b) ** 2).sum())
+        n = self._n + n_b
+        delta = mean_b - self._mean
+        self._mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * self._n * n_b / n
+        self._n = n
+
+        lo, hi = float(arr.min()), float(arr.max())
+        self._min = lo if self._min is None else min(self._min, lo)
+        self._max = hi if self._max is None else max(self._max, hi)
+
+        # Bottom-k by random key keeps a uniform sample of everything seen
+        keys = np.concatenate([self._sample_keys, self._rng.random(n_b)])
+        vals = np.concatenate([self._sample_values, arr])
+        if len(keys) > self.quantile_sample:
+            keep = np.argpartition(keys, self.quantile_sample)[: self.quantile_sample]
+            keys, vals = keys[keep], vals[keep]
+        self._sample_keys, self._sample_values = keys, vals
+
+    def _update_distinct(self, values: pd.Series) -> None:
+        try:
+            hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        except TypeError:
+            hashes = pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+        merged = np.unique(np.concatenate([self._hashes, hashes]))
+        self._hashes = merged[: self.distinct_sketch]
+
+    def _update_top(self, values: pd.Series) -> None:
+        capacity = max(self.top_k * 10, 50)
+        for value, n in values.value_counts(sort=False).items():
+            self._counters[value] = self._counters.get(value, 0) + int(n)
+        if len(self._counters) > capacity:
+            # Misra-Gries: subtract the (capacity+1)-th count from everything
+            cut = sorted(self._counters.values(), reverse=True)[capacity]
+            self._counters = {v: c - cut for v, c in self._counters.items() if c > cut}
+
+    def distinct(self) -> int:
+        if len(self._hashes) < self.distinct_sketch:
+            return len(self._hashes)
+        kth = float(self._hashes[-1]) + 1.0
+        return int(round((self.distinct_sketch - 1) * _HASH_SPACE / kth))
+
+    def result(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "dtype": self.dtype,
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": self.distinct(),
+            "distinct_exact": len(self._hashes) < self.distinct_sketch,
+        }
+        if self._counters:
+            top = sorted(self._counters.items(), key=lambda kv: kv[1], reverse=True)[: self.top_k]
+            out["top"] = [{"value": _jsonable(v), "count": c} for v, c in top]
+        if self._n:
+            out["mean"] = _jsonable(self._mean)
+            out["std"] = _jsonable(math.sqrt(self._m2 / (self._n - 1))) if self._n > 1 else None
+            out["min"] = _jsonable(self._min)
+            out["max"] = _jsonable(self._max)
+            qs = np.quantile(self._sample_values, QUANTILES)
+            out["quantiles"] = {f"{int(q * 100)}%": _jsonable(v) for q, v in zip(QUANTILES, qs)}
+            out["numeric"] = self.numeric
+        return out
+
+
+class DatasetProfiler:
+    """
+    Feeds DataFrame chunks into per-column profiles. With `sample_rate`
+    below 1 only that fraction of each chunk is profiled. Rows past
+    `max_rows` are ignored and `truncated` is set, telling callers to stop
+    reading, so the cost of profiling doesn't grow with the file.
+    """
+
+    def __init__(
+        self,
+        top_k: int = PROFILE_TOP_K,
+        max_rows: int = PROFILE_MAX_ROWS,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        quantile_sample: int = PROFILE_QUANTILE_SAMPLE,
+        distinct_sketch: int = PROFILE_DISTINCT_SKETCH,
+        seed: Optional[int] = None,
+    ):
+        self.top_k = top_k
+        self.max_rows = max_rows
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.quantile_sample = quantile_sample
+        self.distinct_sketch = distinct_sketch
+        self._rng = np.random.default_rng(seed)
+        self.columns: Dict[str, ColumnProfile] = {}
+        self.rows_read = 0
+        self.rows_profiled = 0
+        self.truncated = False
+
+    @property
+    def done(self) -> bool:
+        return bool(self.max_rows) and self.rows_read >= self.max_rows
+
+    def update(self, df: pd.DataFrame) -> None:
+        if self.done:
+            self.truncated = True
+            return
+        if self.max_rows and self.rows_read + len(df) > self.max_rows:
+            df = df.iloc[: self.max_rows - self.rows_read]
+            self.truncated = True
+        self.rows_read += len(df)
+        if self.sample_rate < 1.0:
+            df = df[self._rng.random(len(df)) < self.sample_rate]
+        self.rows_profiled += len(df)
+
+        for name in df.columns:
+            key = str(name)
+            if key not in self.columns:
+                self.columns[key] = ColumnProfile(
+                    self.top_k, self.quantile_sample, self.distinct_sketch, self._rng
+                )
+            self.columns[key].update(df[name])
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "rows_read": self.rows_read,
+            "rows_profiled": self.rows_profiled,
+            "sample_rate": self.sample_rate,
+            "truncated": self.truncated,
+            "columns": {name: col.result() for name, col in self.columns.items()},
+        }
+
+
+def profile_frames(frames: Iterable[pd.DataFrame], **kwargs: Any) -> Dict[str, Any]:
+    """Profile an iterable of DataFrame chunks, stopping at the row cap."""
+    profiler = DatasetProfiler(**kwargs)
+    for df in frames:
+        profiler.update(df)
+        if profiler.truncated:
+            break
+    return profiler.result()
@@ -3,7 +3,16 @@ from __future__ import annotations
 import os
 from typing import List, Dict, Any, Optional, Tuple
 
-import requests
+try:
+    from src.http_client import get_http_client
+    from src.supabase_pool import SUPABASE_CLIENTS
+    from src.bulk_insert import bulk_insert, summarize_failures
+    from src.user_cache import USER_CACHE
+except ImportError:
+    from http_client import get_http_client
+    from supabase_pool import SUPABASE_CLIENTS
+    from bulk_insert import bulk_insert, summarize_failures
+    from user_cache import USER_CACHE
 
 # Try to use supabase client if available (preferred)
 try:
@@ -25,15 +34,21 @@ def _get_env(name: str) -> Optional[str]:
         return None
 
 
+def _supabase_credentials() -> Tuple[Optional[str], Optional[str]]:
+    url = _get_env("SUPABASE_URL")
+    key = _get_env("SUPABASE_ANON_KEY") or _get_env("SUPABASE_SERVICE_ROLE_KEY")
+    return url, key
+
+
 def _get_supabase_client() -> Optional["Client"]:
+    """Shared client from the process-wide registry, or None if unavailable."""
     if create_client is None:
         return None
-    url = _get_env("SUPABASE_URL")
-    key = _get_env("SUPABASE_ANON_KEY") or _get_env("SUPABASE_SERVICE_ROLE_KEY")
+    url, key = _supabase_credentials()
     if not url or not key:
         return None
     try:
-        return create_client(url, key)
+        return SUPABASE_CLIENTS.get(url, key)
     except Exception:
         return None
 
@@ -55,14 +70,15 @@ def _postgrest_insert(rows: List[Dict[str, Any]]) -> Tuple[bool, Any]:
         "Content-Type": "application/json",
         "Prefer": "return=representation",
     }
+    client = get_http_client()
     try:
-        r = requests.post(rest_url, headers=headers, json=rows, timeout=45)
+        r = client.post(rest_url, headers=headers, json=rows, timeout=45)
         if r.status_code >= 400:
             # If created_by is unknown column, try again without it
             txt = r.text.lower()
             if "created_by" in str(rows) and ("42703" in txt or "column" in txt and "created_by" in txt):
                 rows_wo = [{k: v for k, v in row.items() if k != "created_by"} for row in rows]
-                r2 = requests.post(rest_url, headers=headers, json=rows_wo, timeout=45)
+                r2 = client.post(rest_url, headers=headers, json=rows_wo, timeout=45)
                 if r2.status_code >= 400:
                     return False, r2.text
                 return True, r2.json()
@@ -80,26 +96,27 @@ def insert_cards(rows: List[Dict[str, Any]]) -> Tuple[bool, Any]:
     rows = [r for r in rows if r.get("question") and r.get("answer")]
     if not rows:
         return False, "No valid rows to insert."
+    try:
+        return _insert_cards(rows)
+    finally:
+        USER_CACHE.invalidate_rows(rows, namespaces=["flashcards"])
+
 
+def _insert_cards(rows: List[Dict[str, Any]]) -> Tuple[bool, Any]:
     sb = _get_supabase_client()
     if sb is not None:
-        try:
-            res = sb.table("cards").insert(rows).execute()
-            # supabase-py v2 returns data in res.data and error in res.error
-            if getattr(res, "error", None):
-                err_txt = str(res.error)
-                # Retry without created_by if column missing
-                if "created_by" in str(rows) and ("42703" in err_txt or "created_by" in err_txt and "column" in err_txt.lower()):
-                    rows_wo = [{k: v for k, v in row.items() if k != "created_by"} for row in rows]
-                    res2 = sb.table("cards").insert(rows_wo).execute()
-                    if getattr(res2, "error", None):
-                        return False, str(res2.error)
-                    return True, getattr(res2, "data", None)
-                return False, err_txt
-            return True, getattr(res, "data", None)
-        except Exception as e:
-            # fall through to PostgREST
-            pass
+        result = bulk_insert(
+            sb,
+            "cards",
+            rows,
+            optional_columns=("created_by",),
+            on_error=lambda e: SUPABASE_CLIENTS.report_error(*_supabase_credentials(), e),
+        )
+        if result["ok"]:
+            return True, [r["data"] for r in result["rows"]]
+        if result["inserted"]:
+            return False, summarize_failures(result)
+        # nothing went through the client; fall through to PostgREST
 
     return _postgrest_insert(rows)
 
@@ -0,0 +1,128 @@
+# FastAPI_backend/supabase_pool.py
+
+from __future__ import annotations
+
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from supabase import create_client  # type: ignore
+except Exception:
+    create_client = None
+
+try:
+    from src.http_client import get_http_client
+except ImportError:
+    from http_client import get_http_client
+
+# ============================
+# Settings
+# ============================
+
+# Seconds between health probes of a cached client; 0 disables probing
+SUPABASE_HEALTH_INTERVAL = float(os.getenv("SUPABASE_HEALTH_INTERVAL", "60"))
+SUPABASE_HEALTH_TIMEOUT = float(os.getenv("SUPABASE_HEALTH_TIMEOUT", "3"))
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """Transport-level failures (refused, reset, timed out) as opposed to API errors."""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    name = type(exc).__name__.lower()
+    return any(s in name for s in ("connect", "timeout", "protocol", "network", "transport"))
+
+
+def probe_supabase(url: str, key: str) -> bool:
+    """Cheap reachability check against the project's PostgREST root."""
+    try:
+        r = get_http_client().get(
+            url.rstrip("/") + "/rest/v1/",
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            timeout=SUPABASE_HEALTH_TIMEOUT,
+        )
+        return r.status_code < 500
+    except Exception:
+        return False
+
+
+class SupabaseRegistry:
+    """
+    Thread-safe, lazily populated cache of Supabase clients keyed by
+    (url, key). A cached client is re-probed at most every
+    `health_interval` seconds and rebuilt when the probe fails or a caller
+    reports a connection error through `report_error`.
+    """
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[str, str], Any]] = None,
+        health_check: Callable[[str, str], bool] = probe_supabase,
+        health_interval: float = SUPABASE_HEALTH_INTERVAL,
+    ):
+        self.factory = factory
+        self.health_check = health_check
+        self.health_interval = health_interval
+        self._clients: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reconnects": 0, "health_checks": 0, "health_failures": 0}
+
+    def _create(self, url: str, key: str) -> Any:
+        factory = self.factory or create_client
+        if factory is None:
+            raise RuntimeError("supabase is not installed")
+        return factory(url, key)
+
+    def get(self, url: str, key: str) -> Any:
+        if not url or not key:
+            raise RuntimeError("Missing Supabase URL or key")
+        cache_key = (url, key)
+        with self._lock:
+            entry = self._clients.get(cache_key)
+            if entry is None:
+                entry = {"client": self._create(url, key), "checked_at": time.monotonic()}
+                self._clients[cache_key] = entry
+                self._stats["created"] += 1
+                return entry["client"]
+            due = self.health_interval > 0 and time.monotonic() - entry["checked_at"] >= self.health_interval
+            if due:
+                # Claim the check so concurrent callers keep using the current client
+                entry["checked_at"] = time.monotonic()
+
+        if due:
+            self._stats["health_checks"] += 1
+            if not self.health_check(url, key):
+                self._stats["health_failures"] += 1
+                return self.reconnect(url, key)
+        return entry["client"]
+
+    def reconnect(self, url: str, key: str) -> Any:
+        """Drop the cached client for (url, key) and build a fresh one."""
+        client = self._create(url, key)
+        with self._lock:
+            self._clients[(url, key)] = {"client": client, "checked_at": time.monotonic()}
+            self._stats["reconnects"] += 1
+        return client
+
+    def report_error(self, url: str, key: str, exc: BaseException) -> None:
+        """Forget the client after a connection error so the next get() reconnects."""
+        if is_connection_error(exc):
+            with self._lock:
+                self._clients.pop((url, key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "clients": len(self._clients)}
+
+
+SUPABASE_CLIENTS = SupabaseRegistry()
+
+
+def get_supabase_client(url: str, key: str) -> Any:
+    """Shared client for (url, key); created on first use."""
+    return SUPABASE_CLIENTS.get(url, key)
@@ -4,11 +4,19 @@ from components.login_form import render_login_form, render_register_form
 from components.dashboard import render_dashboard
 from components.paraphrase_qg import render_paraphrase_qg   # ✅ already added earlier
 from components.paraphraser import render_paraphraser       # ✅ new import
+from src.ai_processor import start_warmup
+
+
+@st.cache_resource
+def _start_model_warmup() -> bool:
+    # Runs once per server process; the scheduler keeps models warm in a daemon thread
+    return start_warmup()
 
 
 # -------------------- APP ENTRY --------------------
 def main():
     st.set_page_config(page_title="Qubit Learn", layout="wide")
+    _start_model_warmup()
 
     # Initialize session state
     if "authenticated" not in st.session_state:
@@ -0,0 +1,100 @@
+# backend/async_supa_db.py
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from src.http_client import get_async_http_client, aclose_http_clients
+
+
+class AsyncSupaDB:
+    """
+    Async version of SupaDB (same methods) using PostgREST over the
+    process-wide pooled httpx.AsyncClient (src/http_client.py), so a single
+    worker can hold many DB calls at once. Pool size and timeouts come
+    from the shared HTTP_* settings.
+    """
+
+    def __init__(self, url: str, key: str):
+        self.url = url.rstrip("/")
+        self.key = key
+        self._headers = {
+            "apikey": self.key,
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
+        }
+
+    async def aclose(self) -> None:
+        """Close the shared clients; call once on application shutdown."""
+        await aclose_http_clients()
+
+    async def _request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> httpx.Response:
+        res = await get_async_http_client().request(
+            method, self.url + "/rest/v1" + path, headers={**self._headers, **(headers or {})}, **kwargs
+        )
+        if res.status_code >= 400:
+            raise RuntimeError(f"❌ Supabase {method} {path} error: {res.text}")
+        return res
+
+    # ----- Donations -----
+    async def add_donation(
+        self,
+        donation_id: str,
+        email: str,
+        amount: float,
+        currency: str,
+        method: str,
+        status: str,
+        api_ref: str,
+    ) -> Dict[str, Any]:
+        payload = {
+            "id": donation_id,
+            "email": email,
+            "amount": amount,
+            "currency": currency,
+            "method": method,
+            "status": status,
+            "api_ref": api_ref,
+        }
+        res = await self._request(
+            "POST", "/donations", json=payload, headers={"Prefer": "return=representation"}
+        )
+        return {"data": res.json()}
+
+    async def update_donation_status(
+        self, donation_id: str, status: str, currency: Optional[str] = None
+    ) -> None:
+        update = {"status": status}
+        if currency:
+            update["currency"] = currency
+        await self._request("PATCH", "/donations", params={"id": f"eq.{donation_id}"}, json=update)
+
+    async def get_donation_by_id(self, donation_id: str) -> Optional[Dict[str, Any]]:
+        res = await self._request(
+            "GET", "/donations", params={"select": "*", "id": f"eq.{donation_id}", "limit": 1}
+        )
+        rows = res.json()
+        return rows[0] if rows else None
+
+    async def get_donations(self, email: str) -> List[Dict[str, Any]]:
+        res = await self._request(
+            "GET",
+            "/donations",
+            params={"select": "*", "email": f"eq.{email}", "order": "created_at.desc"},
+        )
+        return res.json() or []
+
+    # ----- Users -----
+    async def save_user(self, user_id, email, username, full_name):
+        try:
+            # Check if user already exists
+            res = await self._request("GET", "/users", params={"select": "id", "id": f"eq.{user_id}"})
+            if not res.json():
+                await self._request("POST", "/users", json={
+                    "id": user_id,
+                    "email": email,
+                    "username": username,
+                    "full_name": full_name
+                })
+        except Exception as e:
+            print(f"Error saving user: {e}")
+            raise e
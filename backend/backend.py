@@ -5,8 +5,10 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import Optional
 from dotenv import load_dotenv
 from intasend import APIService
+import asyncio
 import os
 import re
+from contextlib import asynccontextmanager
 
 # --- Load env for backend only ---
 load_dotenv()
@@ -32,12 +34,19 @@ service = APIService(
     test=TEST_MODE,
 )
 
-# --- DB layer using Supabase ---
-from .supa_db import SupaDB
-db = SupaDB(SUPABASE_URL, SUPABASE_KEY)
+# --- DB layer using Supabase (async, pooled) ---
+from .async_supa_db import AsyncSupaDB
+db = AsyncSupaDB(SUPABASE_URL, SUPABASE_KEY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await db.aclose()
+
 
 # --- FastAPI app ---
-app = FastAPI(title="Donate API (IntaSend x Supabase)")
+app = FastAPI(title="Donate API (IntaSend x Supabase)", lifespan=lifespan)
 
 # Allow Streamlit frontend
 app.add_middleware(
@@ -77,13 +86,15 @@ def health():
     return {"ok": True, "intasend_test_mode": TEST_MODE}
 
 @app.post("/donate/mpesa-stk")
-def donate_mpesa_stk(body: STKDonationRequest):
+async def donate_mpesa_stk(body: STKDonationRequest):
     try:
         # Short api_ref using email prefix only
         email_prefix = body.email.split("@")[0]
         api_ref = sanitize_api_ref(f"don-{email_prefix}-{int(body.amount*100)}")
 
-        resp = service.collect.mpesa_stk_push(
+        # The IntaSend SDK is blocking; keep it off the event loop
+        resp = await asyncio.to_thread(
+            service.collect.mpesa_stk_push,
             amount=body.amount,
             phone_number=body.phone.strip(),
             api_ref=api_ref,
@@ -105,7 +116,7 @@ def donate_mpesa_stk(body: STKDonationRequest):
         if not donation_id:
             raise HTTPException(status_code=400, detail=f"IntaSend STK response missing donation ID fields: {data}")
 
-        db.add_donation(
+        await db.add_donation(
             donation_id=donation_id,
             email=body.email,
             amount=body.amount,
@@ -119,12 +130,13 @@ def donate_mpesa_stk(body: STKDonationRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/donate/checkout")
-def donate_checkout(body: CheckoutDonationRequest):
+async def donate_checkout(body: CheckoutDonationRequest):
     try:
         email_prefix = body.email.split("@")[0]
         api_ref = sanitize_api_ref(f"don-{email_prefix}-{body.currency.lower()}-{int(body.amount*100)}")
 
-        resp = service.collect.checkout(
+        resp = await asyncio.to_thread(
+            service.collect.checkout,
             amount=body.amount,
             currency=body.currency,
             email=body.email,
@@ -145,7 +157,7 @@ def donate_checkout(body: CheckoutDonationRequest):
         if not (donation_id and checkout_url):
             raise HTTPException(status_code=400, detail=f"IntaSend checkout response missing fields: {data}")
 
-        db.add_donation(
+        await db.add_donation(
             donation_id=donation_id,
             email=body.email,
             amount=body.amount,
@@ -159,15 +171,15 @@ def donate_checkout(body: CheckoutDonationRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/donations/{donation_id}")
-def donation_status(donation_id: str):
-    row = db.get_donation_by_id(donation_id)
+async def donation_status(donation_id: str):
+    row = await db.get_donation_by_id(donation_id)
     if not row:
         raise HTTPException(status_code=404, detail="Donation not found")
     return {"ok": True, "donation": row}
 
 @app.get("/donations")
-def donations_by_email(email: EmailStr):
-    rows = db.get_donations(email)
+async def donations_by_email(email: EmailStr):
+    rows = await db.get_donations(email)
     return {"ok": True, "donations": rows}
 
 @app.post("/webhook/intasend")
@@ -179,7 +191,7 @@ async def intasend_webhook(request: Request):
     email = payload.get("email") or payload.get("customer_email")
 
     if donation_id and status:
-        db.update_donation_status(donation_id, status, currency=currency)
+        await db.update_donation_status(donation_id, status, currency=currency)
         print(f"🔔 Webhook: {donation_id} | {email} | {currency} | {status}")
 
     return {"ok": True}
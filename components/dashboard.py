@@ -1,6 +1,6 @@
 # components/dashboard.py
 import streamlit as st
-from src.database import get_user_flashcards, get_user_data, save_flashcards, update_user_profile
+from src.database import get_user_flashcards_page, get_user_data, save_flashcards, update_user_profile
 from src.ai_processor import generate_questions, paraphrase_text
 from components.upload_section import render_upload_section
 from components.donate import render_donate_section
@@ -10,18 +10,77 @@ def generate_flashcards(passage: str):
     questions = generate_questions(passage)
     return [{"question": q, "answer": "Answer TBD"} for q in questions]
 
+FLASHCARD_PAGE_SIZE = 20
+
+
+def _fetch_flashcard_page(user_id, cursor=None):
+    return get_user_flashcards_page(
+        user_id,
+        page_size=FLASHCARD_PAGE_SIZE,
+        cursor=cursor,
+        columns=["id", "question", "answer"],
+        with_count=cursor is None,
+    )
+
+
+def _apply_flashcard_page(state: dict, page: dict):
+    """Append a page of cards to the per-session flashcard state."""
+    if "error" in page:
+        state["error"] = page["error"]
+        return
+    state["cards"].extend(page["items"])
+    state["cursor"] = page["next_cursor"]
+    state["done"] = page["next_cursor"] is None
+    if page.get("total") is not None:
+        state["total"] = page["total"]
+
+
+def _reset_flashcard_pages(user_id):
+    st.session_state.flashcard_pages = {
+        "user_id": user_id, "cards": [], "cursor": None, "done": False, "total": None, "error": None,
+    }
+
+
+def _is_stale(state: dict, first_page: dict) -> bool:
+    """True when cards were added or removed since the pages in `state` were loaded."""
+    fresh = [card["id"] for card in first_page["items"]]
+    loaded = [card["id"] for card in state["cards"][:len(fresh)]]
+    return fresh != loaded or first_page.get("total") != state["total"]
+
+
 def display_flashcards(user_id):
     st.subheader("🧠 Your Flashcards")
-    flashcards = get_user_flashcards(user_id)
-
-    if isinstance(flashcards, dict) and "error" in flashcards:
-        st.error(f"Error loading flashcards: {flashcards['error']}")
+    state = st.session_state.get("flashcard_pages")
+    if not state or state["user_id"] != user_id:
+        _reset_flashcard_pages(user_id)
+        state = st.session_state.flashcard_pages
+
+    # Re-read the first page on every run (served from the per-user cache
+    # between writes) so decks saved elsewhere, e.g. by the job queue or
+    # the bulk CLI, show up without a new session
+    first_page = _fetch_flashcard_page(user_id)
+    if "error" in first_page:
+        state["error"] = first_page["error"]
+    elif _is_stale(state, first_page):
+        _reset_flashcard_pages(user_id)
+        state = st.session_state.flashcard_pages
+        _apply_flashcard_page(state, first_page)
+
+    if state["error"]:
+        st.error(f"Error loading flashcards: {state['error']}")
+        state["error"] = None
         return
 
+    flashcards = state["cards"]
     if flashcards:
         for card in flashcards:
             with st.expander(card["question"]):
                 st.write(card["answer"])
+        if state["total"] is not None:
+            st.caption(f"Showing {len(flashcards)} of {state['total']} flashcards")
+        if not state["done"] and st.button("Load more flashcards"):
+            _apply_flashcard_page(state, _fetch_flashcard_page(user_id, state["cursor"]))
+            st.rerun()
     else:
         st.info("No flashcards available.")
 
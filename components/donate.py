@@ -1,8 +1,8 @@
 # components/donate_section.py
 import streamlit as st
-import requests
 import os
 from dotenv import load_dotenv
+from src.http_client import get_http_client
 
 # ✅ Load env vars from .env (for local dev)
 load_dotenv()
@@ -12,6 +12,7 @@ BACKEND_URL = os.getenv("BACKEND_URL", "https://qubit-learn.onrender.com")
 
 
 def render_donate_section(user_email: str):
+    http = get_http_client()
     st.subheader("💝 Support Our Mission")
     st.info("Your donation helps us advance **UNSDG4: Quality Education** 🌍📚")
 
@@ -37,9 +38,9 @@ def render_donate_section(user_email: str):
                     "note": note,
                 }
                 try:
-                    resp = requests.post(f"{BACKEND_URL}/donate/mpesa-stk", json=payload, timeout=30)
+                    resp = http.post(f"{BACKEND_URL}/donate/mpesa-stk", json=payload, timeout=30)
                     data = resp.json()
-                    if resp.ok and data.get("ok"):
+                    if resp.is_success and data.get("ok"):
                         st.success(data.get("message", "📲 STK Push sent! Confirm on your phone."))
                     else:
                         st.error(f"❌ Error: {data.get('detail', data)}")
@@ -60,9 +61,9 @@ def render_donate_section(user_email: str):
                 "currency": currency,
             }
             try:
-                resp = requests.post(f"{BACKEND_URL}/donate/checkout", json=payload, timeout=30)
+                resp = http.post(f"{BACKEND_URL}/donate/checkout", json=payload, timeout=30)
                 data = resp.json()
-                if resp.ok and data.get("ok"):
+                if resp.is_success and data.get("ok"):
                     checkout_url = data.get("checkout_url")
                     st.success("✅ Redirecting to checkout page...")
                     st.markdown(f"[👉 Complete your donation here]({checkout_url})", unsafe_allow_html=True)
@@ -76,9 +77,9 @@ def render_donate_section(user_email: str):
     st.subheader("📊 Your Donation History")
 
     try:
-        resp = requests.get(f"{BACKEND_URL}/donations", params={"email": user_email}, timeout=20)
+        resp = http.get(f"{BACKEND_URL}/donations", params={"email": user_email}, timeout=20)
         data = resp.json()
-        if resp.ok and data.get("ok"):
+        if resp.is_success and data.get("ok"):
             donations = data.get("donations", [])
             if donations:
                 st.dataframe(
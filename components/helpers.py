@@ -1,7 +1,7 @@
 # components/helpers.py
-import PyPDF2
-import docx
-from src.ai_processor import paraphrase_text, generate_questions
+from src.ai_processor import paraphrase_text, generate_questions, run_jobs
+from src.extract_cache import cached_extract
+from src.extractors import extract_document_text
 
 
 # =============== Paraphraser =================
@@ -15,30 +15,25 @@ def generate_questions_from_api(text: str, max_questions: int = 5, max_new_token
     return generate_questions(text, max_questions=max_questions, max_new_tokens=max_new_tokens)
 
 
-# =============== File Handlers =================
-def extract_text_from_pdf(uploaded_file) -> str:
-    reader = PyPDF2.PdfReader(uploaded_file)
-    return "".join([page.extract_text() or "" for page in reader.pages]).strip()
-
-
-def extract_text_from_docx(uploaded_file) -> str:
-    doc = docx.Document(uploaded_file)
-    return "\n".join([p.text for p in doc.paragraphs if p.text]).strip()
-
-
-def extract_text_from_txt(uploaded_file) -> str:
-    return uploaded_file.read().decode("utf-8").strip()
+def paraphrase_and_generate_questions(text: str, num_return_sequences: int = 3, max_questions: int = 5):
+    """
+    Run paraphrasing and question generation concurrently.
+    Returns (paraphrases, questions, errors) where errors maps job name to message.
+    """
+    results = run_jobs({
+        "paraphrase": {"kind": "paraphrase", "params": {"text": text, "num_return_sequences": num_return_sequences}},
+        "questions": {"kind": "document_questions", "params": {"text": text, "max_questions": max_questions}},
+    })
+    errors = {name: r["data"] for name, r in results.items() if not r["ok"]}
+    paraphrases = results["paraphrase"]["data"] if results["paraphrase"]["ok"] else []
+    questions = results["questions"]["data"] if results["questions"]["ok"] else []
+    return paraphrases, questions, errors
 
 
+# =============== File Handlers =================
 def handle_file_upload(uploaded_file) -> str:
-    """Handle text extraction from txt, pdf, and docx files."""
-    if uploaded_file.type == "text/plain":
-        return extract_text_from_txt(uploaded_file)
-    elif uploaded_file.type == "application/pdf":
-        return extract_text_from_pdf(uploaded_file)
-    elif uploaded_file.type in [
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword",
-    ]:
-        return extract_text_from_docx(uploaded_file)
-    return ""
+    """
+    Extract text from a TXT, PDF, DOCX, Markdown or HTML upload (cached by
+    file content). Raises UnsupportedFormat (a ValueError) for anything else.
+    """
+    return cached_extract(uploaded_file, extract_document_text, namespace="document")
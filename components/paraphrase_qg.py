@@ -20,15 +20,14 @@ def render_paraphrase_qg():
     try:
         from components.helpers import (
             handle_file_upload,
-            paraphrase_text_from_api,
-            generate_questions_from_api,
+            paraphrase_and_generate_questions,
         )
     except Exception as e:
         st.error(
             "Paraphrase/QG helpers are not available or failed to import.\n\n"
             f"Details: {e}\n\n"
             "Make sure components/helpers.py exports "
-            "`handle_file_upload`, `paraphrase_text_from_api`, and `generate_questions_from_api`."
+            "`handle_file_upload` and `paraphrase_and_generate_questions`."
         )
         return
 
@@ -39,13 +38,17 @@ def render_paraphrase_qg():
     except Exception:
         db_available = False
 
-    uploaded_file = st.file_uploader("Upload a document", type=["txt", "pdf", "docx"])
+    uploaded_file = st.file_uploader("Upload a document", type=["txt", "pdf", "docx", "md", "markdown", "html", "htm"])
     if not uploaded_file:
         st.info("Please upload a file to begin.")
         return
 
     # Extract text from file
-    text = handle_file_upload(uploaded_file)
+    try:
+        text = handle_file_upload(uploaded_file)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
     if not text:
         st.error("Could not extract text from this file. Try a different file or format.")
         return
@@ -60,17 +63,14 @@ def render_paraphrase_qg():
     # Generate
     if st.button("Paraphrase & Generate Questions", type="primary"):
         with st.spinner("Talking to Hugging Face…"):
-            try:
-                paraphrases = paraphrase_text_from_api(text, num_return_sequences=num_paraphrases)
-            except Exception as e:
-                st.error(f"Paraphrase error: {e}")
-                paraphrases = []
-
-            try:
-                questions = generate_questions_from_api(text, max_questions=max_questions)
-            except Exception as e:
-                st.error(f"Question generation error: {e}")
-                questions = []
+            paraphrases, questions, errors = paraphrase_and_generate_questions(
+                text, num_return_sequences=num_paraphrases, max_questions=max_questions
+            )
+
+        if "paraphrase" in errors:
+            st.error(f"Paraphrase error: {errors['paraphrase']}")
+        if "questions" in errors:
+            st.error(f"Question generation error: {errors['questions']}")
 
         if not paraphrases and not questions:
             st.warning("No output generated.")
@@ -1,7 +1,39 @@
 # components/paraphraser.py
 
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
-from src.ai_processor import paraphrase_text
+from src.ai_processor import stream_paraphrase
+
+
+def _stream_variants(text: str, count: int, max_tokens: int, model_choice: str):
+    """
+    Stream `count` paraphrases side by side. Each variant is generated on
+    its own worker thread; this (script) thread renders tokens as they land.
+    """
+    placeholders = [st.empty() for _ in range(count)]
+    texts = [""] * count
+    tokens: queue.Queue = queue.Queue()
+
+    def pump(index: int):
+        try:
+            for token in stream_paraphrase(text, max_new_tokens=max_tokens, model_choice=model_choice):
+                tokens.put((index, token))
+        finally:
+            tokens.put((index, None))
+
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="paraphrase-stream") as pool:
+        for index in range(count):
+            pool.submit(pump, index)
+        remaining = count
+        while remaining:
+            index, token = tokens.get()
+            if token is None:
+                remaining -= 1
+                continue
+            texts[index] += token
+            placeholders[index].markdown(f"**{index + 1}.** {texts[index]}")
 
 
 def render_paraphraser():
@@ -26,12 +58,13 @@ def render_paraphraser():
 
     model_choice = st.sidebar.selectbox(
         "Choose paraphrasing model",
-        options=["pegasus", "t5", "flan"],
+        options=["pegasus", "t5", "flan", "auto"],
         index=0,
         help=(
             "pegasus = high quality\n"
             "t5 = efficient, newer model\n"
-            "flan = general-purpose fallback"
+            "flan = general-purpose fallback\n"
+            "auto = fastest healthy model right now"
         ),
     )
 
@@ -40,16 +73,6 @@ def render_paraphraser():
             st.warning("Please enter some text.")
             return
 
-        with st.spinner(
-            f"Generating {num_variants} paraphrase(s) using {model_choice} model..."
-        ):
-            results = paraphrase_text(
-                text,
-                num_return_sequences=num_variants,
-                max_new_tokens=max_tokens,
-                model_choice=model_choice,
-            )
-
         st.subheader("Paraphrases")
-        for idx, r in enumerate(results, start=1):
-            st.markdown(f"**{idx}.** {r}")
+        st.caption(f"Streaming {num_variants} paraphrase(s) from the {model_choice} model...")
+        _stream_variants(text, num_variants, max_tokens, model_choice)
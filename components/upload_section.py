@@ -1,31 +1,22 @@
 # components/upload_section.py
 import streamlit as st
-import docx
-import PyPDF2
-from src.ai_processor import paraphrase_text
+from src.ai_processor import paraphrase_text, generate_questions_from_document
+from src.extract_cache import cached_extract, cached_chunks
+from src.extractors import extract_document_text, supported_extensions
 
 def read_file(file):
-    """Read uploaded file content based on file type."""
-    content = ""
-    if file.type == "text/plain":
-        content = file.read().decode("utf-8")
-    elif file.type == "application/pdf":
-        reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            content += page.extract_text() or ""
-    elif file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        doc = docx.Document(file)
-        for para in doc.paragraphs:
-            content += para.text + "\n"
-    else:
-        st.error("❌ Unsupported file format. Please upload TXT, PDF, or DOCX.")
-    return content
+    """Read uploaded file content, detecting its format from the bytes (cached by file content)."""
+    try:
+        return cached_extract(file, extract_document_text, namespace="document")
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return ""
 
 def render_upload_section():
     """Render upload section with paraphrasing option."""
     st.subheader("📄 Upload a File")
 
-    uploaded_file = st.file_uploader("Upload TXT, PDF, or DOCX", type=["txt", "pdf", "docx"])
+    uploaded_file = st.file_uploader("Upload TXT, PDF, DOCX, Markdown or HTML", type=list(supported_extensions()))
 
     if uploaded_file:
         file_text = read_file(uploaded_file)
@@ -35,8 +26,16 @@ def render_upload_section():
 
             if st.button("Paraphrase Uploaded Text"):
                 with st.spinner("Paraphrasing..."):
-                    results = paraphrase_text(file_text[:2000])  # Limit length
+                    first_chunk = (cached_chunks(file_text) or [""])[0]  # Paraphrase the opening passage
+                    results = paraphrase_text(first_chunk)
                     for r in results:
                         st.write(f"- {r}")
+
+            max_questions = st.slider("Questions to generate", 1, 30, 10, key="upload_max_questions")
+            if st.button("Generate Questions from Document"):
+                with st.spinner("Generating questions across the whole document..."):
+                    questions = generate_questions_from_document(file_text, max_questions=max_questions)
+                    for q in questions:
+                        st.write(f"- {q}")
         else:
             st.warning("No text could be extracted from the file.")
@@ -11,11 +11,13 @@ try:
     SUPABASE_URL = st.secrets.get("SUPABASE_URL", os.getenv("SUPABASE_URL"))
     SUPABASE_KEY = st.secrets.get("SUPABASE_KEY", os.getenv("SUPABASE_KEY"))
     HUGGING_FACE_API_KEY = st.secrets.get("HUGGING_FACE_API_KEY", os.getenv("HUGGING_FACE_API_KEY"))
+    AI_BACKEND = st.secrets.get("AI_BACKEND", os.getenv("AI_BACKEND", "remote"))
 except Exception:
     # Fallback if not running inside Streamlit
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     HUGGING_FACE_API_KEY = os.getenv("HUGGING_FACE_API_KEY")
+    AI_BACKEND = os.getenv("AI_BACKEND", "remote")
 
 # Application metadata
 APP_TITLE = "QuBit_Learn"
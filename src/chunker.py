@@ -0,0 +1,107 @@
+# src/chunker.py
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Callable, Iterable, Iterator, List, Union
+
+# ============================
+# Settings
+# ============================
+
+CHUNK_TOKENS = int(os.getenv("AI_CHUNK_TOKENS", "350"))
+CHUNK_OVERLAP = int(os.getenv("AI_CHUNK_OVERLAP", "40"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (whitespace words); good enough for budgeting prompts."""
+    return len(text.split())
+
+
+def _as_pieces(text: Union[str, Iterable[str]]) -> Iterable[str]:
+    if isinstance(text, str):
+        return (text,)
+    return text
+
+
+def iter_sentences(text: Union[str, Iterable[str]], max_tokens: int = CHUNK_TOKENS) -> Iterator[str]:
+    """
+    Yield sentences from a string or a stream of text pieces (e.g. pages).
+    Only the current unfinished sentence is buffered; a run of text with
+    no sentence boundary is flushed once it exceeds `max_tokens` words.
+    """
+    buffer = ""
+    for piece in _as_pieces(text):
+        if not piece:
+            continue
+        buffer = f"{buffer} {piece}" if buffer else piece
+        parts = _SENTENCE_END.split(buffer)
+        for sent in parts[:-1]:
+            sent = " ".join(sent.split())
+            if sent:
+                yield sent
+        buffer = parts[-1]
+
+        words = buffer.split()
+        while len(words) > max_tokens:
+            yield " ".join(words[:max_tokens])
+            words = words[max_tokens:]
+        if len(words) != len(buffer.split()):
+            buffer = " ".join(words)
+
+    tail = " ".join(buffer.split())
+    if tail:
+        yield tail
+
+
+def _split_long(sentence: str, max_tokens: int) -> List[str]:
+    words = sentence.split()
+    return [" ".join(words[i:i + max_tokens]) for i in range(0, len(words), max_tokens)]
+
+
+def iter_chunks(
+    text: Union[str, Iterable[str]],
+    max_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP,
+    token_counter: Callable[[str], int] = count_tokens,
+) -> Iterator[str]:
+    """
+    Split text into sentence-aligned windows of at most `max_tokens`,
+    repeating up to `overlap_tokens` worth of trailing sentences at the
+    start of the next window. Works lazily over a stream of pieces.
+    """
+    max_tokens = max(1, int(max_tokens))
+    overlap_tokens = max(0, min(int(overlap_tokens), max_tokens - 1))
+
+    window: List[str] = []
+    size = 0
+
+    for sentence in iter_sentences(text, max_tokens=max_tokens):
+        n = token_counter(sentence)
+        pieces = [sentence] if n <= max_tokens else _split_long(sentence, max_tokens)
+
+        for piece in pieces:
+            n = token_counter(piece)
+            if window and size + n > max_tokens:
+                yield " ".join(window)
+
+                carry: List[str] = []
+                carried = 0
+                for prev in reversed(window):
+                    k = token_counter(prev)
+                    if carried + k > overlap_tokens:
+                        break
+                    carry.insert(0, prev)
+                    carried += k
+                if carried + n > max_tokens:
+                    carry, carried = [], 0
+                window, size = carry, carried
+
+            window.append(piece)
+            size += n
+
+    if window:
+        yield " ".join(window)
@@ -1,48 +1,92 @@
-from supabase import create_client
 from config.settings import SUPABASE_URL, SUPABASE_KEY
+from src.supabase_pool import SUPABASE_CLIENTS
+from src.bulk_insert import bulk_insert, BULK_INSERT_BATCH_SIZE
+from src.pagination import fetch_page, MAX_PAGE_SIZE
+from src.user_cache import USER_CACHE, cached_per_user
 
 
 # Initialize Supabase client
 def init_supabase():
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    """Return the process-wide Supabase client (created lazily, health-checked)."""
+    return SUPABASE_CLIENTS.get(SUPABASE_URL, SUPABASE_KEY)
 
 
-def get_user_flashcards(user_id: str):
-    """Fetch the user's flashcards from the database."""
+def _report_error(e: Exception):
+    """Let the registry reconnect on the next call if the connection dropped."""
+    SUPABASE_CLIENTS.report_error(SUPABASE_URL, SUPABASE_KEY, e)
+
+
+@cached_per_user("flashcards")
+def get_user_flashcards_page(
+    user_id: str,
+    page_size: int = None,
+    cursor: str = None,
+    columns: list = None,
+    with_count: bool = False,
+):
+    """
+    Fetch one page of the user's flashcards, newest first.
+    Returns {"items", "next_cursor", "page_size", ["total"]} (see fetch_page).
+    """
     try:
         supabase_client = init_supabase()
-        response = (
-            supabase_client.table("cards")
-            .select("*")
-            .eq("created_by", user_id)
-            .execute()
+        return fetch_page(
+            supabase_client,
+            "cards",
+            filters={"created_by": user_id},
+            columns=columns,
+            page_size=page_size,
+            cursor=cursor,
+            with_count=with_count,
         )
-        return response.data or []
     except Exception as e:
+        _report_error(e)
         return {"error": str(e)}
 
 
-def save_flashcards(cards: list, user_id: str, source: str = "original"):
-    """Save flashcards to the database, with source (original/paraphrased)."""
-    supabase_client = init_supabase()
-    results = []
+def get_user_flashcards(user_id: str, columns: list = None):
+    """Fetch all of the user's flashcards (id, question, answer by default), page by page."""
+    cards, cursor = [], None
+    while True:
+        page = get_user_flashcards_page(user_id, page_size=MAX_PAGE_SIZE, cursor=cursor, columns=columns)
+        if "error" in page:
+            return page
+        cards.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return cards
 
-    for card in cards:
-        try:
-            card_data = {
-                "question": card.get("question"),
-                "answer": card.get("answer"),
-                "created_by": user_id,
-                "source": source,
-            }
-            response = supabase_client.table("cards").insert(card_data).execute()
-            results.append(response.data)
-        except Exception as e:
-            results.append({"error": str(e)})
 
-    return results
+def save_flashcards(cards: list, user_id: str, source: str = "original", batch_size: int = BULK_INSERT_BATCH_SIZE):
+    """
+    Save flashcards to the database, with source (original/paraphrased),
+    using chunked multi-row inserts. Returns one result per card, in order:
+    the inserted row, or {"error": ...} for cards that failed.
+    """
+    rows = [
+        {
+            "question": card.get("question"),
+            "answer": card.get("answer"),
+            "created_by": user_id,
+            "source": source,
+        }
+        for card in cards
+    ]
+    if not rows:
+        return []
+
+    try:
+        supabase_client = init_supabase()
+    except Exception as e:
+        return [{"error": str(e)} for _ in rows]
+
+    result = bulk_insert(supabase_client, "cards", rows, batch_size=batch_size, on_error=_report_error)
+    if result["inserted"]:
+        USER_CACHE.invalidate(user_id, ["flashcards"])
+    return [r["data"] if r["ok"] else {"error": r["error"]} for r in result["rows"]]
 
 
+@cached_per_user("profile")
 def get_user_data(user_id: str):
     """Fetch a user's profile data from the database."""
     try:
@@ -56,6 +100,7 @@ def get_user_data(user_id: str):
         )
         return response.data
     except Exception as e:
+        _report_error(e)
         return {"error": str(e)}
 
 
@@ -69,6 +114,10 @@ def update_user_profile(user_id: str, profile_data: dict):
             .eq("id", user_id)
             .execute()
         )
+        USER_CACHE.invalidate(user_id, ["profile"])
         return response.data
     except Exception as e:
+        # The write may still have landed; don't keep serving the old profile
+        USER_CACHE.invalidate(user_id, ["profile"])
+        _report_error(e)
         return {"error": str(e)}
@@ -0,0 +1,249 @@
+# src/deck_cli.py
+"""
+Generate flashcard decks for every document in a directory.
+
+    python -m src.deck_cli course_notes/ --out decks.jsonl --concurrency 8
+    python -m src.deck_cli course_notes/ --save --user-id <uuid>
+"""
+
+from __future__ import annotations
+
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.ai_processor import generate_cards_from_chunk
+from src.chunker import iter_chunks, count_tokens, CHUNK_TOKENS, CHUNK_OVERLAP
+from src.extractors import iter_document_text, supported_extensions
+from src.flashcard_generator import create_flashcards, dedupe_cards
+
+DEFAULT_CONCURRENCY = int(os.getenv("DECK_CLI_CONCURRENCY", "4"))
+
+
+def find_documents(root: str, recursive: bool = True) -> List[str]:
+    """Document files under `root` with an extension the extractors support, sorted."""
+    exts = {"." + ext for ext in supported_extensions()}
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if not recursive:
+            dirnames[:] = []
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in exts:
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def _merge_cards(chunk_cards: List[List[Dict[str, str]]], max_cards: Optional[int]) -> List[Dict[str, Any]]:
+    merged = dedupe_cards(chunk_cards, max_cards)
+    return create_flashcards(merged) if merged else []
+
+
+# ============================
+# Generation
+# ============================
+
+def build_decks(
+    paths: Sequence[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    questions_per_chunk: int = 3,
+    num_paraphrases: int = 3,
+    max_cards: Optional[int] = None,
+    chunk_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one deck per document, in input order: {"path", "cards",
+    "chunks", "tokens", "errors"}. Chunks from all documents share one
+    pool of `concurrency` workers, with a bounded number queued, so a
+    single long document still runs at full parallelism. Each chunk runs
+    its paraphrase and question jobs on a private pool sized for
+    `concurrency` chunks, so they never queue behind the shared job pool.
+    """
+    stats = stats if stats is not None else {}
+    for key in ("docs", "chunks", "tokens", "cards", "failed_docs", "failed_chunks"):
+        stats.setdefault(key, 0)
+
+    concurrency = max(1, concurrency)
+    slots = threading.Semaphore(concurrency * 2)
+    pending: Deque[Tuple[str, List[Future], int, Optional[str]]] = deque()
+
+    def run_chunk(chunk: str) -> List[Dict[str, str]]:
+        try:
+            return generate_cards_from_chunk(
+                chunk, questions_per_chunk=questions_per_chunk, num_paraphrases=num_paraphrases, pool=job_pool
+            )
+        finally:
+            slots.release()
+
+    def finish(path: str, futures: List[Future], tokens: int, error: Optional[str]) -> Dict[str, Any]:
+        chunk_cards: List[List[Dict[str, str]]] = []
+        errors = [error] if error else []
+        for fut in futures:
+            try:
+                chunk_cards.append(fut.result())
+            except Exception as e:
+                stats["failed_chunks"] += 1
+                errors.append(str(e))
+        cards = _merge_cards(chunk_cards, max_cards)
+        stats["docs"] += 1
+        stats["cards"] += len(cards)
+        if not cards:
+            stats["failed_docs"] += 1
+        return {"path": path, "cards": cards, "chunks": len(futures), "tokens": tokens, "errors": errors}
+
+    # Two generation jobs (paraphrase + questions) per chunk in flight
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="deck") as pool, \
+            ThreadPoolExecutor(max_workers=concurrency * 2, thread_name_prefix="deck-job") as job_pool:
+        for path in paths:
+            futures: List[Future] = []
+            tokens = 0
+            error = None
+            try:
+                with open(path, "rb") as fh:
+                    data = fh.read()
+                for chunk in iter_chunks(
+                    iter_document_text(data, filename=path), max_tokens=chunk_tokens, overlap_tokens=overlap_tokens
+                ):
+                    slots.acquire()  # wait while the pool is backed up
+                    futures.append(pool.submit(run_chunk, chunk))
+                    tokens += count_tokens(chunk)
+            except Exception as e:
+                error = f"❌ {path}: {e}"
+            stats["chunks"] += len(futures)
+            stats["tokens"] += tokens
+            pending.append((path, futures, tokens, error))
+
+            # Hand back finished documents as soon as everything before them is done
+            while pending and all(f.done() for f in pending[0][1]):
+                yield finish(*pending.popleft())
+
+        while pending:
+            yield finish(*pending.popleft())
+
+
+# ============================
+# Output
+# ============================
+
+class DeckWriter:
+    """Writes cards as JSONL or CSV (chosen by extension), one row per card."""
+
+    FIELDS = ("deck", "id", "question", "answer")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        self._fh = open(path, "w", encoding="utf-8", newline="")
+        self._csv = None
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._fh, fieldnames=self.FIELDS)
+            self._csv.writeheader()
+
+    def write(self, deck: Dict[str, Any], deck_name: str) -> None:
+        for card in deck["cards"]:
+            row = {"deck": deck_name, "id": card["id"], "question": card["question"], "answer": card["answer"]}
+            if self._csv is not None:
+                self._csv.writerow(row)
+            else:
+                self._fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def save_deck(deck: Dict[str, Any], user_id: str) -> int:
+    """Bulk-insert a deck's cards through the database layer; returns rows saved."""
+    from src.database import save_flashcards  # needs Supabase credentials
+
+    results = save_flashcards(deck["cards"], user_id, source="paraphrased")
+    return sum(1 for r in results if "error" not in r)
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    elapsed = max(stats["elapsed"], 1e-9)
+    return (
+        f"📊 {stats['docs']} docs, {stats['chunks']} chunks, {stats['cards']} cards in {stats['elapsed']:.1f}s | "
+        f"{stats['docs'] / elapsed:.2f} docs/s, {stats['tokens'] / elapsed:.1f} tokens/s, "
+        f"{stats['cards'] / elapsed:.2f} cards/s | "
+        f"{stats['failed_docs']} docs without cards, {stats['failed_chunks']} failed chunks"
+        + (f", {stats['saved']} saved" if "saved" in stats else "")
+    )
+
+
+# ============================
+# CLI
+# ============================
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.deck_cli",
+        description="Generate flashcard decks for every document in a directory.",
+    )
+    parser.add_argument("directory", help="Folder of TXT/PDF/DOCX/Markdown/HTML documents")
+    parser.add_argument("--out", help="Write cards to this .jsonl or .csv file")
+    parser.add_argument("--save", action="store_true", help="Bulk-insert cards into the database")
+    parser.add_argument("--user-id", help="Owner of saved cards (required with --save)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Chunks generated in parallel")
+    parser.add_argument("--questions-per-chunk", type=int, default=3)
+    parser.add_argument("--paraphrases", type=int, default=3, help="Paraphrases per chunk used as answers")
+    parser.add_argument("--max-cards", type=int, help="Cap cards per deck")
+    parser.add_argument("--chunk-tokens", type=int, default=CHUNK_TOKENS)
+    parser.add_argument("--no-recursive", action="store_true", help="Only read the top-level directory")
+    args = parser.parse_args(argv)
+    if not args.out and not args.save:
+        parser.error("choose an output: --out FILE and/or --save")
+    if args.save and not args.user_id:
+        parser.error("--save needs --user-id")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    paths = find_documents(args.directory, recursive=not args.no_recursive)
+    if not paths:
+        print(f"⚠️ No supported documents found in {args.directory}")
+        return 1
+
+    writer = DeckWriter(args.out) if args.out else None
+    stats: Dict[str, Any] = {"saved": 0} if args.save else {}
+    started = time.monotonic()
+    try:
+        for deck in build_decks(
+            paths,
+            concurrency=args.concurrency,
+            questions_per_chunk=args.questions_per_chunk,
+            num_paraphrases=args.paraphrases,
+            max_cards=args.max_cards,
+            chunk_tokens=args.chunk_tokens,
+            stats=stats,
+        ):
+            name = os.path.relpath(deck["path"], args.directory)
+            if writer is not None:
+                writer.write(deck, name)
+            if args.save and deck["cards"]:
+                stats["saved"] += save_deck(deck, args.user_id)
+            status = "✅" if deck["cards"] else "❌"
+            print(f"{status} {name}: {len(deck['cards'])} cards from {deck['chunks']} chunks")
+            for error in deck["errors"][:1]:
+                print(f"   {error}")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    stats["elapsed"] = time.monotonic() - started
+    print(format_stats(stats))
+    return 0 if stats["cards"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
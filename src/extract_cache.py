@@ -0,0 +1,95 @@
+# src/extract_cache.py
+
+from __future__ import annotations
+
+import os
+import hashlib
+from typing import Any, Callable, List, Optional
+
+try:
+    from src.generation_cache import GenerationCache, make_key
+    from src.chunker import iter_chunks, CHUNK_TOKENS, CHUNK_OVERLAP
+except ImportError:
+    from generation_cache import GenerationCache, make_key
+    from chunker import iter_chunks, CHUNK_TOKENS, CHUNK_OVERLAP
+
+# ============================
+# Settings
+# ============================
+
+# Documents kept in memory (whole extracted texts, so keep this modest)
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "32"))
+EXTRACT_CACHE_TTL = float(os.getenv("EXTRACT_CACHE_TTL", "86400"))
+EXTRACT_CACHE_PATH = os.getenv("EXTRACT_CACHE_PATH")  # enables the SQLite tier when set
+EXTRACT_CACHE_DISK_MAX = int(os.getenv("EXTRACT_CACHE_DISK_MAX", "500"))
+
+_CACHE: Optional[GenerationCache] = None
+
+
+def _get_cache() -> GenerationCache:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = GenerationCache(
+            max_entries=EXTRACT_CACHE_SIZE,
+            ttl=EXTRACT_CACHE_TTL,
+            path=EXTRACT_CACHE_PATH,
+            disk_max_entries=EXTRACT_CACHE_DISK_MAX,
+        )
+    return _CACHE
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_bytes(uploaded_file: Any) -> bytes:
+    if hasattr(uploaded_file, "getvalue"):  # Streamlit UploadedFile, BytesIO
+        return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+    uploaded_file.seek(0)
+    return data
+
+
+def cached_extract(uploaded_file: Any, extract: Callable[[Any], str], namespace: str = "") -> str:
+    """
+    Return extract(uploaded_file), reusing the text from an earlier call
+    with the same file content. Streamlit reruns the page on every widget
+    change, so without this the same upload is parsed again each time.
+    Exceptions from `extract` are not cached.
+    """
+    key = make_key(
+        f"extract:{namespace}",
+        content_hash(_file_bytes(uploaded_file)),
+        {"type": getattr(uploaded_file, "type", None)},
+    )
+    cache = _get_cache()
+    text = cache.get(key)
+    if text is None:
+        uploaded_file.seek(0)
+        text = extract(uploaded_file)
+        cache.set(key, text)
+    return text
+
+
+def cached_chunks(
+    text: str,
+    max_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP,
+) -> List[str]:
+    """iter_chunks(text) as a list, cached by the text's hash and chunk settings."""
+    key = make_key(
+        "chunks",
+        content_hash(text.encode("utf-8")),
+        {"max_tokens": max_tokens, "overlap_tokens": overlap_tokens},
+    )
+    cache = _get_cache()
+    chunks = cache.get(key)
+    if chunks is None:
+        chunks = list(iter_chunks(text, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+        cache.set(key, chunks)
+    return list(chunks)
+
+
+def extract_cache_stats() -> dict:
+    return _get_cache().stats()
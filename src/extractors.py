@@ -0,0 +1,305 @@
+# src/extractors.py
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import codecs
+import zipfile
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    from src.pdf_extract import iter_pdf_pages
+except ImportError:
+    from pdf_extract import iter_pdf_pages
+
+# ============================
+# Settings
+# ============================
+
+# Characters yielded per piece when streaming plain text
+EXTRACT_PIECE_CHARS = int(os.getenv("EXTRACT_PIECE_CHARS", "65536"))
+# Bytes inspected when sniffing a format or an encoding
+SNIFF_BYTES = 8192
+# charset_normalizer guesses noisier than this are ignored
+ENCODING_MAX_CHAOS = float(os.getenv("ENCODING_MAX_CHAOS", "0.1"))
+
+
+class UnsupportedFormat(ValueError):
+    """The upload isn't a document format any extractor can read."""
+
+
+# ============================
+# Registry
+# ============================
+
+class Extractor:
+    """A named text extractor: `iter_text(data)` yields text pieces in document order."""
+
+    def __init__(self, name: str, iter_text: Callable[[bytes], Iterator[str]], extensions: Tuple[str, ...] = ()):
+        self.name = name
+        self.iter_text = iter_text
+        self.extensions = extensions
+
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(name: str, iter_text: Callable[[bytes], Iterator[str]], extensions: Tuple[str, ...] = ()) -> None:
+    EXTRACTORS[name] = Extractor(name, iter_text, extensions)
+
+
+def supported_extensions() -> Tuple[str, ...]:
+    """File extensions (without dot) for st.file_uploader's `type`."""
+    return tuple(ext for ex in EXTRACTORS.values() for ext in ex.extensions)
+
+
+# ============================
+# Format sniffing
+# ============================
+
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_HTML_HINT = re.compile(rb"<!doctype\s+html|<html[\s>]|<body[\s>]|<head[\s>]", re.IGNORECASE)
+
+
+def _extension(filename: Optional[str]) -> str:
+    if not isinstance(filename, str):  # e.g. the fd "name" of a rolled-over temp file
+        return ""
+    return os.path.splitext(filename or "")[1].lower().lstrip(".")
+
+
+def sniff_format(data: bytes, filename: Optional[str] = None, mime: Optional[str] = None) -> str:
+    """
+    Detect the document format from its leading bytes. The filename and
+    browser-reported MIME type are only used to tell text formats apart
+    (Markdown vs plain text), never to pick a binary parser.
+    """
+    head = data[:SNIFF_BYTES]
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                if "word/document.xml" in zf.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+        raise UnsupportedFormat("Unsupported archive. Please upload TXT, PDF, DOCX, Markdown or HTML.")
+    if head.startswith(_OLE_MAGIC):
+        # application/msword: the pre-2007 binary format python-docx can't read
+        raise UnsupportedFormat("Legacy .doc files aren't supported. Save the file as .docx or PDF and upload it again.")
+
+    if not _looks_like_text(head):
+        raise UnsupportedFormat("Unsupported file format. Please upload TXT, PDF, DOCX, Markdown or HTML.")
+    ext = _extension(filename)
+    if ext in ("html", "htm") or (mime or "").startswith("text/html") or _HTML_HINT.search(head[:1024]):
+        return "html"
+    if ext in ("md", "markdown") or (mime or "") in ("text/markdown", "text/x-markdown"):
+        return "md"
+    return "txt"
+
+
+def _looks_like_text(head: bytes) -> bool:
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return True
+    if b"\x00" in head:
+        return False
+    # Allow a little binary noise, but not mostly control bytes
+    controls = sum(1 for b in head if b < 32 and b not in (9, 10, 12, 13))
+    return controls <= len(head) // 100
+
+
+# ============================
+# Text decoding
+# ============================
+
+def _decodes(sample: bytes, encoding: str) -> bool:
+    """Strict decode; a multi-byte sequence cut at the end of the sample is allowed."""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def detect_encoding(data: bytes) -> str:
+    """
+    BOM first, then strict UTF-8. Otherwise a charset_normalizer guess is
+    only trusted when it decodes cleanly, has low chaos and a detected
+    language, and cp1252 isn't an equally plausible reading; failing that,
+    strict cp1252, then charset_normalizer's best clean guess, then cp1252.
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    sample = data[:SNIFF_BYTES * 8]
+    if _decodes(sample, "utf-8"):
+        return "utf-8"
+
+    plausible = []
+    try:
+        from charset_normalizer import from_bytes
+        # Results come best first
+        plausible = [m for m in from_bytes(sample) if m.chaos <= ENCODING_MAX_CHAOS and _decodes(sample, m.encoding)]
+    except ImportError:
+        pass
+    # Short samples often fit several single-byte codecs equally well
+    if any(codecs.lookup(m.encoding).name == "cp1252" for m in plausible):
+        return "cp1252"
+    confident = [m for m in plausible if m.coherence > 0]
+    if confident:
+        return confident[0].encoding
+    if _decodes(sample, "cp1252"):
+        return "cp1252"
+    return plausible[0].encoding if plausible else "cp1252"
+
+
+def _iter_decoded(data: bytes) -> Iterator[str]:
+    encoding = detect_encoding(data)
+    reader = io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors="replace", newline=None)
+    while True:
+        piece = reader.read(EXTRACT_PIECE_CHARS)
+        if not piece:
+            return
+        yield piece
+
+
+def _iter_lines(data: bytes) -> Iterator[str]:
+    """Decoded text one line at a time (keeps the newline)."""
+    buffered = ""
+    for piece in _iter_decoded(data):
+        buffered += piece
+        lines = buffered.split("\n")
+        buffered = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if buffered:
+        yield buffered
+
+
+# ============================
+# Extractors
+# ============================
+
+def iter_txt(data: bytes) -> Iterator[str]:
+    yield from _iter_decoded(data)
+
+
+def iter_pdf(data: bytes) -> Iterator[str]:
+    for page in iter_pdf_pages(data):
+        yield page + "\n"
+
+
+def iter_docx(data: bytes) -> Iterator[str]:
+    import docx  # python-docx; only needed for DOCX uploads
+
+    doc = docx.Document(io.BytesIO(data))
+    for para in doc.paragraphs:
+        if para.text:
+            yield para.text + "\n"
+
+
+_MD_FENCE = re.compile(r"^\s*(```|~~~)")
+_MD_PREFIX = re.compile(r"^\s{0,3}(#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)")
+_MD_IMAGE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_MD_EMPHASIS = re.compile(r"(\*\*|__|\*|_|~~|`)(?=\S)(.+?)(?<=\S)\1")
+_MD_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+
+def iter_markdown(data: bytes) -> Iterator[str]:
+    """Markdown as plain text: markup removed, code block contents kept."""
+    in_code = False
+    for line in _iter_lines(data):
+        if _MD_FENCE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            yield line
+            continue
+        if _MD_RULE.match(line):
+            continue
+        line = _MD_PREFIX.sub("", line)
+        line = _MD_IMAGE.sub(r"\1", line)
+        line = _MD_LINK.sub(r"\1", line)
+        line = _MD_EMPHASIS.sub(r"\2", line)
+        yield line
+
+
+class _HTMLText(HTMLParser):
+    """Collects visible text, dropping script/style and breaking lines at block tags."""
+
+    _SKIP = {"script", "style", "noscript", "template", "title"}
+    _BLOCK = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "pre", "blockquote"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skipping += 1
+        elif tag in self._BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skipping:
+            self._skipping -= 1
+        elif tag in self._BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def iter_html(data: bytes) -> Iterator[str]:
+    parser = _HTMLText()
+    for piece in _iter_decoded(data):
+        parser.feed(piece)
+        if parser.parts:
+            yield "".join(parser.parts)
+            parser.parts = []
+    parser.close()
+    if parser.parts:
+        yield "".join(parser.parts)
+
+
+register_extractor("txt", iter_txt, ("txt",))
+register_extractor("pdf", iter_pdf, ("pdf",))
+register_extractor("docx", iter_docx, ("docx",))
+register_extractor("md", iter_markdown, ("md", "markdown"))
+register_extractor("html", iter_html, ("html", "htm"))
+
+
+# ============================
+# Public API
+# ============================
+
+def _source_bytes(source: Any) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):  # Streamlit UploadedFile, BytesIO
+        return source.getvalue()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+
+def iter_document_text(source: Any, filename: Optional[str] = None, mime: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield the text of a document piece by piece (pages, paragraphs or
+    blocks), choosing the extractor by sniffing the content. Raises
+    UnsupportedFormat before any parsing if no extractor fits.
+    """
+    data = _source_bytes(source)
+    fmt = sniff_format(data, filename or getattr(source, "name", None), mime or getattr(source, "type", None))
+    return EXTRACTORS[fmt].iter_text(data)
+
+
+def extract_document_text(source: Any, filename: Optional[str] = None, mime: Optional[str] = None) -> str:
+    return "".join(iter_document_text(source, filename, mime)).strip()
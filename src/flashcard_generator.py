@@ -14,3 +14,21 @@ def create_flashcards(questions):
         }
         flashcards.append(card)
     return flashcards
+
+
+def question_key(question):
+    """Normalised form of a question used to spot repeats: lowercase, no punctuation."""
+    return " ".join("".join(ch for ch in question.lower() if ch.isalnum() or ch.isspace()).split())
+
+
+def dedupe_cards(chunk_cards, max_cards=None):
+    """Merge per-chunk card lists in order, keeping the first card for each question."""
+    seen = set()
+    cards = []
+    for batch in chunk_cards:
+        for card in batch:
+            key = question_key(card["question"])
+            if key and key not in seen:
+                seen.add(key)
+                cards.append(card)
+    return cards[:max_cards] if max_cards else cards
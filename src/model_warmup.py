@@ -0,0 +1,113 @@
+# src/model_warmup.py
+
+from __future__ import annotations
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# ============================
+# Settings
+# ============================
+
+WARMUP_ENABLED = os.getenv("AI_WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds between keep-alive rounds; 0 disables keep-alive after the first warm-up
+KEEPALIVE_INTERVAL = float(os.getenv("AI_KEEPALIVE_INTERVAL", "600"))
+# A model not pinged successfully for this long is considered cold again
+WARM_TTL = float(os.getenv("AI_WARM_TTL", str(max(KEEPALIVE_INTERVAL * 2, 900))))
+WARMUP_WORKERS = int(os.getenv("AI_WARMUP_WORKERS", "4"))
+
+
+class WarmupScheduler:
+    """
+    Pings each model once at start-up and then every `interval` seconds
+    from a daemon thread, recording a warm/cold state per model id.
+    `ping(model_id)` should send a tiny request and return True on success.
+    """
+
+    def __init__(
+        self,
+        ping: Callable[[str], bool],
+        interval: float = KEEPALIVE_INTERVAL,
+        warm_ttl: float = WARM_TTL,
+        max_workers: int = WARMUP_WORKERS,
+    ):
+        self.ping = ping
+        self.interval = interval
+        self.warm_ttl = warm_ttl
+        self.max_workers = max_workers
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- pinging ----------
+    def _ping_one(self, model_id: str) -> None:
+        start = time.monotonic()
+        try:
+            ok, error = bool(self.ping(model_id)), None
+        except Exception as e:
+            ok, error = False, str(e)
+        elapsed = time.monotonic() - start
+        with self._lock:
+            state = self._states.setdefault(model_id, {"pings": 0, "failures": 0})
+            state["pings"] += 1
+            state["last_ping_ms"] = round(elapsed * 1000, 1)
+            state["last_ping_at"] = time.time()
+            if ok:
+                state["warm_since"] = state.get("warm_since") or time.time()
+                state["last_ok_at"] = time.time()
+                state["error"] = None
+            else:
+                state["failures"] += 1
+                state["warm_since"] = None
+                state["error"] = error
+
+    def warm_all(self, model_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Ping every model concurrently and return the resulting states."""
+        model_ids = list(dict.fromkeys(model_ids))
+        if model_ids:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(model_ids)), thread_name_prefix="warmup") as pool:
+                list(pool.map(self._ping_one, model_ids))
+        return self.states()
+
+    # ---------- background loop ----------
+    def start(self, model_ids: Iterable[str]) -> bool:
+        """Start the warm-up/keep-alive thread; returns False if it is already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        model_ids = list(model_ids)
+        self._stop.clear()
+
+        def loop():
+            self.warm_all(model_ids)
+            while self.interval > 0 and not self._stop.wait(self.interval):
+                self.warm_all(model_ids)
+
+        self._thread = threading.Thread(target=loop, daemon=True, name="model-keepalive")
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ---------- state ----------
+    def is_warm(self, model_id: str) -> Optional[bool]:
+        """True/False once pinged, None if the model hasn't been pinged yet."""
+        with self._lock:
+            state = self._states.get(model_id)
+            if state is None:
+                return None
+            last_ok = state.get("last_ok_at")
+            return bool(state.get("warm_since")) and last_ok is not None and time.time() - last_ok < self.warm_ttl
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models: List[str] = list(self._states)
+            snapshot = {m: dict(s) for m, s in self._states.items()}
+        for m in models:
+            warm = self.is_warm(m)
+            snapshot[m]["state"] = "warm" if warm else "cold"
+        return snapshot
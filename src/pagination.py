@@ -0,0 +1,140 @@
+# src/pagination.py
+
+from __future__ import annotations
+
+import os
+import json
+import base64
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# ============================
+# Settings
+# ============================
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", "200"))
+
+# Columns returned for flashcard lists unless the caller asks for others
+CARD_COLUMNS = ("id", "question", "answer", "created_at")
+# Keyset columns; always selected so the next cursor can be built
+CURSOR_COLUMNS = ("created_at", "id")
+# Everything a client may ask for by name; no embeds, wildcards or casts
+SELECTABLE_COLUMNS = ("id", "question", "answer", "source", "created_at")
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that weren't produced by encode_cursor."""
+
+
+class InvalidColumns(ValueError):
+    """Raised for requested columns outside SELECTABLE_COLUMNS."""
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    raw = json.dumps([row.get("created_at"), row.get("id")], default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return created_at, row_id
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def clamp_page_size(page_size: Optional[int]) -> int:
+    if not page_size:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+
+def parse_columns(raw: Optional[str]) -> Optional[List[str]]:
+    """Split a client's comma-separated `columns` and reject anything not selectable."""
+    if not raw:
+        return None
+    cols = [c.strip() for c in raw.split(",") if c.strip()]
+    bad = [c for c in cols if c not in SELECTABLE_COLUMNS]
+    if bad:
+        raise InvalidColumns(f"Unknown columns: {', '.join(bad)}; allowed: {', '.join(SELECTABLE_COLUMNS)}")
+    return cols or None
+
+
+def select_columns(columns: Optional[Iterable[str]] = None) -> str:
+    """Projection string for select(); the keyset columns are always included."""
+    cols = [c.strip() for c in (columns or CARD_COLUMNS) if c and c.strip()]
+    if "*" in cols:
+        return "*"
+    for c in CURSOR_COLUMNS:
+        if c not in cols:
+            cols.append(c)
+    return ",".join(cols)
+
+
+def _quote(value: Any) -> str:
+    # PostgREST logic trees need reserved characters (':', ',', '.') quoted
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_filter(cursor: str) -> str:
+    """or=() filter selecting rows after `cursor` in (created_at DESC, id DESC) order."""
+    created_at, row_id = decode_cursor(cursor)
+    c, i = _quote(created_at), _quote(row_id)
+    return f"created_at.lt.{c},and(created_at.eq.{c},id.lt.{i})"
+
+
+def fetch_page(
+    client: Any,
+    table: str,
+    filters: Optional[Dict[str, Any]] = None,
+    columns: Optional[Sequence[str]] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+    with_count: bool = False,
+) -> Dict[str, Any]:
+    """
+    One page of `table`, newest first, using keyset pagination on
+    (created_at, id). Pass the returned `next_cursor` to get the next page;
+    it is None on the last page. With `with_count`, `total` is the number
+    of rows matching `filters`, whichever page is requested.
+    Returns:
+
+        {"items": [...], "next_cursor": str | None, "page_size": int, ["total": int]}
+    """
+    size = clamp_page_size(page_size)
+    # The keyset filter would limit the count to rows after the cursor, so
+    # later pages are counted with a separate head-only request
+    count_here = with_count and not cursor
+    query = client.table(table).select(select_columns(columns), **({"count": "exact"} if count_here else {}))
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    if cursor:
+        query = query.or_(keyset_filter(cursor))
+    # Fetch one extra row to learn whether another page exists
+    res = (
+        query.order("created_at", desc=True)
+        .order("id", desc=True)
+        .limit(size + 1)
+        .execute()
+    )
+    rows: List[Dict[str, Any]] = getattr(res, "data", None) or []
+    items = rows[:size]
+    page: Dict[str, Any] = {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if len(rows) > size else None,
+        "page_size": size,
+    }
+    if count_here:
+        page["total"] = getattr(res, "count", None)
+    elif with_count:
+        page["total"] = count_rows(client, table, filters)
+    return page
+
+
+def count_rows(client: Any, table: str, filters: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """Exact number of rows matching `filters`, without fetching any of them."""
+    query = client.table(table).select("id", count="exact", head=True)
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    return getattr(query.execute(), "count", None)
@@ -0,0 +1,149 @@
+# src/pdf_extract.py
+
+from __future__ import annotations
+
+import io
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator, List, Optional, Union
+
+import PyPDF2
+
+# ============================
+# Settings
+# ============================
+
+# Uploads larger than this are rejected before parsing
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(50 * 1024 * 1024)))
+# Pages past this are ignored
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "1000"))
+# Extraction stops once this much text has been produced
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", str(5_000_000)))
+# Documents with at least this many pages are split across processes
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages handed to a worker per task
+PDF_BATCH_PAGES = int(os.getenv("PDF_BATCH_PAGES", "16"))
+# "spawn" avoids forking a process that is running Streamlit/uvicorn threads
+PDF_MP_START_METHOD = os.getenv("PDF_MP_START_METHOD", "spawn")
+
+
+class PdfTooLarge(ValueError):
+    """Raised when a PDF is over PDF_MAX_BYTES."""
+
+
+def _read_bytes(source: Union[bytes, Any]) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):  # Streamlit UploadedFile, BytesIO
+        return source.getvalue()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+
+# ============================
+# Worker side
+# ============================
+
+_WORKER_READER: Optional[PyPDF2.PdfReader] = None
+
+
+def _init_worker(data: bytes) -> None:
+    """Parse the document once per worker process instead of once per task."""
+    global _WORKER_READER
+    _WORKER_READER = PyPDF2.PdfReader(io.BytesIO(data))
+
+
+def _page_text(reader: PyPDF2.PdfReader, index: int) -> str:
+    try:
+        return reader.pages[index].extract_text() or ""
+    except Exception:
+        # One malformed page shouldn't lose the rest of the document
+        return ""
+
+
+def _extract_range(start: int, end: int) -> List[str]:
+    return [_page_text(_WORKER_READER, i) for i in range(start, end)]
+
+
+# ============================
+# Page stream
+# ============================
+
+def _iter_serial(reader: PyPDF2.PdfReader, start: int, end: int) -> Iterator[str]:
+    for i in range(start, end):
+        yield _page_text(reader, i)
+
+
+def _iter_parallel(data: bytes, reader: PyPDF2.PdfReader, pages: int, workers: int) -> Iterator[str]:
+    """Extract page batches in worker processes, yielding pages in order."""
+    ctx = multiprocessing.get_context(PDF_MP_START_METHOD)
+    done = 0
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(data,)
+        ) as pool:
+            pending: deque = deque()
+            next_start = 0
+            try:
+                while next_start < pages or pending:
+                    # Keep a bounded number of batches in flight
+                    while next_start < pages and len(pending) < workers * 2:
+                        end = min(next_start + PDF_BATCH_PAGES, pages)
+                        pending.append(pool.submit(_extract_range, next_start, end))
+                        next_start = end
+                    for text in pending.popleft().result():
+                        done += 1
+                        yield text
+            finally:
+                for fut in pending:
+                    fut.cancel()
+    except (OSError, RuntimeError) as e:
+        # No process pool available (sandboxed host, broken worker): finish in-process
+        print(f"⚠️ Parallel PDF extraction failed, continuing serially: {e}")
+        yield from _iter_serial(reader, done, pages)
+
+
+def iter_pdf_pages(
+    source: Union[bytes, Any],
+    max_pages: int = PDF_MAX_PAGES,
+    max_bytes: int = PDF_MAX_BYTES,
+    max_chars: int = PDF_MAX_CHARS,
+    workers: int = PDF_WORKERS,
+    parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES,
+) -> Iterator[str]:
+    """
+    Yield the text of each page in order. Large documents are extracted
+    in a process pool; at most `max_pages` pages and `max_chars`
+    characters are produced. The generator can be passed straight to
+    `iter_chunks`, so the document never has to be held as one string.
+    """
+    data = _read_bytes(source)
+    if len(data) > max_bytes:
+        raise PdfTooLarge(f"PDF is too large ({len(data)} bytes; limit is {max_bytes})")
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    pages = min(len(reader.pages), max_pages)
+    if workers > 1 and pages >= parallel_min_pages:
+        stream = _iter_parallel(data, reader, pages, workers)
+    else:
+        stream = _iter_serial(reader, 0, pages)
+
+    remaining = max_chars
+    try:
+        for text in stream:
+            if len(text) >= remaining:
+                yield text[:remaining]
+                return
+            remaining -= len(text)
+            yield text
+    finally:
+        stream.close()
+
+
+def extract_pdf_text(source: Union[bytes, Any], **kwargs: Any) -> str:
+    """Whole-document text, pages separated by newlines."""
+    return "\n".join(iter_pdf_pages(source, **kwargs)).strip()
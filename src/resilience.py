@@ -0,0 +1,263 @@
+# src/resilience.py
+
+from __future__ import annotations
+
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# ============================
+# Settings
+# ============================
+
+HF_CONNECT_TIMEOUT = float(os.getenv("HF_CONNECT_TIMEOUT", "5"))
+HF_READ_TIMEOUT = float(os.getenv("HF_READ_TIMEOUT", "30"))
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("HF_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("HF_RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("HF_RETRY_MAX_DELAY", "4"))
+# Retries allowed as a fraction of recent requests, plus a small floor
+RETRY_BUDGET_RATIO = float(os.getenv("HF_RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("HF_RETRY_BUDGET_MIN_PER_SEC", "1"))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("HF_BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("HF_BREAKER_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the backend while a model's circuit is open."""
+
+    status = 503
+
+    def __init__(self, model_id: str, retry_in: float):
+        super().__init__(f"Circuit open for {model_id}; retrying in {retry_in:.0f}s")
+        self.model_id = model_id
+        self.retry_in = retry_in
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx are worth retrying; other errors are not."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    status = _status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(exc, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    name = type(exc).__name__.lower()
+    return "timeout" in name or "connect" in name
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(response, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def is_model_fault(exc: BaseException) -> bool:
+    """
+    Non-retryable errors that still say the model is unusable: other 5xx
+    and "model not found" (404/410). Such errors count toward its breaker.
+    """
+    status = _status_of(exc)
+    if status is not None and (status >= 500 or status in (404, 410)):
+        return True
+    text = str(exc).lower()
+    return "model" in text and ("not found" in text or "does not exist" in text)
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+# ============================
+# Circuit breaker
+# ============================
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open once `reset_timeout` has passed, letting a single
+    probe through; the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> float:
+        """Return 0 if a call may proceed, otherwise seconds until the next probe."""
+        with self._lock:
+            if self.state == "closed":
+                return 0.0
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == "open" and elapsed >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return 0.0
+            return max(0.1, self.reset_timeout - elapsed)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Let another probe through if the current one was abandoned (e.g. cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while calls are rejected; unlike allow(), never claims the probe slot."""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures}
+
+
+# ============================
+# Retry budget
+# ============================
+
+class RetryBudget:
+    """
+    Token bucket shared by all callers: every request deposits `ratio`
+    tokens and a floor of `min_per_sec` accrues over time; each retry
+    spends one. Keeps retries from multiplying load during an outage.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_per_sec: float = RETRY_BUDGET_MIN_PER_SEC, max_tokens: float = 50.0):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens / 5
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._last) * self.min_per_sec)
+        self._last = now
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+# ============================
+# Policy
+# ============================
+
+class ResiliencePolicy:
+    """Per-model circuit breakers plus a global retry budget around backend calls."""
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS):
+        self.max_attempts = max(1, max_attempts)
+        self.budget = RetryBudget()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, model_id: str) -> CircuitBreaker:
+        with self._lock:
+            if model_id not in self._breakers:
+                self._breakers[model_id] = CircuitBreaker()
+            return self._breakers[model_id]
+
+    def is_open(self, model_id: str) -> bool:
+        return self.breaker(model_id).is_open()
+
+    def _before_attempt(self, model_id: str) -> CircuitBreaker:
+        breaker = self.breaker(model_id)
+        wait = breaker.allow()
+        if wait:
+            raise CircuitOpenError(model_id, wait)
+        return breaker
+
+    def _after_failure(self, breaker: CircuitBreaker, exc: BaseException, attempt: int) -> bool:
+        """Record the failure; return True if another attempt should be made."""
+        if not is_retryable(exc):
+            if is_model_fault(exc):
+                breaker.record_failure()
+            else:
+                # A bad request says nothing about the model's health either way
+                breaker.release_probe()
+            return False
+        breaker.record_failure()
+        return attempt < self.max_attempts and self.budget.try_spend()
+
+    def call(self, model_id: str, fn: Callable[[], T]) -> T:
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker = self._before_attempt(model_id)
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._after_failure(breaker, e, attempt):
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            breaker.record_success()
+            return result
+
+    async def call_async(self, model_id: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker = self._before_attempt(model_id)
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception as e:
+                if not self._after_failure(breaker, e, attempt):
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            breaker.record_success()
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            "retry_tokens": round(self.budget.tokens, 2),
+            "circuits": {m: b.snapshot() for m, b in breakers.items()},
+        }
@@ -0,0 +1,152 @@
+# src/user_cache.py
+
+from __future__ import annotations
+
+import os
+import copy
+import time
+import json
+import threading
+import functools
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+# ============================
+# Settings
+# ============================
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "120"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "5000"))
+
+
+def _is_error(value: Any) -> bool:
+    return isinstance(value, dict) and "error" in value
+
+
+class UserCache:
+    """
+    Read-through cache for per-user data, keyed by (namespace, user id,
+    call args) with a TTL per entry. Writers call `invalidate(user_id)` to
+    drop everything cached for that user. Like st.cache_data, callers get
+    a copy, so mutating a result never changes the cached value; unlike
+    it, entries can be invalidated per user from FastAPI code as well.
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str, str], Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        # Bumped on invalidation so a read that started before a write isn't cached
+        self._generations: Dict[str, int] = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _lookup(self, entry_key: Tuple[str, str, str]) -> Tuple[bool, Any, int]:
+        """Return (hit, value, generation) for an entry."""
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._stats["hits"] += 1
+                return True, copy.deepcopy(entry[1]), 0
+            self._stats["misses"] += 1
+            return False, None, self._generations.get(entry_key[1], 0)
+
+    def _store(self, entry_key: Tuple[str, str, str], value: Any, generation: int, ttl: Optional[float]) -> None:
+        if not entry_key[1] or _is_error(value):
+            return
+        with self._lock:
+            if self._generations.get(entry_key[1], 0) != generation:
+                return
+            now = time.monotonic()
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[entry_key] = (now + (self.ttl if ttl is None else ttl), copy.deepcopy(value))
+
+    def get_or_load(
+        self,
+        namespace: str,
+        user_id: Any,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        entry_key = (namespace, str(user_id or ""), key)
+        hit, value, generation = self._lookup(entry_key)
+        if hit:
+            return value
+        value = loader()
+        self._store(entry_key, value, generation, ttl)
+        return value
+
+    async def get_or_load_async(
+        self,
+        namespace: str,
+        user_id: Any,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """get_or_load for coroutine loaders (e.g. AsyncSupaDB reads)."""
+        entry_key = (namespace, str(user_id or ""), key)
+        hit, value, generation = self._lookup(entry_key)
+        if hit:
+            return value
+        value = await loader()
+        self._store(entry_key, value, generation, ttl)
+        return value
+
+    def _evict(self, now: float) -> None:
+        expired = [k for k, (exp, _) in self._entries.items() if exp <= now]
+        for k in expired:
+            del self._entries[k]
+        if len(self._entries) >= self.max_entries:
+            # Drop the entries closest to expiry
+            for k in sorted(self._entries, key=lambda k: self._entries[k][0])[: len(self._entries) // 10 + 1]:
+                del self._entries[k]
+
+    def invalidate(self, user_id: Any, namespaces: Optional[Iterable[str]] = None) -> int:
+        """Drop cached entries for the user (optionally only some namespaces)."""
+        user_id = str(user_id)
+        wanted = set(namespaces) if namespaces is not None else None
+        with self._lock:
+            doomed = [k for k in self._entries if k[1] == user_id and (wanted is None or k[0] in wanted)]
+            for k in doomed:
+                del self._entries[k]
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._stats["invalidations"] += 1
+        return len(doomed)
+
+    def invalidate_rows(self, rows: Iterable[Dict[str, Any]], column: str = "created_by", namespaces: Optional[Iterable[str]] = None) -> None:
+        """Invalidate every user referenced by `column` in the written rows."""
+        for user_id in {row.get(column) for row in rows if row.get(column)}:
+            self.invalidate(user_id, namespaces)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+
+USER_CACHE = UserCache()
+
+
+def cached_per_user(namespace: str, ttl: Optional[float] = None, cache: Optional[UserCache] = None):
+    """
+    Decorator for read functions whose first argument is the user id.
+    Results are cached per (user id, remaining args); results shaped like
+    {"error": ...} are never cached.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(user_id, *args, **kwargs):
+            key = json.dumps([args, kwargs], sort_keys=True, default=str)
+            return (cache or USER_CACHE).get_or_load(
+                namespace, user_id, key, lambda: fn(user_id, *args, **kwargs), ttl=ttl
+            )
+
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
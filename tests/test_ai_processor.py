@@ -1,8 +1,10 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import requests
+from huggingface_hub import InferenceClient, AsyncInferenceClient
 import sys
 import os
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
@@ -107,3 +109,168 @@ def test_generate_questions_truncates_long_text(mock_post):
     # Assertions
     assert len(questions) == 1
     mock_post.assert_called_once()
+
+@patch('src.ai_processor.get_http_client')
+@patch('src.ai_processor._get_client')
+def test_hf_text2text_batches_return_sequences(mock_get_client, mock_get_http_client, monkeypatch):
+    """Test that multiple sequences are requested in a single call"""
+    monkeypatch.setenv("HUGGING_FACE_API_KEY", "hf_test")
+    mock_client = MagicMock(spec=InferenceClient)
+    mock_get_client.return_value = mock_client
+    mock_http = MagicMock()
+    mock_http.post.return_value.json.return_value = [
+        {"generated_text": "a"}, {"generated_text": "b"}, {"generated_text": "c"},
+    ]
+    mock_get_http_client.return_value = mock_http
+
+    from src.ai_processor import _hf_text2text
+
+    r = _hf_text2text("batch/model", "Some text", {"num_return_sequences": 3})
+
+    assert r["ok"]
+    assert [it["generated_text"] for it in r["data"]] == ["a", "b", "c"]
+    mock_http.post.assert_called_once()
+    assert mock_http.post.call_args.kwargs["url"].endswith("/batch/model")
+    assert mock_http.post.call_args.kwargs["json"]["parameters"]["num_return_sequences"] == 3
+    mock_client.text_generation.assert_not_called()
+
+@patch('src.ai_processor.get_http_client')
+@patch('src.ai_processor._get_client')
+def test_hf_text2text_falls_back_to_fanout(mock_get_client, mock_get_http_client, monkeypatch):
+    """Test fan-out when the backend rejects batched generation"""
+    monkeypatch.setenv("HUGGING_FACE_API_KEY", "hf_test")
+    mock_client = MagicMock(spec=InferenceClient)
+    mock_client.text_generation.return_value = "variant"
+    mock_get_client.return_value = mock_client
+    mock_get_http_client.return_value.post.side_effect = Exception("not supported")
+
+    from src.ai_processor import _hf_text2text
+
+    r = _hf_text2text("fanout/model", "Some text", {"num_return_sequences": 4})
+
+    assert r["ok"]
+    assert len(r["data"]) == 4
+    assert mock_client.text_generation.call_count == 4
+
+@patch('src.ai_processor.JOB_KINDS', {
+    "paraphrase": lambda text: [text.upper()],
+    "questions": MagicMock(side_effect=Exception("boom")),
+})
+def test_run_jobs_isolates_errors():
+    """Test that a failing job does not affect the other jobs"""
+    from src.ai_processor import run_jobs
+
+    results = run_jobs({
+        "p": {"kind": "paraphrase", "params": {"text": "hello"}},
+        "q": {"kind": "questions", "params": {}},
+        "x": {"kind": "unknown"},
+    })
+
+    assert results["p"] == {"ok": True, "data": ["HELLO"]}
+    assert results["q"] == {"ok": False, "data": "boom"}
+    assert results["x"]["ok"] is False
+
+@patch('src.ai_processor.JOB_KINDS', {"slow": lambda delay: time.sleep(delay) or delay})
+def test_run_jobs_timeout_starts_when_job_runs():
+    """Test that time spent queued behind a busy pool does not count toward the timeout"""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.ai_processor import run_jobs
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        results = run_jobs(
+            {name: {"kind": "slow", "params": {"delay": 0.3}} for name in ("a", "b", "c")},
+            timeout=0.5,
+            pool=pool,
+        )
+
+    assert all(r["ok"] for r in results.values())
+
+@patch('src.ai_processor.BATCH_BACKENDS')
+def test_hf_text2text_batch_dedupes_prompts(mock_backends):
+    """Test that duplicate prompts in a batch are generated once"""
+    generate = MagicMock(side_effect=lambda model_id, prompts, params: [
+        [{"generated_text": p[::-1]}] for p in prompts
+    ])
+    mock_backends.get.return_value = generate
+
+    from src.ai_processor import hf_text2text_batch
+
+    results = hf_text2text_batch("dedupe/model", ["abc", "xyz", "abc"], bypass_cache=True)
+
+    assert [r["data"][0]["generated_text"] for r in results] == ["cba", "zyx", "cba"]
+    assert generate.call_args[0][1] == ["abc", "xyz"]
+
+@patch('src.ai_processor.get_async_http_client')
+@patch('src.ai_processor._get_async_client')
+def test_paraphrase_text_async(mock_get_async_client, mock_get_async_http_client, monkeypatch):
+    """Test async paraphrasing over the shared async client"""
+    import asyncio
+
+    monkeypatch.setenv("HUGGING_FACE_API_KEY", "hf_test")
+    mock_client = MagicMock(spec=AsyncInferenceClient)
+    mock_get_async_http_client.return_value.post = AsyncMock(side_effect=Exception("not supported"))
+    mock_client.text_generation = AsyncMock(return_value=" async variant ")
+    mock_get_async_client.return_value = mock_client
+
+    from src.ai_processor import paraphrase_text_async
+
+    results = asyncio.run(paraphrase_text_async("Async text", num_return_sequences=2, bypass_cache=True))
+
+    assert results == ["async variant", "async variant"]
+    assert mock_client.text_generation.await_count == 2
+
+@patch('src.ai_processor._get_client')
+def test_stream_paraphrase_yields_tokens(mock_get_client):
+    """Test that paraphrase tokens are yielded as they arrive"""
+    mock_client = MagicMock(spec=InferenceClient)
+    mock_client.text_generation.return_value = iter(["Hello", " there", "."])
+    mock_get_client.return_value = mock_client
+
+    from src.ai_processor import stream_paraphrase
+
+    assert list(stream_paraphrase("Hi there.")) == ["Hello", " there", "."]
+    assert mock_client.text_generation.call_args.kwargs["stream"] is True
+
+@patch('src.ai_processor._get_client')
+def test_warmup_ping_skips_generation_cache(mock_get_client):
+    """Test that warm-up completions don't touch the generation cache"""
+    mock_client = MagicMock(spec=InferenceClient)
+    mock_client.text_generation.return_value = "pong"
+    mock_get_client.return_value = mock_client
+
+    from src.ai_processor import _warmup_ping, cache_stats
+
+    before = cache_stats()
+    assert _warmup_ping("warm/model")
+    assert cache_stats() == before
+
+@patch('src.ai_processor._get_client')
+def test_warmup_ping_bypasses_resilience(mock_get_client):
+    """Test that a cold-model 503 from a ping isn't retried or counted against the breaker"""
+    error = RuntimeError("503 Service Unavailable")
+    error.response = MagicMock(status_code=503)
+    mock_client = MagicMock(spec=InferenceClient)
+    mock_client.text_generation.side_effect = error
+    mock_get_client.return_value = mock_client
+
+    from src.ai_processor import _warmup_ping, resilience_stats
+
+    with pytest.raises(RuntimeError):
+        _warmup_ping("cold/model")
+    assert mock_client.text_generation.call_count == 1
+    assert "cold/model" not in resilience_stats()["circuits"]
+
+def test_async_limit_works_across_event_loops(monkeypatch):
+    """Test that the request limit can be contended from more than one event loop"""
+    import asyncio
+    import src.ai_processor as ap
+    monkeypatch.setattr(ap, "MAX_ASYNC_REQUESTS", 1)
+
+    async def contend():
+        async def use():
+            async with ap._get_async_limit():
+                await asyncio.sleep(0.01)
+        await asyncio.gather(use(), use())
+
+    asyncio.run(contend())
+    asyncio.run(contend())  # would raise "bound to a different event loop" with a shared semaphore
@@ -0,0 +1,124 @@
+import pytest
+from unittest.mock import MagicMock
+
+from src.bulk_insert import bulk_insert, summarize_failures
+
+
+def make_client(fail_if=None, missing_column=None):
+    """Fake Supabase client whose insert echoes rows back with ids"""
+    calls = []
+
+    def insert(rows):
+        calls.append(rows)
+        query = MagicMock()
+
+        def execute():
+            if missing_column and any(missing_column in r for r in rows):
+                raise RuntimeError(f'column "{missing_column}" does not exist (42703)')
+            if fail_if and any(fail_if(r) for r in rows):
+                raise RuntimeError("violates check constraint")
+            return MagicMock(error=None, data=[{**r, "id": r["question"]} for r in rows])
+
+        query.execute.side_effect = execute
+        return query
+
+    client = MagicMock()
+    client.table.return_value.insert.side_effect = insert
+    return client, calls
+
+
+def test_rows_are_sent_in_chunks():
+    """Test that rows are inserted with one request per chunk"""
+    client, calls = make_client()
+    rows = [{"question": f"q{i}", "answer": "a"} for i in range(5)]
+
+    result = bulk_insert(client, "cards", rows, batch_size=2)
+
+    assert [len(c) for c in calls] == [2, 2, 1]
+    assert result["ok"] and result["inserted"] == 5
+    assert [r["data"]["id"] for r in result["rows"]] == ["q0", "q1", "q2", "q3", "q4"]
+
+def test_failed_chunk_is_split_to_isolate_bad_rows():
+    """Test per-row results when only some rows in a chunk are rejected"""
+    client, _ = make_client(fail_if=lambda r: r["question"] == "bad")
+    rows = [{"question": q, "answer": "a"} for q in ["q0", "bad", "q2", "q3"]]
+
+    result = bulk_insert(client, "cards", rows, batch_size=4)
+
+    assert not result["ok"]
+    assert result["failed"] == 1 and result["inserted"] == 3
+    assert [r["ok"] for r in result["rows"]] == [True, False, True, True]
+    assert result["chunks"][0]["failed"] == 1
+    assert "1 of 4 rows failed" in summarize_failures(result)
+
+def test_missing_optional_column_is_dropped():
+    """Test retry without an optional column the table doesn't have"""
+    client, calls = make_client(missing_column="created_by")
+    rows = [{"question": f"q{i}", "answer": "a", "created_by": "u1"} for i in range(3)]
+
+    result = bulk_insert(client, "cards", rows, batch_size=2, optional_columns=("created_by",))
+
+    assert result["ok"]
+    assert result["dropped_columns"] == ["created_by"]
+    assert all("created_by" not in r for r in calls[-1])
+
+def test_connection_error_fails_whole_chunk_without_splitting():
+    """Test that transport failures aren't retried row by row"""
+    client = MagicMock()
+    client.table.return_value.insert.return_value.execute.side_effect = ConnectionError("reset")
+    errors = []
+
+    result = bulk_insert(client, "cards", [{"question": "q", "answer": "a"}] * 4, on_error=errors.append)
+
+    assert result["failed"] == 4
+    assert len(errors) == 1
+
+def test_chunk_wide_errors_fail_without_splitting():
+    """Test that RLS, auth and rate-limit failures cost one request per chunk"""
+    from src.bulk_insert import is_row_error
+
+    rls = RuntimeError('new row violates row-level security policy for table "cards" (42501)')
+    limited = RuntimeError("Too Many Requests")
+    limited.status = 429
+    assert not is_row_error(rls) and not is_row_error(limited)
+    assert is_row_error(RuntimeError('duplicate key value violates unique constraint (23505)'))
+
+    client = MagicMock()
+    client.table.return_value.insert.return_value.execute.side_effect = rls
+    errors = []
+
+    result = bulk_insert(client, "cards", [{"question": "q", "answer": "a"}] * 8, on_error=errors.append)
+
+    assert result["failed"] == 8
+    assert len(errors) == 1
+
+def test_split_depth_is_capped(monkeypatch):
+    """Test that bisection stops after BULK_INSERT_MAX_SPLIT_DEPTH levels"""
+    import sys
+    monkeypatch.setattr(sys.modules["src.bulk_insert"], "BULK_INSERT_MAX_SPLIT_DEPTH", 1)
+    client, calls = make_client(fail_if=lambda r: True)
+
+    result = bulk_insert(client, "cards", [{"question": f"q{i}", "answer": "a"} for i in range(8)], batch_size=8)
+
+    assert [len(c) for c in calls] == [8, 4, 4]
+    assert result["failed"] == 8
+
+def test_bulk_insert_async_matches_sync_behaviour():
+    """Test the async engine's chunking and per-row isolation"""
+    import asyncio
+    from src.bulk_insert import bulk_insert_async
+
+    sent = []
+
+    async def execute(chunk):
+        sent.append(len(chunk))
+        if any(r["question"] == "bad" for r in chunk):
+            raise RuntimeError("violates check constraint")
+        return [{"id": r["question"]} for r in chunk]
+
+    rows = [{"question": q, "answer": "a"} for q in ["q0", "q1", "bad", "q3", "q4"]]
+    result = asyncio.run(bulk_insert_async(execute, rows, batch_size=3))
+
+    assert [r["ok"] for r in result["rows"]] == [True, True, False, True, True]
+    assert [c["ok"] for c in result["chunks"]] == [False, True]
+    assert sent[0] == 3 and sent[-1] == 2
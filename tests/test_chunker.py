@@ -0,0 +1,30 @@
+import pytest
+from src.chunker import iter_chunks, iter_sentences, count_tokens
+
+
+def test_iter_sentences_across_pieces():
+    """Test that sentences split across streamed pieces are rejoined"""
+    pieces = ["The cat sat. The dog", "ran away. End"]
+    assert list(iter_sentences(pieces)) == ["The cat sat.", "The dog ran away.", "End"]
+
+def test_chunks_respect_token_budget():
+    """Test that every chunk stays within the token budget"""
+    text = " ".join(f"Sentence number {i} is here." for i in range(100))
+    chunks = list(iter_chunks(text, max_tokens=20, overlap_tokens=5))
+
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= 20 for c in chunks)
+    assert all(c.endswith(".") for c in chunks)
+
+def test_chunks_overlap():
+    """Test that trailing sentences are repeated in the next chunk"""
+    text = "One two three. Four five six. Seven eight nine. Ten eleven twelve."
+    chunks = list(iter_chunks(text, max_tokens=6, overlap_tokens=3))
+
+    assert chunks[0] == "One two three. Four five six."
+    assert chunks[1].startswith("Four five six.")
+
+def test_long_sentence_is_split():
+    """Test that a sentence over the budget is split by words"""
+    chunks = list(iter_chunks("word " * 25, max_tokens=10, overlap_tokens=0))
+    assert [count_tokens(c) for c in chunks] == [10, 10, 5]
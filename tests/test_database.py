@@ -5,27 +5,44 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Keep cached reads from leaking between tests"""
+    from src.user_cache import USER_CACHE
+    USER_CACHE.clear()
+    yield
+    USER_CACHE.clear()
+
 @pytest.fixture
-def mock_supabase_client():
+def mock_supabase_client(monkeypatch):
     """Create a mock Supabase client"""
-    with patch('src.database.supabase.create_client') as mock_client:
-        mock_instance = MagicMock()
-        mock_client.return_value = mock_instance
-        yield mock_instance
+    from src.supabase_pool import SUPABASE_CLIENTS
+    # config.settings is read when src.database is imported, so patch the bound values
+    monkeypatch.setattr('src.database.SUPABASE_URL', 'test_url')
+    monkeypatch.setattr('src.database.SUPABASE_KEY', 'test_key')
+    mock_client = MagicMock(return_value=MagicMock())
+    monkeypatch.setattr('src.supabase_pool.create_client', mock_client)
+    SUPABASE_CLIENTS.clear()
+    yield mock_client
+    SUPABASE_CLIENTS.clear()
 
 def test_init_supabase(mock_supabase_client):
     """Test Supabase client initialization"""
     from src.database import init_supabase
     client = init_supabase()
     mock_supabase_client.assert_called_once_with('test_url', 'test_key')
+    assert init_supabase() is client
 
 @patch('src.database.init_supabase')
 def test_save_flashcards(mock_init_supabase):
-    """Test saving flashcards to database"""
+    """Test saving flashcards to database in one bulk insert"""
     mock_client = MagicMock()
     mock_init_supabase.return_value = mock_client
     mock_table = MagicMock()
     mock_client.table.return_value = mock_table
+    mock_table.insert.return_value.execute.return_value = MagicMock(
+        error=None, data=[{"id": 1}, {"id": 2}]
+    )
     
     flashcards = [
         {"question": "What is Python?", "answer": "A programming language"},
@@ -35,41 +52,86 @@ def test_save_flashcards(mock_init_supabase):
     
     from src.database import save_flashcards
     
-    save_flashcards(flashcards, user_id)
+    results = save_flashcards(flashcards, user_id)
     
-    assert mock_client.table.call_count == 2
-    assert mock_table.insert.call_count == 2
-    mock_table.insert.assert_any_call({
-        "question": "What is Python?",
-        "answer": "A programming language",
-        "created_by": user_id
-    })
-    mock_table.insert.assert_any_call({
-        "question": "What is Streamlit?",
-        "answer": "A Python web framework",
-        "created_by": user_id
-    })
+    assert mock_client.table.call_count == 1
+    mock_table.insert.assert_called_once_with([
+        {"question": "What is Python?", "answer": "A programming language",
+         "created_by": user_id, "source": "original"},
+        {"question": "What is Streamlit?", "answer": "A Python web framework",
+         "created_by": user_id, "source": "original"},
+    ])
+    assert results == [{"id": 1}, {"id": 2}]
 
 @patch('src.database.init_supabase')
 def test_get_user_flashcards(mock_init_supabase):
-    """Test retrieving user flashcards"""
+    """Test retrieving user flashcards with a projection, newest first"""
     mock_client = MagicMock()
+    mock_init_supabase.return_value = mock_client
     mock_table = MagicMock()
     mock_client.table.return_value = mock_table
+    for method in ("select", "eq", "or_", "order", "limit"):
+        getattr(mock_table, method).return_value = mock_table
     mock_execute = MagicMock()
-    mock_table.eq.return_value = mock_table
     mock_execute.data = [
-        {"id": 1, "question": "Test Q1", "answer": "Test A1", "created_by": "user1"},
-        {"id": 2, "question": "Test Q2", "answer": "Test A2", "created_by": "user1"}
+        {"id": 2, "question": "Test Q2", "answer": "Test A2", "created_at": "2024-01-02"},
+        {"id": 1, "question": "Test Q1", "answer": "Test A1", "created_at": "2024-01-01"}
     ]
     mock_table.execute.return_value = mock_execute
     
     from src.database import get_user_flashcards
     
     result = get_user_flashcards("user1")
-    mock_table.select.assert_called_with("*")
+    mock_table.select.assert_called_with("id,question,answer,created_at")
     mock_table.eq.assert_called_with("created_by", "user1")
+    mock_table.order.assert_any_call("created_at", desc=True)
     mock_table.execute.assert_called_once()
     assert len(result) == 2
-    assert result[0]["question"] == "Test Q1"
-    assert result[1]["answer"] == "Test A2"
+    assert result[0]["question"] == "Test Q2"
+    assert result[1]["answer"] == "Test A1"
+
+@patch('src.database.init_supabase')
+def test_get_user_flashcards_page_cursor(mock_init_supabase):
+    """Test that a full page returns a cursor that continues after its last row"""
+    mock_client = MagicMock()
+    mock_init_supabase.return_value = mock_client
+    mock_table = MagicMock()
+    mock_client.table.return_value = mock_table
+    for method in ("select", "eq", "or_", "order", "limit"):
+        getattr(mock_table, method).return_value = mock_table
+    mock_table.execute.return_value = MagicMock(data=[
+        {"id": i, "question": f"Q{i}", "answer": "A", "created_at": "2024-01-01T00:00:00+00:00"}
+        for i in (3, 2, 1)
+    ])
+
+    from src.database import get_user_flashcards_page
+
+    page = get_user_flashcards_page("user1", page_size=2)
+    assert [c["id"] for c in page["items"]] == [3, 2]
+    mock_table.limit.assert_called_with(3)
+
+    get_user_flashcards_page("user1", page_size=2, cursor=page["next_cursor"])
+    mock_table.or_.assert_called_with(
+        'created_at.lt."2024-01-01T00:00:00+00:00",and(created_at.eq."2024-01-01T00:00:00+00:00",id.lt."2")'
+    )
+
+@patch('src.database.init_supabase')
+def test_profile_reads_are_cached_until_update(mock_init_supabase):
+    """Test that get_user_data is served from cache and invalidated by updates"""
+    mock_client = MagicMock()
+    mock_init_supabase.return_value = mock_client
+    mock_table = MagicMock()
+    mock_client.table.return_value = mock_table
+    for method in ("select", "eq", "single", "update"):
+        getattr(mock_table, method).return_value = mock_table
+    mock_table.execute.return_value = MagicMock(data={"id": "user1", "full_name": "Ada"})
+
+    from src.database import get_user_data, update_user_profile
+
+    assert get_user_data("user1")["full_name"] == "Ada"
+    get_user_data("user1")
+    assert mock_table.execute.call_count == 1
+
+    update_user_profile("user1", {"full_name": "Grace"})
+    get_user_data("user1")
+    assert mock_table.execute.call_count == 3
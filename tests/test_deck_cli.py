@@ -0,0 +1,65 @@
+import csv
+import json
+import pytest
+from unittest.mock import patch
+
+from src.deck_cli import build_decks, find_documents, main
+
+
+def _fake_cards(chunk, **kwargs):
+    return [{"question": f"What is {chunk.split()[0]}?", "answer": chunk}]
+
+@pytest.fixture
+def docs(tmp_path):
+    (tmp_path / "a.txt").write_text("Alpha one two. Beta three four.")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.md").write_text("# Gamma\n\nGamma five six.")
+    (tmp_path / "old.doc").write_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 64)
+    (tmp_path / "image.png").write_bytes(b"\x89PNG")
+    return tmp_path
+
+def test_find_documents_filters_extensions(docs):
+    """Test that only supported document types are picked up"""
+    found = [p.replace(str(docs), "") for p in find_documents(str(docs))]
+    assert found == ["/a.txt", "/sub/b.md"]
+    assert len(find_documents(str(docs), recursive=False)) == 1
+
+@patch("src.deck_cli.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_build_decks_in_order_with_stats(mock_generate, docs):
+    """Test that decks come back in input order and stats are counted"""
+    stats = {}
+    paths = [str(docs / "a.txt"), str(docs / "old.doc"), str(docs / "sub" / "b.md")]
+    decks = list(build_decks(paths, concurrency=3, chunk_tokens=3, overlap_tokens=0, stats=stats))
+
+    assert [d["path"] for d in decks] == paths
+    assert [c["question"] for c in decks[0]["cards"]] == ["What is Alpha?", "What is Beta?"]
+    assert decks[0]["cards"][1]["id"] == 1
+    assert decks[1]["cards"] == [] and "Legacy .doc" in decks[1]["errors"][0]
+    assert stats["docs"] == 3 and stats["failed_docs"] == 1
+    assert stats["cards"] == 4 and stats["tokens"] > 0
+
+@patch("src.deck_cli.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_main_writes_jsonl_and_csv(mock_generate, docs, tmp_path, capsys):
+    """Test that the CLI writes one row per card and prints throughput"""
+    out = tmp_path / "decks.jsonl"
+    assert main([str(docs), "--out", str(out), "--chunk-tokens", "3"]) == 0
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert {r["deck"] for r in rows} == {"a.txt", "sub/b.md"}
+    assert "cards/s" in capsys.readouterr().out
+
+    out_csv = tmp_path / "decks.csv"
+    main([str(docs), "--out", str(out_csv), "--max-cards", "1"])
+    with open(out_csv) as fh:
+        assert len(list(csv.DictReader(fh))) == 2
+
+@patch("src.deck_cli.save_deck", return_value=2)
+@patch("src.deck_cli.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_main_saves_through_database(mock_generate, mock_save, docs, capsys):
+    """Test that --save bulk-inserts each deck for the given user"""
+    assert main([str(docs), "--save", "--user-id", "u1", "--chunk-tokens", "3"]) == 0
+    assert mock_save.call_count == 2
+    assert mock_save.call_args[0][1] == "u1"
+    assert "4 saved" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit):
+        main([str(docs), "--save"])
@@ -0,0 +1,47 @@
+import io
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src import extract_cache
+from src.extract_cache import cached_chunks, cached_extract
+from src.generation_cache import GenerationCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    with patch.object(extract_cache, "_CACHE", GenerationCache(max_entries=2, path=None)):
+        yield
+
+def _upload(data, type_="text/plain"):
+    f = io.BytesIO(data)
+    f.type = type_
+    return f
+
+def test_same_content_is_extracted_once():
+    """Test that re-uploads with identical bytes reuse the extracted text"""
+    extract = MagicMock(side_effect=lambda f: f.read().decode())
+
+    assert cached_extract(_upload(b"hello"), extract) == "hello"
+    assert cached_extract(_upload(b"hello"), extract) == "hello"
+    assert cached_extract(_upload(b"other"), extract) == "other"
+    assert extract.call_count == 2
+
+def test_errors_are_not_cached_and_lru_evicts():
+    """Test that failed extractions retry and old documents are evicted"""
+    extract = MagicMock(side_effect=[ValueError("bad"), "a", "b", "c", "a"])
+    with pytest.raises(ValueError):
+        cached_extract(_upload(b"a"), extract)
+
+    for data in (b"a", b"b", b"c", b"a"):
+        cached_extract(_upload(data), extract)
+    assert extract.call_count == 5
+
+def test_chunks_are_cached_by_text_and_settings():
+    """Test that chunk boundaries are reused for the same text and settings"""
+    text = " ".join(f"Sentence {i} is here." for i in range(20))
+    with patch("src.extract_cache.iter_chunks", wraps=extract_cache.iter_chunks) as chunker:
+        first = cached_chunks(text, max_tokens=8, overlap_tokens=0)
+        first.append("mutated")
+        assert cached_chunks(text, max_tokens=8, overlap_tokens=0) == first[:-1]
+        cached_chunks(text, max_tokens=12, overlap_tokens=0)
+    assert chunker.call_count == 2
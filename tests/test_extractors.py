@@ -0,0 +1,57 @@
+import io
+import pytest
+
+from src.extractors import (
+    UnsupportedFormat,
+    detect_encoding,
+    extract_document_text,
+    iter_document_text,
+    sniff_format,
+)
+from tests.test_pdf_extract import _make_pdf
+
+
+def _docx_bytes(paragraphs):
+    import docx
+    doc = docx.Document()
+    for p in paragraphs:
+        doc.add_paragraph(p)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+def test_sniffing_ignores_reported_mime():
+    """Test that formats come from magic bytes, not the browser's MIME type"""
+    assert sniff_format(_make_pdf(["Hi."]), "notes.txt", "text/plain") == "pdf"
+    assert sniff_format(_docx_bytes(["Hi"]), "notes.pdf", "application/pdf") == "docx"
+    assert sniff_format(b"<!DOCTYPE html><p>Hi</p>", "page.txt") == "html"
+    assert sniff_format(b"# Title", "readme.md") == "md"
+    assert sniff_format(b"plain words") == "txt"
+
+def test_legacy_doc_and_binary_are_rejected():
+    """Test that application/msword and binary blobs fail before parsing"""
+    ole = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 100
+    with pytest.raises(UnsupportedFormat, match="Legacy .doc"):
+        iter_document_text(ole, "old.doc", "application/msword")
+    with pytest.raises(UnsupportedFormat):
+        sniff_format(b"\x00\x01\x02binary" * 10)
+
+def test_text_encodings():
+    """Test that UTF-8, UTF-16 and cp1252 text decode correctly"""
+    assert detect_encoding("naïve".encode("utf-8")) == "utf-8"
+    assert extract_document_text("naïve café".encode("utf-16")) == "naïve café"
+    assert extract_document_text("naïve café".encode("cp1252")) == "naïve café"
+    assert extract_document_text("Déjà vu, “garçon”.".encode("cp1252")) == "Déjà vu, “garçon”."
+    russian = "Привет, как дела? Это тест текста на русском языке."
+    assert extract_document_text(russian.encode("cp1251")) == russian
+
+def test_documents_stream_text():
+    """Test that each extractor yields readable text pieces"""
+    assert extract_document_text(_docx_bytes(["First.", "Second."])) == "First.\nSecond."
+    assert "Page 1 text." in extract_document_text(_make_pdf(["Page 0 text.", "Page 1 text."]))
+
+    md = b"# Title\n\nSome **bold** and [a link](http://x).\n\n```\ncode *kept*\n```\n"
+    assert extract_document_text(md, "notes.md") == "Title\n\nSome bold and a link.\n\ncode *kept*"
+
+    html = b"<html><head><title>T</title><style>p{}</style></head><body><p>One &amp; two</p><script>x()</script><p>Three</p></body></html>"
+    assert extract_document_text(html).split() == ["One", "&", "two", "Three"]
@@ -1,5 +1,5 @@
 import pytest
-from src.flashcard_generator import create_flashcards
+from src.flashcard_generator import create_flashcards, dedupe_cards
 
 def test_create_flashcards_with_valid_input():
     """Test flashcard creation with valid question data"""
@@ -51,3 +51,13 @@ def test_create_flashcards_non_list_input():
     # Test with integer input
     result = create_flashcards(123)
     assert result["error"] == "Input must be a list of questions"
+
+def test_dedupe_cards_keeps_first_of_each_question():
+    """Test that repeated questions across chunks are dropped, in order, up to max_cards"""
+    chunks = [
+        [{"question": "What is Python?", "answer": "A language"}],
+        [{"question": "what is python", "answer": "Again"}, {"question": "What is SQL?", "answer": "A query language"}],
+        [{"question": "?!", "answer": "No words"}, {"question": "What is Git?", "answer": "Version control"}],
+    ]
+    assert [c["answer"] for c in dedupe_cards(chunks)] == ["A language", "A query language", "Version control"]
+    assert len(dedupe_cards(chunks, max_cards=2)) == 2
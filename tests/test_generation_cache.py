@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import patch
+
+from src.generation_cache import GenerationCache, make_key
+
+
+def test_make_key_is_stable_and_param_sensitive():
+    """Test that keys depend on model, prompt and params only"""
+    k1 = make_key("m", "hello", {"top_p": 0.9, "max_new_tokens": 10})
+    k2 = make_key("m", "hello", {"max_new_tokens": 10, "top_p": 0.9})
+    k3 = make_key("m", "hello", {"max_new_tokens": 10, "top_p": 0.9, "seed": 1})
+
+    assert k1 == k2
+    assert k1 != k3
+    assert k1 != make_key("other", "hello", {"top_p": 0.9, "max_new_tokens": 10})
+
+def test_lru_eviction_and_stats():
+    """Test LRU eviction in the memory tier"""
+    cache = GenerationCache(max_entries=2, path=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+def test_ttl_expiry():
+    """Test that expired entries are dropped"""
+    cache = GenerationCache(ttl=10, path=None)
+    with patch('src.generation_cache.time.time', return_value=1000.0):
+        cache.set("a", "value")
+    with patch('src.generation_cache.time.time', return_value=1011.0):
+        assert cache.get("a") is None
+
+def test_disk_tier(tmp_path):
+    """Test that the SQLite tier survives a fresh in-memory cache"""
+    path = str(tmp_path / "cache.db")
+    GenerationCache(path=path).set("k", [{"generated_text": "hi"}])
+
+    fresh = GenerationCache(path=path)
+    assert fresh.get("k") == [{"generated_text": "hi"}]
+    assert fresh.stats()["disk_hits"] == 1
@@ -0,0 +1,27 @@
+import pytest
+
+from src import http_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    http_client.close_http_client()
+    yield
+    http_client.close_http_client()
+
+def test_get_http_client_is_shared():
+    """Test that every caller gets the same pooled client"""
+    assert http_client.get_http_client() is http_client.get_http_client()
+
+def test_closed_client_is_recreated():
+    """Test that a closed client is replaced on next use"""
+    first = http_client.get_http_client()
+    http_client.close_http_client()
+    second = http_client.get_http_client()
+    assert second is not first
+    assert not second.is_closed
+
+def test_http2_disabled_without_h2(monkeypatch):
+    """Test that HTTP/2 is only enabled when h2 is importable"""
+    monkeypatch.setattr(http_client, "HTTP_HTTP2", False)
+    assert http_client._http2_enabled() is False
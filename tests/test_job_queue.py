@@ -0,0 +1,114 @@
+import time
+import pytest
+from unittest.mock import patch
+
+from src.job_queue import JobStore, process_next, submit_deck_job
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+def _fake_cards(chunk, **kwargs):
+    if "boom" in chunk:
+        raise RuntimeError("❌ generation failed")
+    return [{"question": f"What about {chunk.split()[0]}?", "answer": chunk}]
+
+def _drain(store, worker="w1"):
+    while process_next(store, worker):
+        pass
+
+@patch("src.job_queue.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_deck_job_runs_to_completion(mock_generate, store):
+    """Test that chunks are processed, stored and merged into one deck"""
+    text = "Alpha one two. Beta three four. Alpha one two."
+    job_id = submit_deck_job(store, text, user_id="u1", chunk_tokens=3, overlap_tokens=0)
+
+    assert store.get(job_id)["total"] == 3
+    _drain(store)
+
+    job = store.get(job_id)
+    assert job["status"] == "done" and job["progress"] == 1.0
+    # The repeated chunk's question is de-duplicated
+    assert [c["question"] for c in store.result(job_id)["cards"]] == ["What about Alpha?", "What about Beta?"]
+    assert store.list_jobs("u1")[0]["id"] == job_id
+
+@patch("src.job_queue.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_failed_chunks_retry_then_resume(mock_generate, store):
+    """Test that failing chunks are retried, recorded, and can be resumed"""
+    job_id = submit_deck_job(store, "Alpha one. boom two.", chunk_tokens=2, overlap_tokens=0)
+    _drain(store)
+
+    job = store.get(job_id)
+    assert job["status"] == "done" and job["done"] == 1 and job["failed"] == 1
+    assert mock_generate.call_count == 1 + 3  # JOB_MAX_ATTEMPTS for the bad chunk
+    assert store.chunk_errors(job_id) == [{"idx": 1, "error": "❌ generation failed"}]
+
+    mock_generate.side_effect = lambda chunk, **kw: [{"question": "Fixed?", "answer": chunk}]
+    assert store.resume(job_id)
+    _drain(store)
+    assert store.get(job_id)["failed"] == 0
+    assert len(store.result(job_id)["cards"]) == 2
+
+@patch("src.job_queue.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_cancel_keeps_partial_results(mock_generate, store):
+    """Test that a cancelled job stops handing out chunks but keeps finished ones"""
+    job_id = submit_deck_job(store, "Alpha one. Beta two. Gamma three.", chunk_tokens=2, overlap_tokens=0)
+    assert process_next(store, "w1")
+    assert store.cancel(job_id)
+
+    assert not process_next(store, "w1")
+    assert store.get(job_id)["status"] == "cancelled"
+    assert len(store.chunk_results(job_id)) == 1
+
+    assert store.resume(job_id)
+    _drain(store)
+    assert store.get(job_id)["status"] == "done"
+    assert mock_generate.call_count == 3
+
+def test_expired_lease_is_reclaimed(store):
+    """Test that a chunk held by a dead worker is handed out again"""
+    job_id = store.submit("deck", ["Alpha one."])
+    first = store.claim("dead-worker", lease=0.01)
+    assert first["idx"] == 0
+    assert store.claim("w2") is None
+
+    time.sleep(0.02)
+    again = store.claim("w2")
+    assert again["job_id"] == job_id and again["idx"] == 0 and again["attempts"] == 2
+
+@patch("src.job_queue.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_expired_finalize_lease_is_reclaimed(mock_generate, store):
+    """Test that a job whose finalizing worker died is finalized by another"""
+    job_id = submit_deck_job(store, "Alpha one.", chunk_tokens=2, overlap_tokens=0)
+    assert process_next(store, "w1")
+    task = store.claim("dead-worker", lease=0.01)
+    assert task["finalize"] and store.get(job_id)["status"] == "finalizing"
+    assert store.claim("w2") is None
+
+    time.sleep(0.02)
+    _drain(store, "w2")
+    assert store.get(job_id)["status"] == "done"
+    # The worker that lost its lease can no longer overwrite the outcome
+    assert not store.finish(job_id, "failed", error="late", worker_id="dead-worker")
+
+@patch("src.job_queue._save_cards", return_value=1)
+@patch("src.job_queue.generate_cards_from_chunk", side_effect=_fake_cards)
+def test_late_worker_cannot_overwrite_or_save_twice(mock_generate, mock_save, store):
+    """Test that a worker whose lease was reclaimed can't record results or re-save the deck"""
+    job_id = submit_deck_job(store, "Alpha one.", user_id="u1", save=True, chunk_tokens=2, overlap_tokens=0)
+    store.claim("dead-worker", lease=0.01)
+    time.sleep(0.02)
+    assert process_next(store, "w2")
+
+    assert not store.complete_chunk(job_id, 0, [], worker_id="dead-worker")
+    assert not store.fail_chunk(job_id, 0, "late", worker_id="dead-worker")
+    assert store.chunk_results(job_id)[0][0]["question"] == "What about Alpha?"
+
+    # The finalizing worker moves the job to 'saving' before inserting, so it is never reclaimed
+    task = store.claim("slow-worker", lease=0.01)
+    assert task["finalize"] and store.begin_save(job_id, "slow-worker")
+    time.sleep(0.02)
+    assert store.claim("w2") is None and not store.begin_save(job_id, "w2")
+    assert store.finish(job_id, "done", result={"cards": []}, worker_id="slow-worker")
+    mock_save.assert_not_called()
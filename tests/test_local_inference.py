@@ -0,0 +1,20 @@
+import pytest
+from src.local_inference import LocalSeq2SeqEngine
+
+
+def test_plan_batches_groups_by_length():
+    """Test that prompts of similar length are batched together"""
+    engine = LocalSeq2SeqEngine(max_batch_size=2, max_batch_tokens=1000)
+    batches = engine._plan_batches([50, 5, 48, 6])
+
+    assert batches == [[1, 3], [2, 0]]
+
+def test_plan_batches_respects_padding_budget():
+    """Test that padded tokens per batch stay under the budget"""
+    engine = LocalSeq2SeqEngine(max_batch_size=8, max_batch_tokens=100)
+    lengths = [10, 10, 10, 40, 40]
+    batches = engine._plan_batches(lengths)
+
+    assert sorted(i for b in batches for i in b) == [0, 1, 2, 3, 4]
+    for b in batches:
+        assert max(lengths[i] for i in b) * len(b) <= 100
@@ -0,0 +1,39 @@
+import pytest
+
+from src.model_router import ModelRouter
+
+FAMILY = {"pegasus": "m/pegasus", "t5": "m/t5", "flan": "m/flan"}
+
+
+def test_requested_model_first_then_fallback_order():
+    """Test that an explicit choice is tried first, then the family order"""
+    router = ModelRouter()
+    assert router.candidates(FAMILY, "t5") == ["t5", "pegasus", "flan"]
+
+def test_unknown_choice_uses_fallback_order():
+    """Test that an unknown choice falls back to the family order"""
+    router = ModelRouter()
+    assert router.candidates(FAMILY, "missing") == ["pegasus", "t5", "flan"]
+
+def test_auto_prefers_fastest_healthy_model():
+    """Test latency-aware ordering for auto"""
+    router = ModelRouter()
+    for _ in range(5):
+        router.record("m/pegasus", 2.0, True)
+        router.record("m/t5", 0.5, True)
+        router.record("m/flan", 0.1, False)
+
+    assert router.candidates(FAMILY, "auto") == ["t5", "pegasus", "flan"]
+    assert router.stats("m/t5")["p50_ms"] == 500.0
+    assert router.stats("m/flan")["error_rate"] == 1.0
+
+def test_unhealthy_requested_model_is_tried_last():
+    """Test failover away from a model with an open circuit"""
+    router = ModelRouter(health_check=lambda model_id: model_id != "m/pegasus")
+    assert router.candidates(FAMILY, "pegasus") == ["t5", "flan", "pegasus"]
+
+def test_cold_models_are_tried_after_warm_ones():
+    """Test that auto and fallbacks prefer models the warm-up found warm"""
+    router = ModelRouter(warm_check=lambda model_id: {"m/pegasus": False, "m/t5": True}.get(model_id))
+    assert router.candidates(FAMILY, "auto") == ["t5", "flan", "pegasus"]
+    assert router.candidates(FAMILY, "pegasus") == ["pegasus", "t5", "flan"]
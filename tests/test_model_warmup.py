@@ -0,0 +1,36 @@
+import pytest
+
+from src.model_warmup import WarmupScheduler
+
+
+def test_warm_all_records_warm_and_cold_models():
+    """Test that successful pings mark models warm and failures cold"""
+    def ping(model_id):
+        if model_id == "m/cold":
+            raise RuntimeError("Model is currently loading")
+        return True
+
+    scheduler = WarmupScheduler(ping=ping, interval=0)
+    states = scheduler.warm_all(["m/warm", "m/cold", "m/warm"])
+
+    assert scheduler.is_warm("m/warm") is True
+    assert scheduler.is_warm("m/cold") is False
+    assert scheduler.is_warm("m/never-pinged") is None
+    assert states["m/warm"]["state"] == "warm"
+    assert states["m/warm"]["pings"] == 1
+    assert states["m/cold"]["error"] == "Model is currently loading"
+
+def test_model_goes_cold_after_ttl():
+    """Test that a model without a recent successful ping is cold again"""
+    scheduler = WarmupScheduler(ping=lambda model_id: True, interval=0, warm_ttl=0)
+    scheduler.warm_all(["m/a"])
+    assert scheduler.is_warm("m/a") is False
+
+def test_start_is_idempotent():
+    """Test that a second start() doesn't spawn another keep-alive thread"""
+    scheduler = WarmupScheduler(ping=lambda model_id: True, interval=60)
+    try:
+        assert scheduler.start(["m/a"]) is True
+        assert scheduler.start(["m/a"]) is False
+    finally:
+        scheduler.stop()
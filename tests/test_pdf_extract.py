@@ -0,0 +1,62 @@
+import pytest
+
+from src.pdf_extract import PdfTooLarge, extract_pdf_text, iter_pdf_pages
+from src.chunker import iter_chunks
+
+
+def _make_pdf(pages):
+    """Build a minimal PDF with one line of Helvetica text per page."""
+    n = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(n)) + b"] /Count %d >>" % n,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def test_pages_are_streamed_in_order():
+    """Test that page text is yielded lazily, one item per page"""
+    pdf = _make_pdf([f"Page {i} text." for i in range(5)])
+    pages = iter_pdf_pages(pdf, workers=1)
+
+    assert next(pages).strip() == "Page 0 text."
+    assert [p.strip() for p in pages] == [f"Page {i} text." for i in range(1, 5)]
+    assert extract_pdf_text(pdf).startswith("Page 0 text.")
+
+def test_page_char_and_byte_caps():
+    """Test that page/char caps truncate and the byte cap rejects"""
+    pdf = _make_pdf([f"Page {i} text." for i in range(5)])
+
+    assert len(list(iter_pdf_pages(pdf, max_pages=2, workers=1))) == 2
+    assert "".join(iter_pdf_pages(pdf, max_chars=8, workers=1)) == "Page 0 t"
+    with pytest.raises(PdfTooLarge):
+        list(iter_pdf_pages(pdf, max_bytes=100))
+
+def test_parallel_extraction_matches_serial():
+    """Test that the process pool path yields the same pages in order"""
+    pdf = _make_pdf([f"Sentence {i} is here." for i in range(12)])
+
+    serial = list(iter_pdf_pages(pdf, workers=1))
+    parallel = list(iter_pdf_pages(pdf, workers=2, parallel_min_pages=4))
+
+    assert parallel == serial
+    assert list(iter_chunks(iter_pdf_pages(pdf, workers=1), max_tokens=8, overlap_tokens=0))[0] == \
+        "Sentence 0 is here. Sentence 1 is here."
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.profiling import ColumnProfile, DatasetProfiler, profile_frames
+
+
+def _chunks(df, size):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+def test_streaming_stats_match_pandas():
+    """Test that chunked mean/std/min/max/counts match the whole-frame values"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "x": rng.normal(10, 3, 5000),
+        "label": rng.choice(["a", "b", "c"], 5000, p=[0.6, 0.3, 0.1]),
+    })
+    df.loc[::10, "x"] = np.nan
+
+    result = profile_frames(_chunks(df, 700), max_rows=0, seed=1)
+    x = result["columns"]["x"]
+
+    assert result["rows_read"] == 5000
+    assert x["count"] == df["x"].count()
+    assert x["nulls"] == 500
+    assert x["mean"] == pytest.approx(df["x"].mean())
+    assert x["std"] == pytest.approx(df["x"].std())
+    assert x["min"] == pytest.approx(df["x"].min())
+    assert x["max"] == pytest.approx(df["x"].max())
+    assert x["quantiles"]["50%"] == pytest.approx(df["x"].median(), abs=0.3)
+
+    label = result["columns"]["label"]
+    assert label["distinct"] == 3 and label["distinct_exact"]
+    assert label["top"][0] == {"value": "a", "count": int((df["label"] == "a").sum())}
+
+def test_approximate_distinct_and_top_k():
+    """Test that distinct counts past the sketch size are estimated closely"""
+    col = ColumnProfile(distinct_sketch=256, rng=np.random.default_rng(0))
+    values = pd.Series(np.arange(20000) % 5000)
+    for chunk in _chunks(values, 3000):
+        col.update(chunk)
+    col.update(pd.Series([7] * 5000))
+
+    result = col.result()
+    assert not result["distinct_exact"]
+    assert result["distinct"] == pytest.approx(5000, rel=0.15)
+    assert result["top"][0]["value"] == 7
+
+def test_row_cap_and_sampling():
+    """Test that the row cap truncates reading and sampling profiles a fraction"""
+    df = pd.DataFrame({"n": range(10000)})
+
+    capped = profile_frames(_chunks(df, 1000), max_rows=2500)
+    assert capped["rows_read"] == 2500
+    assert capped["truncated"]
+    assert capped["columns"]["n"]["max"] == 2499
+
+    profiler = DatasetProfiler(max_rows=0, sample_rate=0.1, seed=3)
+    for chunk in _chunks(df, 1000):
+        profiler.update(chunk)
+    result = profiler.result()
+    assert result["rows_read"] == 10000 and not result["truncated"]
+    assert 700 < result["rows_profiled"] < 1300
+    assert result["columns"]["n"]["mean"] == pytest.approx(5000, rel=0.1)
+
+def test_nested_values_are_json_safe():
+    """Test that list/dict cells and timestamps don't break profiling"""
+    df = pd.DataFrame({
+        "tags": [["a"], ["a"], {"k": 1}, None],
+        "when": pd.to_datetime(["2024-01-01", "2024-01-01", "2024-01-02", None]),
+    })
+    result = profile_frames([df])
+    assert result["columns"]["tags"]["top"][0] == {"value": "['a']", "count": 2}
+    assert result["columns"]["tags"]["nulls"] == 1
+    assert result["columns"]["when"]["distinct"] == 2
+    assert isinstance(result["columns"]["when"]["top"][0]["value"], str)
@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import patch, MagicMock
+
+from src.resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy, RetryBudget, is_retryable
+
+
+class _HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = MagicMock(status_code=status)
+
+
+def test_is_retryable():
+    """Test which errors are worth retrying"""
+    assert is_retryable(_HTTPError(503))
+    assert is_retryable(_HTTPError(429))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(_HTTPError(400))
+    assert not is_retryable(ValueError("bad input"))
+
+def test_breaker_opens_and_recovers():
+    """Test closed -> open -> half_open -> closed transitions"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    with patch('src.resilience.time.monotonic', return_value=100.0):
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert breaker.allow() > 0
+
+    with patch('src.resilience.time.monotonic', return_value=111.0):
+        assert breaker.allow() == 0
+        assert breaker.state == "half_open"
+        assert breaker.allow() > 0  # only one probe at a time
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+@patch('src.resilience.time.sleep')
+def test_policy_retries_then_fails_fast(mock_sleep):
+    """Test retries on transient errors and fast failure once the circuit opens"""
+    policy = ResiliencePolicy(max_attempts=3)
+    policy.breaker("m").failure_threshold = 3
+    fn = MagicMock(side_effect=_HTTPError(503))
+
+    with pytest.raises(_HTTPError):
+        policy.call("m", fn)
+    assert fn.call_count == 3
+
+    with pytest.raises(CircuitOpenError):
+        policy.call("m", fn)
+    assert fn.call_count == 3
+
+def test_policy_does_not_retry_client_errors():
+    """Test that 4xx errors are raised immediately"""
+    policy = ResiliencePolicy(max_attempts=3)
+    fn = MagicMock(side_effect=_HTTPError(400))
+
+    with pytest.raises(_HTTPError):
+        policy.call("m", fn)
+    assert fn.call_count == 1
+    assert policy.breaker("m").state == "closed"
+
+def test_retry_budget_is_bounded():
+    """Test that the retry budget runs dry without new requests"""
+    budget = RetryBudget(ratio=0.0, min_per_sec=0.0, max_tokens=10)
+    spent = sum(budget.try_spend() for _ in range(10))
+    assert spent == 2
+
+def test_missing_model_trips_breaker_but_bad_requests_do_not_reset_it():
+    """Test that non-retryable errors never count as successes"""
+    policy = ResiliencePolicy(max_attempts=3)
+    breaker = policy.breaker("m")
+    breaker.failure_threshold = 2
+
+    breaker.record_failure()
+    with pytest.raises(_HTTPError):
+        policy.call("m", MagicMock(side_effect=_HTTPError(422)))
+    assert breaker.failures == 1
+
+    with pytest.raises(_HTTPError):
+        policy.call("m", MagicMock(side_effect=_HTTPError(404)))
+    assert breaker.state == "open"
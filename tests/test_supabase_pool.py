@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import MagicMock
+
+from src.supabase_pool import SupabaseRegistry, is_connection_error
+
+
+def test_client_is_created_once_per_credentials():
+    """Test that repeated lookups reuse the same client"""
+    factory = MagicMock(side_effect=lambda url, key: object())
+    registry = SupabaseRegistry(factory=factory, health_interval=0)
+
+    first = registry.get("url", "key")
+    assert registry.get("url", "key") is first
+    assert registry.get("url", "other-key") is not first
+    assert factory.call_count == 2
+
+def test_failed_health_check_reconnects():
+    """Test that a client failing its probe is rebuilt"""
+    factory = MagicMock(side_effect=lambda url, key: object())
+    registry = SupabaseRegistry(factory=factory, health_check=lambda url, key: False, health_interval=1e-9)
+
+    first = registry.get("url", "key")
+    second = registry.get("url", "key")
+    assert second is not first
+    assert registry.stats()["reconnects"] == 1
+
+def test_connection_error_drops_client():
+    """Test that only connection errors make the next get() reconnect"""
+    factory = MagicMock(side_effect=lambda url, key: object())
+    registry = SupabaseRegistry(factory=factory, health_interval=0)
+
+    first = registry.get("url", "key")
+    registry.report_error("url", "key", ValueError("bad column"))
+    assert registry.get("url", "key") is first
+
+    registry.report_error("url", "key", ConnectionError("reset by peer"))
+    assert registry.get("url", "key") is not first
+
+def test_missing_credentials_raise():
+    """Test that a missing URL or key is rejected"""
+    registry = SupabaseRegistry(factory=MagicMock())
+    with pytest.raises(RuntimeError):
+        registry.get("", "key")
+
+def test_is_connection_error():
+    """Test classification of transport errors"""
+    class ConnectTimeout(Exception):
+        pass
+
+    assert is_connection_error(ConnectTimeout())
+    assert not is_connection_error(ValueError("nope"))
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import MagicMock
+
+from src.user_cache import UserCache, cached_per_user
+
+
+def test_read_through_and_invalidate():
+    """Test that loads are cached per user until invalidated"""
+    cache = UserCache(ttl=60)
+    loader = MagicMock(return_value=[{"id": 1}])
+
+    assert cache.get_or_load("flashcards", "u1", "k", loader) == [{"id": 1}]
+    cache.get_or_load("flashcards", "u1", "k", loader)
+    cache.get_or_load("flashcards", "u2", "k", loader)
+    assert loader.call_count == 2
+
+    cache.invalidate("u1")
+    cache.get_or_load("flashcards", "u1", "k", loader)
+    assert loader.call_count == 3
+    assert cache.stats()["hits"] == 1
+
+def test_results_are_copies():
+    """Test that mutating a result doesn't change the cached value"""
+    cache = UserCache(ttl=60)
+    first = cache.get_or_load("flashcards", "u1", "k", lambda: [{"id": 1}])
+    first.append({"id": 2})
+    assert cache.get_or_load("flashcards", "u1", "k", lambda: []) == [{"id": 1}]
+
+def test_errors_and_expired_entries_are_not_served():
+    """Test that error results aren't cached and TTL is honoured"""
+    cache = UserCache(ttl=0)
+    loader = MagicMock(return_value={"error": "boom"})
+    cache.get_or_load("profile", "u1", "k", loader)
+    cache.get_or_load("profile", "u1", "k", loader)
+    assert loader.call_count == 2
+
+def test_invalidate_rows_and_decorator():
+    """Test that writes invalidate every user in the inserted rows"""
+    cache = UserCache(ttl=60)
+    calls = []
+
+    @cached_per_user("flashcards", cache=cache)
+    def load(user_id, page_size=10):
+        calls.append((user_id, page_size))
+        return [user_id]
+
+    load("u1")
+    load("u1")
+    load("u1", page_size=20)
+    assert calls == [("u1", 10), ("u1", 20)]
+
+    cache.invalidate_rows([{"created_by": "u1"}, {"question": "no owner"}])
+    load("u1")
+    assert len(calls) == 3
+
+def test_read_racing_a_write_is_not_cached():
+    """Test that a value loaded before an invalidation isn't stored"""
+    cache = UserCache(ttl=60)
+
+    def stale_loader():
+        cache.invalidate("u1")  # a write lands while the read is in flight
+        return ["stale"]
+
+    cache.get_or_load("flashcards", "u1", "k", stale_loader)
+    assert cache.get_or_load("flashcards", "u1", "k", lambda: ["fresh"]) == ["fresh"]
+
+def test_get_or_load_async():
+    """Test the coroutine read-through path"""
+    import asyncio
+    cache = UserCache(ttl=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return {"id": "u1"}
+
+    async def scenario():
+        await cache.get_or_load_async("profile", "u1", "", load)
+        return await cache.get_or_load_async("profile", "u1", "", load)
+
+    assert asyncio.run(scenario()) == {"id": "u1"}
+    assert len(calls) == 1